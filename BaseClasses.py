@@ -5,12 +5,13 @@ import functools
 import logging
 import random
 import secrets
+import threading
 from argparse import Namespace
 from collections import Counter, deque
 from collections.abc import Collection, MutableSequence
 from enum import IntEnum, IntFlag
-from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple,
-                    Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING)
+from typing import (AbstractSet, Any, Callable, ClassVar, Dict, FrozenSet, Iterable, Iterator, List, Literal, Mapping,
+                    NamedTuple, Optional, Protocol, Sequence, Set, Tuple, Union, TYPE_CHECKING)
 import dataclasses
 
 from typing_extensions import NotRequired, TypedDict
@@ -76,6 +77,8 @@ class MultiWorld():
     itempool: List[Item]
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
+    precollected_changes: int = 0
+    """counts changes to precollected_items, see placement_version"""
     state: CollectionState
 
     plando_options: PlandoOptions
@@ -158,6 +161,8 @@ class MultiWorld():
         self.seed = None
         self.seed_name: str = "Unavailable"
         self.precollected_items = {player: [] for player in self.player_ids}
+        self._sphere_analysis: Optional[SphereAnalysis] = None
+        self._sphere_analysis_lock = threading.Lock()
         self.required_locations = []
         self.light_world_light_cone = False
         self.dark_world_light_cone = False
@@ -490,11 +495,31 @@ class MultiWorld():
 
     def push_precollected(self, item: Item):
         self.precollected_items[item.player].append(item)
+        self.precollected_changes += 1
         self.state.collect(item, True)
 
+    @property
+    def placement_version(self) -> int:
+        """
+        Changes whenever an item is placed into or removed from a location, or the precollected items change.
+        See Location.item_changes for which placements are counted.
+        """
+        return Location.item_changes + self.precollected_changes
+
+    def get_sphere_analysis(self) -> SphereAnalysis:
+        """
+        Returns the SphereAnalysis of the current placement, sweeping only if the placement changed since the last one.
+        Changes to rules or regions are not tracked, so they have to be made before, as in the generation steps.
+        """
+        with self._sphere_analysis_lock:
+            if not self._sphere_analysis or self._sphere_analysis.placement_version != self.placement_version:
+                self._sphere_analysis = SphereAnalysis(self)
+            return self._sphere_analysis
+
     def push_item(self, location: Location, item: Item, collect: bool = True):
         location.item = item
         item.location = location
+        Location.item_changes += 1
         if collect:
             self.state.collect(item, location.advancement, location)
 
@@ -562,10 +587,15 @@ class MultiWorld():
     def can_beat_game(self,
                       starting_state: Optional[CollectionState] = None,
                       locations: Optional[Iterable[Location]] = None) -> bool:
+        if starting_state is None and locations is None:
+            # mid-fill, the placement keeps changing, so a full analysis is only read if it is there already
+            analysis = self._sphere_analysis
+            if analysis and analysis.placement_version == self.placement_version:
+                return analysis.beaten
         if starting_state:
             if self.has_beaten_game(starting_state):
                 return True
-            state = starting_state.copy()
+            state = starting_state.copy(copy_on_write=True)
         else:
             state = CollectionState(self)
             if self.has_beaten_game(state):
@@ -630,46 +660,15 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
-        for location in self.get_filled_locations():
-            if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
-            else:
-                events.add(location)
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        analysis = self.get_sphere_analysis()
+        for sphere in analysis.spheres:
+            yield set(sphere)
+        if analysis.unreachable_sendables:
+            yield set()
+            yield set(analysis.unreachable_sendables)
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -697,6 +696,15 @@ class MultiWorld():
                 return False  # still locations required to be collected
             return True
 
+        if not state:
+            analysis = self.get_sphere_analysis()
+            missing = sorted(location for location in analysis.unreachable
+                             if location_relevant(location) and location_condition(location))
+            if missing:
+                logging.warning(f"Could not access required locations for accessibility check."
+                                f" Missing: {missing}")
+            return analysis.beaten and not missing
+
         locations = [location for location in self.get_locations() if location_relevant(location)]
 
         while locations:
@@ -727,16 +735,249 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class SphereAnalysis:
+    """
+    The logical spheres of a placement, from one sweep over all locations, to be shared by everything reading them.
+    Get it from MultiWorld.get_sphere_analysis, which caches it for the placement_version it was made for.
+
+    Each sphere first collects all reachable events, round by round until no more are, and then all multiserver
+    sendable locations (location.item.code: int) reachable at that point at once.
+    """
+    multiworld: MultiWorld
+    placement_version: int
+    steps: List[Set[Location]]
+    """every set of locations collected at once in sweep order, event rounds and spheres, each only depending on the
+    steps before it"""
+    spheres: List[Set[Location]]
+    """the steps collecting sendable locations, one per sphere"""
+    state: CollectionState
+    """the state after collecting everything reachable"""
+    unreachable: Set[Location]
+    """all locations not reachable with state, filled or not"""
+    unreachable_sendables: Set[Location]
+    beaten: bool
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self.placement_version = multiworld.placement_version
+        state = CollectionState(multiworld)
+        sendables: Set[Location] = set()
+        events: Set[Location] = set()
+        unfilled: List[Location] = []
+        for location in multiworld.get_locations():
+            if location.item is None:
+                unfilled.append(location)
+            elif type(location.item.code) is int and type(location.address) is int:
+                sendables.add(location)
+            else:
+                events.add(location)
+
+        self.steps = []
+        self.spheres = []
+
+        def collect_step(step: Set[Location]) -> None:
+            self.steps.append(step)
+            for location in step:
+                state.collect(location.item, True, location)
+
+        while True:
+            # cull events out
+            while done_events := {event for event in events if event.can_reach(state)}:
+                collect_step(done_events)
+                events -= done_events
+
+            sphere = {location for location in sendables if location.can_reach(state)}
+            if not sphere:
+                break
+            collect_step(sphere)
+            self.spheres.append(sphere)
+            sendables -= sphere
+
+        self.state = state
+        self.unreachable_sendables = sendables
+        self.unreachable = sendables | events | {location for location in unfilled if not location.can_reach(state)}
+        self.beaten = multiworld.has_beaten_game(state)
+
+    def get_states(self) -> Iterator[CollectionState]:
+        """
+        Yields, per step, the state before it, by collecting the steps again without testing what is reachable.
+        Each is a copy-on-write copy, so only copy from them, never collect into them.
+        """
+        state = CollectionState(self.multiworld)
+        for step in self.steps:
+            yield state.copy(copy_on_write=True)
+            for location in step:
+                state.collect(location.item, True, location)
+
+
+class _ItemCountRecorder:
+    """Stands in for a player's prog_items Counter, recording which item names get read and written.
+    Any access that can't be attributed to individual item names marks the recording as untracked.
+    Also used on CollectionState.stale, to record which players' region reachability gets read."""
+    __slots__ = ("counter", "read", "written", "tracked")
+
+    def __init__(self, counter: Counter[str]) -> None:
+        self.counter = counter
+        self.read: Set[str] = set()
+        self.written: Set[str] = set()
+        self.tracked = True
+
+    def __getitem__(self, item: str) -> int:
+        self.read.add(item)
+        return self.counter[item]
+
+    def __setitem__(self, item: str, value: int) -> None:
+        self.written.add(item)
+        self.counter[item] = value
+
+    def __delitem__(self, item: str) -> None:
+        self.written.add(item)
+        del self.counter[item]
+
+    def __contains__(self, item: str) -> bool:
+        self.read.add(item)
+        return item in self.counter
+
+    def get(self, item: str, default: Optional[int] = None) -> Optional[int]:
+        self.read.add(item)
+        return self.counter.get(item, default)
+
+    def __iter__(self) -> Iterator[str]:
+        self.tracked = False
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.tracked = False
+        return len(self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        self.tracked = False
+        return getattr(self.counter, name)
+
+
+class _ProgItemsRecorder:
+    """Stands in for CollectionState.prog_items while one player's rule or collect runs, handing out an
+    _ItemCountRecorder for that player. Any access to another player's items marks the recording as untracked,
+    since changes to them don't invalidate this player's RuleDependencies."""
+    __slots__ = ("prog_items", "player", "recorder")
+
+    def __init__(self, prog_items: Dict[int, Counter[str]], player: int) -> None:
+        self.prog_items = prog_items
+        self.player = player
+        self.recorder = _ItemCountRecorder(prog_items[player])
+
+    def __getitem__(self, player: int) -> Counter[str]:
+        if player == self.player:
+            return self.recorder  # type: ignore[return-value]
+        self.recorder.tracked = False
+        return self.prog_items[player]
+
+    def __setitem__(self, player: int, counter: Counter[str]) -> None:
+        self.recorder.tracked = False
+        self.prog_items[player] = counter
+
+    def __contains__(self, player: int) -> bool:
+        return player in self.prog_items
+
+    def __iter__(self) -> Iterator[int]:
+        self.recorder.tracked = False
+        return iter(self.prog_items)
+
+    def __len__(self) -> int:
+        return len(self.prog_items)
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.tracked = False
+        return getattr(self.prog_items, name)
+
+
+class _PathView(collections.abc.MutableMapping):
+    """View over CollectionState.player_paths, looking Regions and Entrances up in their player's paths."""
+    __slots__ = ("state",)
+
+    def __init__(self, state: CollectionState) -> None:
+        self.state = state
+
+    def __getitem__(self, key: Union[Region, Entrance]) -> PathValue:
+        paths = self.state.player_paths.get(getattr(key, "player", None))
+        if paths is None:
+            raise KeyError(key)
+        return paths[key]
+
+    def __setitem__(self, key: Union[Region, Entrance], value: PathValue) -> None:
+        self.state._own_paths(key.player)[key] = value
+
+    def __delitem__(self, key: Union[Region, Entrance]) -> None:
+        del self.state._own_paths(key.player)[key]
+
+    def __iter__(self) -> Iterator[Union[Region, Entrance]]:
+        for paths in self.state.player_paths.values():
+            yield from paths
+
+    def __len__(self) -> int:
+        return sum(len(paths) for paths in self.state.player_paths.values())
+
+
+class RuleDependencies:
+    """Item names read by the access rules of a player's blocked entrances and unreachable locations during their last
+    evaluation. A spot that stays blocked doesn't need to be re-evaluated until one of its item names changes."""
+    __slots__ = ("dependencies", "dependents")
+
+    dependencies: Dict[Union[Entrance, Location], FrozenSet[str]]
+    dependents: Dict[str, Set[Union[Entrance, Location]]]
+
+    def __init__(self) -> None:
+        self.dependencies = {}
+        self.dependents = {}
+
+    def record(self, spot: Union[Entrance, Location], item_names: FrozenSet[str]) -> None:
+        self.dependencies[spot] = item_names
+        for item_name in item_names:
+            self.dependents.setdefault(item_name, set()).add(spot)
+
+    def forget(self, spot: Union[Entrance, Location]) -> None:
+        item_names = self.dependencies.pop(spot, None)
+        if item_names:
+            for item_name in item_names:
+                dependents = self.dependents.get(item_name)
+                if dependents is not None:
+                    dependents.discard(spot)
+                    if not dependents:
+                        del self.dependents[item_name]
+
+    def invalidate(self, item_names: Iterable[str]) -> None:
+        """Forget every spot that read any of item_names, so it gets re-evaluated."""
+        for item_name in item_names:
+            for spot in self.dependents.pop(item_name, ()):
+                self.forget(spot)
+
+    def clear(self) -> None:
+        self.dependencies.clear()
+        self.dependents.clear()
+
+    def copy(self) -> RuleDependencies:
+        ret = RuleDependencies()
+        ret.dependencies = self.dependencies.copy()
+        ret.dependents = {item_name: spots.copy() for item_name, spots in self.dependents.items()}
+        return ret
+
+
 class CollectionState():
     prog_items: Dict[int, Counter[str]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
     advancements: Set[Location]
-    path: Dict[Union[Region, Entrance], PathValue]
+    player_paths: Dict[int, Dict[Union[Region, Entrance], PathValue]]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    rule_dependencies: Dict[int, RuleDependencies]
+    """only contains players whose world has track_rule_dependencies enabled"""
     allow_partial_entrances: bool
+    _owned_players: Optional[Set[int]]
+    """players whose per-player structures are not shared with a copy-on-write copy, None if nothing is shared"""
+    _owns_checks: bool
+    """False while advancements and locations_checked are shared with a copy-on-write copy"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
@@ -747,21 +988,36 @@ class CollectionState():
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
         self.advancements = set()
-        self.path = {}
+        self.player_paths = {player: {} for player in parent.get_all_ids()}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self.rule_dependencies = {player: RuleDependencies() for player in parent.get_all_ids()
+                                  if parent.worlds[player].track_rule_dependencies}
         self.allow_partial_entrances = allow_partial_entrances
+        self._owned_players = None
+        self._owns_checks = True
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
             for item in items:
                 self.collect(item, True)
 
+    @property
+    def path(self) -> collections.abc.MutableMapping[Union[Region, Entrance], PathValue]:
+        return _PathView(self)
+
     def update_reachable_regions(self, player: int):
+        if self._owned_players is not None and player not in self._owned_players:
+            self._unshare_player(player)
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        rule_dependencies = self.rule_dependencies.get(player)
+        if rule_dependencies is None:
+            queue = deque(self.blocked_connections[player])
+        else:
+            # entrances whose rule only read unchanged items are still blocked
+            queue = deque(self.blocked_connections[player].difference(rule_dependencies.dependencies))
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
@@ -770,7 +1026,10 @@ class CollectionState():
             self.blocked_connections[player].update(start.exits)
             queue.extend(start.exits)
 
-        if world.explicit_indirect_conditions:
+        if rule_dependencies is not None:
+            self._update_reachable_regions_tracked(player, queue, rule_dependencies,
+                                                   world.explicit_indirect_conditions)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
@@ -778,6 +1037,7 @@ class CollectionState():
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
+        paths = self.player_paths[player]
         # run BFS on all connections, and keep track of those blocked by missing items
         while queue:
             connection = queue.popleft()
@@ -792,7 +1052,7 @@ class CollectionState():
                 blocked_connections.remove(connection)
                 blocked_connections.update(new_region.exits)
                 queue.extend(new_region.exits)
-                self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                paths[new_region] = (new_region.name, paths.get(connection, None))
 
                 # Retry connections if the new region can unblock them
                 for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
@@ -802,6 +1062,7 @@ class CollectionState():
     def _update_reachable_regions_auto_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
+        paths = self.player_paths[player]
         new_connection: bool = True
         # run BFS on all connections, and keep track of those blocked by missing items
         while new_connection:
@@ -819,12 +1080,70 @@ class CollectionState():
                     blocked_connections.remove(connection)
                     blocked_connections.update(new_region.exits)
                     queue.extend(new_region.exits)
-                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                    paths[new_region] = (new_region.name, paths.get(connection, None))
                     new_connection = True
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
             queue.extend(blocked_connections)
 
-    def copy(self) -> CollectionState:
+    def _update_reachable_regions_tracked(self, player: int, queue: deque, rule_dependencies: RuleDependencies,
+                                          explicit_indirect_conditions: bool):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        paths = self.player_paths[player]
+        # run BFS on all queued connections, recording the item names read by those that stay blocked
+        while True:
+            new_connection = False
+            while queue:
+                connection = queue.popleft()
+                rule_dependencies.forget(connection)
+                new_region = connection.connected_region
+                if new_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                elif self._can_reach_recorded(connection, rule_dependencies):
+                    if self.allow_partial_entrances and not new_region:
+                        continue
+                    assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                    reachable_regions.add(new_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(new_region.exits)
+                    queue.extend(new_region.exits)
+                    paths[new_region] = (new_region.name, paths.get(connection, None))
+                    new_connection = True
+
+                    if explicit_indirect_conditions:
+                        # Retry connections if the new region can unblock them
+                        for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
+                            if new_entrance in blocked_connections and new_entrance not in queue:
+                                queue.append(new_entrance)
+            if explicit_indirect_conditions or not new_connection:
+                break
+            # region reads aren't recorded, so new regions may unblock any connection
+            queue.extend(blocked_connections)
+
+    def _can_reach_recorded(self, connection: Entrance, rule_dependencies: RuleDependencies) -> bool:
+        """Entrance.can_reach, recording the item names read by its rule if the entrance stays blocked.
+        Rules that read other players' items aren't recorded."""
+        prog_items = self.prog_items
+        items_recorder = _ProgItemsRecorder(prog_items, connection.player)
+        recorder = items_recorder.recorder
+        self.prog_items = items_recorder  # type: ignore[assignment]
+        try:
+            reachable = connection.can_reach(self)
+        finally:
+            self.prog_items = prog_items
+        if not reachable and recorder.tracked and recorder.read:
+            rule_dependencies.record(connection, frozenset(recorder.read))
+        return reachable
+
+    def copy(self, copy_on_write: bool = False) -> CollectionState:
+        """
+        Returns an independent copy of this state.
+
+        :param copy_on_write: share per-player structures with the copy until either state first modifies them, making
+        the copy cost proportional to the players touched afterwards instead of to the size of the state.
+        """
+        if copy_on_write:
+            return self._copy_on_write()
         ret = CollectionState(self.multiworld)
         ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
         ret.reachable_regions = {player: region_set.copy() for player, region_set in
@@ -832,13 +1151,60 @@ class CollectionState():
         ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
                                    self.blocked_connections.items()}
         ret.advancements = self.advancements.copy()
-        ret.path = self.path.copy()
+        ret.player_paths = {player: paths.copy() for player, paths in self.player_paths.items()}
         ret.locations_checked = self.locations_checked.copy()
+        ret.rule_dependencies = {player: dependencies.copy() for player, dependencies in
+                                 self.rule_dependencies.items()}
+        ret.allow_partial_entrances = self.allow_partial_entrances
+        for function in self.additional_copy_functions:
+            ret = function(self, ret)
+        return ret
+
+    def _copy_on_write(self) -> CollectionState:
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        ret.player_paths = self.player_paths.copy()
+        ret.rule_dependencies = self.rule_dependencies.copy()
+        ret.advancements = self.advancements
+        ret.locations_checked = self.locations_checked
+        # shared reachability is up to date for the shared items, so it doesn't need to be re-verified
+        ret.stale = self.stale.copy()
         ret.allow_partial_entrances = self.allow_partial_entrances
+        # from here on, neither state exclusively owns the structures referenced by both
+        ret._owned_players = set()
+        ret._owns_checks = False
+        self._owned_players = set()
+        self._owns_checks = False
+        # LogicMixin state can't be shared safely, as it may be modified by rules or collect at any time
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
 
+    def _unshare_player(self, player: int) -> None:
+        self.prog_items[player] = self.prog_items[player].copy()
+        self.reachable_regions[player] = self.reachable_regions[player].copy()
+        self.blocked_connections[player] = self.blocked_connections[player].copy()
+        self.player_paths[player] = self.player_paths[player].copy()
+        if player in self.rule_dependencies:
+            self.rule_dependencies[player] = self.rule_dependencies[player].copy()
+        self._owned_players.add(player)
+
+    def _own_paths(self, player: int) -> Dict[Union[Region, Entrance], PathValue]:
+        """Returns the player's paths for modification, unsharing them from copy-on-write copies first."""
+        if self._owned_players is not None and player not in self._owned_players:
+            self._unshare_player(player)
+        return self.player_paths[player]
+
+    def _unshare_checks(self) -> None:
+        self.advancements = self.advancements.copy()
+        self.locations_checked = self.locations_checked.copy()
+        self._owns_checks = True
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -872,18 +1238,67 @@ class CollectionState():
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None) -> None:
         if locations is None:
             locations = self.multiworld.get_filled_locations()
-        reachable_advancements = True
-        # since the loop has a good chance to run more than once, only filter the advancements once
-        locations = {location for location in locations if location.advancement and location not in self.advancements}
-
-        while reachable_advancements:
-            reachable_advancements = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_advancements
+        # since the loop has a good chance to run more than once, only filter the advancements once,
+        # and bucket them by parent region so locations in unreachable regions are skipped without testing each of them
+        frontier: Dict[Region, Set[Location]] = {}
+        for location in locations:
+            if location.advancement and location not in self.advancements:
+                assert location.parent_region, f"called can_reach on a Location \"{location}\" with no parent_region"
+                frontier.setdefault(location.parent_region, set()).add(location)
+        rule_dependencies = self.rule_dependencies
+
+        while frontier:
+            reachable_advancements: List[Location] = []
+            for region, region_locations in frontier.items():
+                if not region.can_reach(self):
+                    continue
+                for location in region_locations:
+                    player_rule_dependencies = rule_dependencies.get(location.player) if rule_dependencies else None
+                    if player_rule_dependencies is None:
+                        if location.can_reach(self):
+                            reachable_advancements.append(location)
+                    # a recorded location failed its rule and none of the item names it read changed since
+                    elif (location not in player_rule_dependencies.dependencies
+                          and self._access_rule_recorded(location, player_rule_dependencies)):
+                        reachable_advancements.append(location)
+            if not reachable_advancements:
+                break
+            if not self._owns_checks:
+                self._unshare_checks()
             for advancement in reachable_advancements:
+                region_locations = frontier[advancement.parent_region]
+                region_locations.remove(advancement)
+                if not region_locations:
+                    del frontier[advancement.parent_region]
                 self.advancements.add(advancement)
                 assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
                 self.collect(advancement.item, True, advancement)
 
+    def _access_rule_recorded(self, location: Location, rule_dependencies: RuleDependencies) -> bool:
+        """
+        Location.access_rule of a location in a reachable region, recording the item names read by it if the location
+        stays unreachable. Rules that check region reachability or other players' items aren't recorded, since those can
+        change without any of the item names read by the rule changing.
+
+        The recording only depends on the player's prog_items, so it may be made in RuleDependencies shared with a
+        copy-on-write copy, which shares those prog_items as well.
+        """
+        prog_items = self.prog_items
+        stale = self.stale
+        items_recorder = _ProgItemsRecorder(prog_items, location.player)
+        recorder = items_recorder.recorder
+        stale_recorder = _ItemCountRecorder(stale)  # type: ignore[arg-type]
+        self.prog_items = items_recorder  # type: ignore[assignment]
+        self.stale = stale_recorder  # type: ignore[assignment]
+        try:
+            reachable = location.access_rule(self)
+        finally:
+            self.prog_items = prog_items
+            self.stale = stale
+        if not reachable and recorder.tracked and recorder.read and stale_recorder.tracked and not stale_recorder.read:
+            rule_dependencies.record(location, frozenset(recorder.read))
+        return reachable
+
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
         return self.prog_items[player][item] >= count
@@ -1007,9 +1422,17 @@ class CollectionState():
     # Item related
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
         if location:
+            if not self._owns_checks:
+                self._unshare_checks()
             self.locations_checked.add(location)
 
-        changed = self.multiworld.worlds[item.player].collect(self, item)
+        if self._owned_players is not None and item.player not in self._owned_players:
+            self._unshare_player(item.player)
+        rule_dependencies = self.rule_dependencies.get(item.player)
+        if rule_dependencies is None:
+            changed = self.multiworld.worlds[item.player].collect(self, item)
+        else:
+            changed = self._collect_recorded(item, rule_dependencies)
 
         self.stale[item.player] = True
 
@@ -1018,6 +1441,22 @@ class CollectionState():
 
         return changed
 
+    def _collect_recorded(self, item: Item, rule_dependencies: RuleDependencies) -> bool:
+        """World.collect, invalidating the recorded rule dependencies on the item names it changed."""
+        prog_items = self.prog_items
+        items_recorder = _ProgItemsRecorder(prog_items, item.player)
+        recorder = items_recorder.recorder
+        self.prog_items = items_recorder  # type: ignore[assignment]
+        try:
+            changed = self.multiworld.worlds[item.player].collect(self, item)
+        finally:
+            self.prog_items = prog_items
+        if recorder.tracked:
+            rule_dependencies.invalidate(recorder.written)
+        else:
+            rule_dependencies.clear()
+        return changed
+
     def add_item(self, item: str, player: int, count: int = 1) -> None:
         """
         Adds the item to state.
@@ -1027,14 +1466,20 @@ class CollectionState():
         :param count: How many of the item to add.
         """
         assert count > 0
+        if self._owned_players is not None and player not in self._owned_players:
+            self._unshare_player(player)
         self.prog_items[player][item] += count
 
     def remove(self, item: Item):
+        if self._owned_players is not None and item.player not in self._owned_players:
+            self._unshare_player(item.player)
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            if item.player in self.rule_dependencies:
+                self.rule_dependencies[item.player] = RuleDependencies()
             self.stale[item.player] = True
 
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
@@ -1046,6 +1491,8 @@ class CollectionState():
         :param count: How many of the item to remove.
         """
         assert count > 0
+        if self._owned_players is not None and player not in self._owned_players:
+            self._unshare_player(player)
         self.prog_items[player][item] -= count
         if self.prog_items[player][item] < 1:
             del (self.prog_items[player][item])
@@ -1059,6 +1506,8 @@ class CollectionState():
         :param count: How many of the item to now have.
         """
         assert count >= 0
+        if self._owned_players is not None and player not in self._owned_players:
+            self._unshare_player(player)
         if count == 0:
             del (self.prog_items[player][item])
         else:
@@ -1091,8 +1540,11 @@ class Entrance:
     def can_reach(self, state: CollectionState) -> bool:
         assert self.parent_region, f"called can_reach on an Entrance \"{self}\" with no parent_region"
         if self.parent_region.can_reach(state) and self.access_rule(state):
-            if not self.hide_path and self not in state.path:
-                state.path[self] = (self.name, state.path.get(self.parent_region, (self.parent_region.name, None)))
+            if not self.hide_path:
+                paths = state.player_paths[self.player]
+                if self not in paths:
+                    paths = state._own_paths(self.player)
+                    paths[self] = (self.name, paths.get(self.parent_region, (self.parent_region.name, None)))
             return True
 
         return False
@@ -1374,6 +1826,9 @@ class Location:
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     item_rule: Callable[[Item], bool] = staticmethod(lambda item: True)
     item: Optional[Item] = None
+    item_changes: ClassVar[int] = 0
+    """counts placements into and removals from any location made by MultiWorld.push_item, place_locked_item and the
+    fill algorithms, see MultiWorld.placement_version. Code assigning item directly has to count its changes."""
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1402,6 +1857,7 @@ class Location:
         self.item = item
         item.location = self
         self.locked = True
+        Location.item_changes += 1
 
     def __repr__(self):
         multiworld = self.parent_region.multiworld if self.parent_region and self.parent_region.multiworld else None
@@ -1569,60 +2025,39 @@ class Spoiler:
     def create_playthrough(self, create_paths: bool = True) -> None:
         """Destructive to the multiworld while it is run, damage gets repaired afterwards."""
         from itertools import chain
-        # get locations containing progress items
+        # get the spheres of locations containing progress items, from the placement's shared sphere analysis
         multiworld = self.multiworld
-        prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
-        state_cache: List[Optional[CollectionState]] = [None]
+        analysis = multiworld.get_sphere_analysis()
+        state_cache: List[CollectionState] = []
         collection_spheres: List[Set[Location]] = []
-        state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
-            state_cache.append(state.copy())
-
-            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere),
-                          len(prog_locations))
+        for step, state in zip(analysis.steps, analysis.get_states()):
+            sphere = {location for location in step if location.item.advancement}
             if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in sphere_candidates]):
-                    raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
-                                       f'Something went terribly wrong here.')
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+                continue
+            collection_spheres.append(sphere)
+            state_cache.append(state)
+            logging.debug('Calculated sphere %i, containing %i progress items.', len(collection_spheres),
+                          len(sphere))
+
+        unreachables = {location for location in analysis.unreachable if location.advancement}
+        if unreachables:
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           unreachables])
+            if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in unreachables]):
+                raise RuntimeError(f'Not all progression items reachable ({unreachables}). '
+                                   f'Something went terribly wrong here.')
+            else:
+                self.unreachables = unreachables
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
-                else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
-
-            # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+            # cull entries in spheres for spoiler walkthrough at end, dropping each start state once it is used
+            sphere -= self._cull_locations(state_cache.pop(), collection_spheres[num:], sorted(sphere),
+                                           required_locations)
 
         # second phase, sphere 0
         removed_precollected: List[Item] = []
@@ -1635,8 +2070,9 @@ class Spoiler:
                     continue
                 logging.debug('Checking if %s (Player %d) is required to beat the game.', item.name, item.player)
                 precollected_items.remove(item)
+                multiworld.precollected_changes += 1
                 multiworld.state.remove(item)
-                if not multiworld.can_beat_game(multiworld.state, required_locations):
+                if not self._can_beat_game_in_order(multiworld.state, collection_spheres, required_locations):
                     # Add the item back into `precollected_items` and collect it into `multiworld.state`.
                     multiworld.push_precollected(item)
                 else:
@@ -1681,6 +2117,77 @@ class Spoiler:
         for item in removed_precollected:
             multiworld.push_precollected(item)
 
+    def _cull_locations(self, state: Optional[CollectionState], spheres: Sequence[Set[Location]],
+                        candidates: List[Location], required_locations: Set[Location]) -> Set[Location]:
+        """
+        Removes the candidates not required to beat the game from required_locations, testing them in order as if one
+        at a time, and returns them.
+
+        Candidates are removed in batches, doubling in size while the game stays beatable without them. If it doesn't,
+        the batch is split in halves, which are tested again. So a sphere of mostly unrequired locations takes a few
+        sweeps instead of one per location, while a sphere of required locations takes one per location at most.
+        """
+        culled: Set[Location] = set()
+
+        def cull_batch(batch: List[Location]) -> bool:
+            if len(batch) == 1:
+                logging.debug('Checking if %s (Player %d) is required to beat the game.', batch[0].item.name,
+                              batch[0].item.player)
+            # we remove the batch from required_locations to sweep from, and check if the game is still beatable
+            required_locations.difference_update(batch)
+            if self._can_beat_game_in_order(state, spheres, required_locations):
+                culled.update(batch)
+                return True
+            # still required, got to keep it around
+            required_locations.update(batch)
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                cull_batch(batch[:middle])
+                cull_batch(batch[middle:])
+            return False
+
+        batch_size = 1
+        index = 0
+        while index < len(candidates):
+            batch = candidates[index:index + batch_size]
+            index += len(batch)
+            batch_size = batch_size * 2 if cull_batch(batch) else 1
+        return culled
+
+    def _can_beat_game_in_order(self, state: Optional[CollectionState], spheres: Sequence[Set[Location]],
+                                required_locations: Set[Location]) -> bool:
+        """
+        Same as MultiWorld.can_beat_game(state, required_locations), for state having collected the spheres before
+        spheres. Instead of re-testing every remaining location each sweep, each pass tests the locations in their
+        sphere's order, collecting the reachable ones sphere by sphere, so a pass usually gets through all of them.
+        """
+        multiworld = self.multiworld
+        state = CollectionState(multiworld) if state is None else state.copy(copy_on_write=True)
+        if multiworld.has_beaten_game(state):
+            return True
+        pending = [[location for location in sphere
+                    if location in required_locations and location not in state.locations_checked]
+                   for sphere in spheres]
+        while pending:
+            unreachable: List[List[Location]] = []
+            for locations in pending:
+                # test the whole sphere before collecting, so reachable regions are updated once per sphere
+                reachable: List[Location] = []
+                still_unreachable: List[Location] = []
+                for location in locations:
+                    (reachable if location.can_reach(state) else still_unreachable).append(location)
+                if reachable:
+                    for location in reachable:
+                        state.collect(location.item, True, location)
+                    if multiworld.has_beaten_game(state):
+                        return True
+                if still_unreachable:
+                    unreachable.append(still_unreachable)
+            if sum(map(len, unreachable)) == sum(map(len, pending)):
+                return False
+            pending = unreachable
+        return False
+
     def create_paths(self, state: CollectionState, collection_spheres: List[Set[Location]]) -> None:
         from itertools import zip_longest
         multiworld = self.multiworld
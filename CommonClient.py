@@ -246,6 +246,14 @@ class CommonContext:
                 self._archipelago_lookup.clear()
                 self._archipelago_lookup.update(id_to_name_lookup_table)
 
+        def update_game_from_table(self, game: str, id_to_name_lookup_table: typing.Mapping[int, str]) -> None:
+            """Overrides existing lookup tables for a particular game with a read-only table, which is used as is."""
+            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table,
+                                                          Utils.KeyedDefaultDict(self._unknown_item))
+            if game == "Archipelago":
+                self._archipelago_lookup.clear()
+                self._archipelago_lookup.update(id_to_name_lookup_table)
+
     # defaults
     starting_reconnect_delay: int = 5
     current_reconnect_delay: int = starting_reconnect_delay
@@ -611,6 +619,8 @@ class CommonContext:
                 local_checksum: typing.Optional[str] = network_data_package["games"].get(game, {}).get("checksum")
                 if remote_checksum == local_checksum:
                     self.update_game(network_data_package["games"][game], game)
+                elif name_lookup := Utils.load_name_lookup_for_checksum(game, remote_checksum):
+                    self.update_game_from_name_lookup(name_lookup, game, remote_checksum)
                 else:
                     cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
                     cache_checksum: typing.Optional[str] = cached_game.get("checksum")
@@ -619,6 +629,8 @@ class CommonContext:
                         needed_updates.add(game)
                     else:
                         self.update_game(cached_game, game)
+                        # packages cached by older versions only get a name lookup once they are used
+                        Utils.store_name_lookup_for_checksum(game, cached_game)
         if needed_updates:
             await self.send_msgs([{"cmd": "GetDataPackage", "games": [game_name]} for game_name in needed_updates])
 
@@ -627,6 +639,11 @@ class CommonContext:
         self.location_names.update_game(game, game_package["location_name_to_id"])
         self.checksums[game] = game_package.get("checksum")
 
+    def update_game_from_name_lookup(self, name_lookup: Utils.NameLookupTables, game: str, checksum: str):
+        self.item_names.update_game_from_table(game, name_lookup.item_names)
+        self.location_names.update_game_from_table(game, name_lookup.location_names)
+        self.checksums[game] = checksum
+
     def update_data_package(self, data_package: dict):
         for game, game_data in data_package["games"].items():
             self.update_game(game_data, game)
@@ -636,6 +653,7 @@ class CommonContext:
         logger.info(f"Got new ID/Name DataPackage for {', '.join(data_package['games'])}")
         for game, game_data in data_package["games"].items():
             Utils.store_data_package_for_checksum(game, game_data)
+            Utils.store_name_lookup_for_checksum(game, game_data)
 
     # data storage
 
@@ -1,10 +1,13 @@
 import collections
+import heapq
 import itertools
 import logging
 import typing
 from collections import Counter, deque
+from operator import itemgetter
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
+from BaseClasses import (CollectionState, Item, ItemClassification, Location, LocationProgressType, MultiWorld,
+                         PlandoItemBlock)
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -26,13 +29,94 @@ def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
 
 def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item] = tuple(),
                     locations: typing.Optional[typing.List[Location]] = None) -> CollectionState:
-    new_state = base_state.copy()
+    new_state = base_state.copy(copy_on_write=True)
     for item in itempool:
         new_state.collect(item, True)
     new_state.sweep_for_advancements(locations=locations)
     return new_state
 
 
+class _LocationCandidates:
+    """
+    Index over the locations left to fill in fill_restrictive, keeping their original order.
+
+    Locations are grouped by player, and excluded locations that can't take advancement or useful items are kept apart,
+    so those groups aren't scanned for items they can't take. Removal is O(1). Rejections by an item_rule are cached, so
+    find returns the same location as testing can_fill on every remaining location in order would, with fewer rule
+    evaluations. Reachability isn't cached, since access rules may read the items placed so far.
+    """
+    open_locations: typing.Dict[typing.Optional[int], typing.Dict[Location, int]]
+    """remaining locations by player, and under None for all players, mapped to their original index"""
+    excluded_locations: typing.Dict[typing.Optional[int], typing.Dict[Location, int]]
+    """same for excluded locations that can only take items that are neither advancement nor useful"""
+    plain_locations: typing.Set[Location]
+    """locations using Location.can_fill without always_allow, for which can_fill can be evaluated piecewise"""
+    rejected: typing.Set[typing.Tuple[typing.Callable[[Item], bool], int, str, ItemClassification]]
+    """(item_rule, item player, item name, item classification) combinations the item_rule returned False for"""
+
+    def __init__(self, locations: typing.Iterable[Location]) -> None:
+        self.open_locations = {None: {}}
+        self.excluded_locations = {None: {}}
+        self.plain_locations = set()
+        self.rejected = set()
+        for index, location in enumerate(locations):
+            plain = (getattr(location.can_fill, "__func__", None) is Location.can_fill
+                     and location.always_allow is Location.always_allow)
+            if plain:
+                self.plain_locations.add(location)
+            groups = self.excluded_locations \
+                if plain and location.progress_type == LocationProgressType.EXCLUDED else self.open_locations
+            groups[None][location] = index
+            groups.setdefault(location.player, {})[location] = index
+
+    def __len__(self) -> int:
+        return len(self.open_locations[None]) + len(self.excluded_locations[None])
+
+    def remove(self, location: Location) -> None:
+        groups = self.excluded_locations if location in self.excluded_locations[None] else self.open_locations
+        del groups[None][location]
+        del groups[location.player][location]
+
+    def remaining(self) -> typing.List[Location]:
+        """The remaining locations in their original order."""
+        return [location for location, _ in heapq.merge(self.open_locations[None].items(),
+                                                        self.excluded_locations[None].items(), key=itemgetter(1))]
+
+    def find(self, state: CollectionState, item: Item, check_access: bool,
+             player: typing.Optional[int] = None) -> typing.Optional[Location]:
+        """Returns the first remaining location, of player if given, that can_fill item."""
+        open_locations = self.open_locations.get(player, {})
+        excluded_locations = self.excluded_locations.get(player, {})
+        candidates: typing.Iterable[Location]
+        if item.advancement or item.useful or not excluded_locations:
+            candidates = open_locations
+        elif not open_locations:
+            candidates = excluded_locations
+        else:
+            candidates = (location for location, _ in heapq.merge(open_locations.items(), excluded_locations.items(),
+                                                                 key=itemgetter(1)))
+
+        plain_locations = self.plain_locations
+        rejected = self.rejected
+        for location in candidates:
+            if location not in plain_locations:
+                if location.can_fill(state, item, check_access):
+                    return location
+                continue
+            item_rule = location.item_rule
+            if item_rule is not Location.item_rule:
+                key = (item_rule, item.player, item.name, item.classification)
+                if key in rejected:
+                    continue
+                if not item_rule(item):
+                    rejected.add(key)
+                    continue
+            if check_access and not location.can_reach(state):
+                continue
+            return location
+        return None
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -58,12 +142,13 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
+    candidates = _LocationCandidates(locations)
 
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    while any(reachable_items.values()) and candidates:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -90,7 +175,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not candidates:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
@@ -105,14 +190,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
+            spot_to_fill = candidates.find(maximum_exploration_state, item_to_place, perform_access_check,
+                                           item_to_place.player if single_player_placement else None)
+            if spot_to_fill:
+                candidates.remove(spot_to_fill)
             else:
                 # we filled all reachable spots.
                 if swap:
@@ -130,6 +211,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
                         location.item = None
                         placed_item.location = None
+                        Location.item_changes += 1
                         swap_state = sweep_from_pool(base_state, [placed_item, *item_pool] if unsafe else item_pool,
                                                      multiworld.get_filled_locations(item.player)
                                                      if single_player_placement else None)
@@ -157,6 +239,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                         # Item can't be placed here, restore original item
                         location.item = placed_item
                         placed_item.location = location
+                        Location.item_changes += 1
 
                     if spot_to_fill is None:
                         # Can't place this item, move on to the next
@@ -177,6 +260,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    locations[:] = candidates.remaining()
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(
@@ -187,6 +272,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 placement.item.location = None
                 unplaced_items.append(placement.item)
                 placement.item = None
+                Location.item_changes += 1
                 locations.append(placement)
 
     if allow_excluded:
@@ -270,6 +356,7 @@ def remaining_fill(multiworld: MultiWorld,
 
                 location.item = None
                 placed_item.location = None
+                Location.item_changes += 1
                 if location_can_fill_item(location, item_to_place):
                     # Add this item to the existing placement, and
                     # add the old item to the back of the queue
@@ -285,6 +372,7 @@ def remaining_fill(multiworld: MultiWorld,
                 # Item can't be placed here, restore original item
                 location.item = placed_item
                 placed_item.location = location
+                Location.item_changes += 1
 
             if spot_to_fill is None:
                 # Can't place this item, move on to the next
@@ -342,6 +430,7 @@ def accessibility_corrections(multiworld: MultiWorld, state: CollectionState, lo
                 location.locked and location.item.player not in minimal_players):
             pool.append(location.item)
             location.item = None
+            Location.item_changes += 1
             if location in state.advancements:
                 state.advancements.remove(location)
                 state.remove(location.item)
@@ -739,7 +828,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
+                    balancing_state = state.copy(copy_on_write=True)
                     balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
@@ -782,7 +871,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         multiworld.random.shuffle(items_to_test)
                         while items_to_test:
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
+                            reducing_state = state.copy(copy_on_write=True)
                             for location in itertools.chain((
                                     l for l in items_to_replace
                                     if l.item.player == player
@@ -856,6 +945,7 @@ def swap_location_item(location_1: Location, location_2: Location, check_locked:
     location_2.item, location_1.item = location_1.item, location_2.item
     location_1.item.location = location_1
     location_2.item.location = location_2
+    Location.item_changes += 1
 
 
 def parse_planned_blocks(multiworld: MultiWorld) -> dict[int, list[PlandoItemBlock]]:
@@ -1,18 +1,21 @@
 import collections
 import concurrent.futures
+import filecmp
+import functools
 import logging
+import multiprocessing
 import os
-import pickle
+import sys
 import tempfile
+import threading
 import time
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
-from NetUtils import convert_to_base_types
+from NetUtils import convert_to_base_types, encode_multidata
 from Options import StartInventoryPool
 from Utils import __version__, output_path, version_tuple
 from settings import get_settings
@@ -21,6 +24,70 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
+_output_multiworld: MultiWorld | None = None
+"""In output processes, the multiworld they were forked with."""
+
+
+def _get_process_output_players(multiworld: MultiWorld, output_players: list[int]) -> list[int]:
+    """Returns the players whose generate_output runs in output processes, if those are enabled and available."""
+    if get_settings().generator.output_processes <= 0:
+        return []
+    # forking is only safe on Linux, macOS system libraries can crash or deadlock in a forked child
+    if sys.platform != "linux":
+        logging.warning("Output processes are configured, but are only supported on Linux. Using threads instead.")
+        return []
+    return [player for player in output_players
+            if multiworld.worlds[player].output_process_attributes is not None]
+
+
+def _init_output_process(multiworld: MultiWorld) -> None:
+    global _output_multiworld
+    _output_multiworld = multiworld
+
+
+def _generate_output_in_process(player: int, output_directory: str) -> tuple[dict[str, object], str | None]:
+    """Runs in an output process, returning the world attributes and spoiler hash for the parent to copy back."""
+    multiworld = _output_multiworld
+    AutoWorld.call_single(multiworld, "generate_output", player, output_directory)
+    world = multiworld.worlds[player]
+    attributes: dict[str, object] = {}
+    for name in world.output_process_attributes:
+        if hasattr(world, name):
+            value = getattr(world, name)
+            attributes[name] = value.is_set() if isinstance(value, threading.Event) else value
+    return attributes, multiworld.spoiler.hashes.get(player)
+
+
+def _apply_output_state(world: AutoWorld.World, future: concurrent.futures.Future) -> None:
+    """Copies back what generate_output produced in an output process, releasing threads waiting for it."""
+    failed = future.cancelled() or future.exception() is not None
+    attributes, spoiler_hash = ({}, None) if failed else future.result()
+    if spoiler_hash is not None:
+        world.multiworld.spoiler.hashes[world.player] = spoiler_hash
+    for name in world.output_process_attributes:
+        value = getattr(world, name, None)
+        if isinstance(value, threading.Event):
+            if failed or attributes.get(name):
+                value.set()
+        elif name in attributes:
+            setattr(world, name, attributes[name])
+
+
+def _write_to_archive(zf: zipfile.ZipFile, directory: str, archived: dict[str, str]) -> None:
+    """Adds the files in directory to the archive. archived maps the names already in it to their files."""
+    for file in os.scandir(directory):
+        if file.name in archived:
+            # output tasks write into separate directories, but all files end up next to each other in the archive
+            if filecmp.cmp(archived[file.name], file.path, shallow=False):
+                continue
+            raise FileExistsError(f"Multiple worlds created an output file named {file.name} with different content.")
+        archived[file.name] = file.path
+        # patch containers and multidata are compressed already, deflating them again takes long for next to no gain
+        if file.name.endswith(".archipelago") or zipfile.is_zipfile(file.path):
+            zf.write(file.path, arcname=file.name, compress_type=zipfile.ZIP_STORED)
+        else:
+            zf.write(file.path, arcname=file.name)
+
 
 def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
     if not baked_server_options:
@@ -67,7 +134,11 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if not args.skip_output and not args.spoiler_only:
         AutoWorld.call_stage(multiworld, "assert_generate")
 
-    AutoWorld.call_all(multiworld, "generate_early")
+    # steps that worlds declare slot-isolated run concurrently between players, if enabled
+    stage_threads = get_settings().generator.stage_threads
+    stage_pool = concurrent.futures.ThreadPoolExecutor(stage_threads) if stage_threads > 0 else None
+
+    AutoWorld.call_all(multiworld, "generate_early", executor=stage_pool)
 
     logger.info('')
 
@@ -94,10 +165,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
             del early
 
     logger.info('Creating MultiWorld.')
-    AutoWorld.call_all(multiworld, "create_regions")
+    AutoWorld.call_all(multiworld, "create_regions", executor=stage_pool)
 
     logger.info('Creating Items.')
-    AutoWorld.call_all(multiworld, "create_items")
+    AutoWorld.call_all(multiworld, "create_items", executor=stage_pool)
 
     logger.info('Calculating Access Rules.')
 
@@ -106,7 +177,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld.worlds[player].options.non_local_items.value -= multiworld.worlds[player].options.local_items.value
         multiworld.worlds[player].options.non_local_items.value -= set(multiworld.local_early_items[player])
 
-    AutoWorld.call_all(multiworld, "set_rules")
+    AutoWorld.call_all(multiworld, "set_rules", executor=stage_pool)
 
     for player in multiworld.player_ids:
         exclusion_rules(multiworld, player, multiworld.worlds[player].options.exclude_locations.value)
@@ -134,8 +205,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     multiworld.plando_item_blocks = parse_planned_blocks(multiworld)
 
-    AutoWorld.call_all(multiworld, "connect_entrances")
-    AutoWorld.call_all(multiworld, "generate_basic")
+    AutoWorld.call_all(multiworld, "connect_entrances", executor=stage_pool)
+    AutoWorld.call_all(multiworld, "generate_basic", executor=stage_pool)
+    if stage_pool:
+        stage_pool.shutdown()
 
     # remove starting inventory from pool items.
     # Because some worlds don't actually create items during create_items this has to be as late as possible.
@@ -223,14 +296,52 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        process_players = _get_process_output_players(multiworld, output_players)
+        # every output task writes into its own directory, so its files can be archived as soon as it's done
+        output_directories: dict[concurrent.futures.Future, str] = {}
+        archived_files: dict[str, str] = {}
+
+        def make_output_directory(name: str) -> str:
+            directory = os.path.join(temp_dir, name)
+            os.mkdir(directory)
+            return directory
+
+        zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
+        logger.info(f"Creating final archive at {zipfilename}")
+        zf = zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=9)
+        process_pool: concurrent.futures.ProcessPoolExecutor | None = None
+        pool = concurrent.futures.ThreadPoolExecutor(len(output_players) - len(process_players) + 2)
+        try:
+            stage_directory = make_output_directory("stage")
+            if process_players:
+                # stage_generate_output may prepare data for generate_output, so it has to run before forking
+                stage_future: concurrent.futures.Future = concurrent.futures.Future()
+                stage_future.set_result(AutoWorld.call_stage(multiworld, "generate_output", stage_directory))
+                output_directories[stage_future] = stage_directory
+
+                # forked workers inherit the multiworld from the initializer arguments, without pickling it
+                process_pool = concurrent.futures.ProcessPoolExecutor(
+                    min(len(process_players), get_settings().generator.output_processes),
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_output_process, initargs=(multiworld,))
+                # submitting forks all workers, before any output thread is started
+                for player in process_players:
+                    directory = make_output_directory(str(player))
+                    future = process_pool.submit(_generate_output_in_process, player, directory)
+                    future.add_done_callback(functools.partial(_apply_output_state, multiworld.worlds[player]))
+                    output_directories[future] = directory
+            else:
+                output_directories[pool.submit(AutoWorld.call_stage, multiworld, "generate_output",
+                                               stage_directory)] = stage_directory
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
             for player in output_players:
+                if player in process_players:
+                    continue
                 # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                directory = make_output_directory(str(player))
+                output_directories[pool.submit(AutoWorld.call_single, multiworld, "generate_output", player,
+                                               directory)] = directory
 
             # collect ER hint info
             er_hint_data: dict[int, dict[int, str]] = {}
@@ -338,38 +449,44 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                with open(os.path.join(multidata_directory, f'{outfilebase}.archipelago'), 'wb') as f:
+                    f.write(encode_multidata(multidata, pool, get_settings().generator.multidata_format))
 
-            output_file_futures.append(pool.submit(write_multidata))
+            multidata_directory = make_output_directory("multidata")
+            output_directories[pool.submit(write_multidata)] = multidata_directory
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
                 else:
                     logger.warning("Location Accessibility requirements not fulfilled.")
 
-            # retrieve exceptions via .result() if they occurred.
-            for i, future in enumerate(concurrent.futures.as_completed(output_file_futures), start=1):
-                if i % 10 == 0 or i == len(output_file_futures):
-                    logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
+            # retrieve exceptions via .result() if they occurred, and archive the files of each finished task
+            for i, future in enumerate(concurrent.futures.as_completed(output_directories), start=1):
+                if i % 10 == 0 or i == len(output_directories):
+                    logger.info(f'Generating output files ({i}/{len(output_directories)}).')
                 future.result()
-
-        if args.spoiler > 1:
-            logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
-
-        if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
-
-        zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
-        logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-            for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+                _write_to_archive(zf, output_directories[future], archived_files)
+            pool.shutdown()
+            if process_pool:
+                process_pool.shutdown()
+
+            if args.spoiler > 1:
+                logger.info('Calculating playthrough.')
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+
+            if args.spoiler:
+                spoiler_directory = make_output_directory("spoiler")
+                multiworld.spoiler.to_file(os.path.join(spoiler_directory, '%s_Spoiler.txt' % outfilebase))
+                _write_to_archive(zf, spoiler_directory, archived_files)
+            zf.close()
+        except BaseException:
+            # don't leave an incomplete archive behind
+            zf.close()
+            os.remove(zipfilename)
+            pool.shutdown(cancel_futures=True)
+            if process_pool:
+                process_pool.shutdown(cancel_futures=True)
+            raise
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
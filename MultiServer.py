@@ -9,6 +9,7 @@ import datetime
 import functools
 import hashlib
 import inspect
+import io
 import itertools
 import logging
 import math
@@ -16,6 +17,7 @@ import operator
 import pickle
 import random
 import shlex
+import struct
 import threading
 import time
 import typing
@@ -116,6 +118,8 @@ modify_functions = {
     "pop": pop_from_container,
     "update": update_container_unique,
 }
+in_place_modify_functions = frozenset({"remove", "pop", "update"})
+"""modify_functions that change their container, which has to be copied first to keep the original value intact"""
 
 
 def get_saving_second(seed_name: str, interval: int = 60) -> int:
@@ -168,9 +172,321 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class DataStorage(typing.MutableMapping[str, typing.Any]):
+    """
+    Writable datastore of a Context, keyed by string.
+    Tracks which keys changed since the last save and how often each key is written.
+    Stored values must not be modified in place, replace them instead, so values handed out before stay valid.
+    """
+    data: typing.Dict[str, typing.Any]
+    changed: typing.Set[str]
+    """keys written since the last save, see SaveJournal"""
+    writes: typing.Counter[str]
+    _first_write: typing.Dict[str, float]
+
+    def __init__(self, data: typing.Optional[typing.Dict[str, typing.Any]] = None) -> None:
+        self.data = data if data is not None else {}
+        self.changed = set()
+        self.writes = collections.Counter()
+        self._first_write = {}
+
+    def __getitem__(self, key: str) -> typing.Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self.data[key] = value
+        self.changed.add(key)
+        self.writes[key] += 1
+        self._first_write.setdefault(key, time.monotonic())
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+        self.changed.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get_write_rate(self, key: str) -> float:
+        """Returns the writes per minute to key since it was first written in this session."""
+        if key not in self._first_write:
+            return 0.0
+        return self.writes[key] * 60 / max(time.monotonic() - self._first_write[key], 60)
+
+
+class SaveJournal:
+    """
+    Tracks what changed in a Context's save data since it was last saved,
+    so most saves only append a small record to the last full snapshot, instead of pickling everything.
+    A save consists of the snapshot followed by records, each a uint32 length and a zlib compressed pickle of a delta.
+    Snapshots are marked with a save version older servers reject, so they can't silently drop the records.
+    """
+    record_header = struct.Struct("<I")
+    journaled_keys = frozenset({"location_checks", "received_items", "hints", "stored_data"})
+    """save keys that are tracked per entry. All others are small and recorded whole when they change."""
+    compact_after: int = 100
+    """number of records after which the next save writes a new snapshot, even if the records are small"""
+
+    ctx: Context
+    sequence: int
+    """number of the last record or snapshot, stored in snapshots to skip records they already include.
+    As every save with changes gets a new number, it also serves as the version of the save."""
+    new_checks: typing.Dict[team_slot, typing.Set[int]]
+    """location checks registered since the last save, by slot"""
+    changed_items: typing.Set[team_slot]
+    """slots that received items since the last save"""
+    changed_hints: typing.Set[team_slot]
+    """slots whose hints changed since the last save"""
+    _records: int
+    _journal_size: int
+    _snapshot_size: int
+    _received_items: typing.Dict[typing.Tuple[int, int, bool], int]
+    _others: typing.Dict[str, typing.Any]
+
+    def __init__(self, ctx: Context) -> None:
+        self.ctx = ctx
+        self.sequence = 0
+        self.new_checks = {}
+        self.changed_items = set()
+        self.changed_hints = set()
+        self.invalidate()
+
+    @property
+    def snapshot_due(self) -> bool:
+        """Whether the next save should be a full snapshot, because replaying the journal got too expensive."""
+        return self._records >= self.compact_after or self._journal_size > self._snapshot_size
+
+    def invalidate(self) -> None:
+        """Makes the next save a full snapshot, for example if a record could not be written."""
+        self._records = self.compact_after
+        self._journal_size = self._snapshot_size = 0
+
+    def take_snapshot(self, final: bool = False) -> dict:
+        """
+        Returns the full save data and considers everything in it saved.
+        A final snapshot, written when the server shuts down, is loadable by older servers,
+        so the next save has to be a snapshot again.
+        """
+        # taken before reading the save, as changes made while it is read are included in it or noted again
+        self.new_checks, self.changed_items, self.changed_hints = {}, set(), set()
+        self.ctx.stored_data.changed = set()
+        save = self.ctx.get_save()
+        self._received_items = {key: len(value) for key, value in save["received_items"].items()}
+        self._others = copy.deepcopy({key: value for key, value in save.items() if key not in self.journaled_keys})
+        # the snapshot may include changes made after the last record
+        self.sequence += 1
+        save["journal_sequence"] = self.sequence
+        if final:
+            self.invalidate()
+        else:
+            save["version"] = self.ctx.save_version
+            self._records = self._journal_size = 0
+        return save
+
+    def set_snapshot_size(self, size: int) -> None:
+        self._snapshot_size = size
+
+    def take_record(self) -> bytes:
+        """Returns an encoded record of the changes since the last save, empty if nothing changed."""
+        ctx = self.ctx
+        delta: typing.Dict[str, typing.Any] = {}
+
+        location_checks, self.new_checks = self.new_checks, {}
+        if location_checks:
+            delta["location_checks"] = location_checks
+
+        received_items = {}
+        changed_items, self.changed_items = self.changed_items, set()
+        for team, slot in changed_items:
+            for remote_items in (False, True):
+                key = team, slot, remote_items
+                items = ctx.received_items.get(key, ())
+                start = self._received_items.get(key, 0)
+                if len(items) != start:  # items are only appended
+                    received_items[key] = start, items[start:]
+                    self._received_items[key] = len(items)
+        if received_items:
+            delta["received_items"] = received_items
+
+        changed_hints, self.changed_hints = self.changed_hints, set()
+        if changed_hints:
+            delta["hints"] = {key: frozenset(ctx.hints[key]) for key in changed_hints}
+
+        stored_data_changes, ctx.stored_data.changed = ctx.stored_data.changed, set()
+        if stored_data_changes:
+            stored_data = ctx.stored_data.data
+            delta["stored_data"] = {key: stored_data[key] for key in stored_data_changes if key in stored_data}
+
+        others = {key: value for key, value in ctx.get_save_others().items() if self._others.get(key) != value}
+        if others:
+            delta["others"] = others
+            self._others.update(copy.deepcopy(others))
+
+        if not delta:
+            return b""
+        self.sequence += 1
+        self._records += 1
+        delta["sequence"] = self.sequence
+        record = zlib.compress(pickle.dumps(delta))
+        self._journal_size += self.record_header.size + len(record)
+        return self.record_header.pack(len(record)) + record
+
+    @classmethod
+    def load(cls, data: bytes, compressed: bool = True) -> typing.Tuple[dict, typing.List[dict]]:
+        """Splits a save into its snapshot and the deltas of the records following it."""
+        save_data, offset = cls.load_snapshot(data, compressed)
+        deltas, _ = cls.load_records(data, offset)
+        return save_data, deltas
+
+    @staticmethod
+    def load_snapshot(data: bytes, compressed: bool = True) -> typing.Tuple[dict, int]:
+        """Returns the snapshot of a save and the offset of the records following it."""
+        if compressed:
+            decompressor = zlib.decompressobj()
+            save_data = restricted_loads(decompressor.decompress(data))
+            return save_data, len(data) - len(decompressor.unused_data)
+        stream = io.BytesIO(data)
+        save_data = Utils.RestrictedUnpickler(stream).load()
+        return save_data, stream.tell()
+
+    @classmethod
+    def load_records(cls, data: bytes, offset: int) -> typing.Tuple[typing.List[dict], int]:
+        """Returns the deltas of the records in data from offset on, and the offset after the last complete record."""
+        deltas: typing.List[dict] = []
+        while offset + cls.record_header.size <= len(data):
+            length, = cls.record_header.unpack_from(data, offset)
+            if offset + cls.record_header.size + length > len(data):
+                logging.warning("Ignoring incomplete last record of save journal.")
+                break
+            offset += cls.record_header.size
+            deltas.append(restricted_loads(zlib.decompress(data[offset:offset + length])))
+            offset += length
+        return deltas, offset
+
+    @staticmethod
+    def replay(save_data: dict, deltas: typing.Iterable[dict]) -> None:
+        """Applies the deltas that are newer than the snapshot save_data to it."""
+        for delta in deltas:
+            if delta["sequence"] <= save_data.get("journal_sequence", 0):
+                continue  # already included, the journal was not cleared after a snapshot
+            for key, locations in delta.get("location_checks", {}).items():
+                save_data["location_checks"].setdefault(key, set()).update(locations)
+            for key, (start, items) in delta.get("received_items", {}).items():
+                save_data["received_items"].setdefault(key, [])[start:] = items
+            for key, hints in delta.get("hints", {}).items():
+                save_data["hints"][key] = set(hints)
+            save_data.setdefault("stored_data", {}).update(delta.get("stored_data", {}))
+            save_data.update(delta.get("others", {}))
+            save_data["journal_sequence"] = delta["sequence"]
+
+    @classmethod
+    def diff(cls, old_save: dict, new_save: dict) -> dict:
+        """
+        Returns a delta, without a sequence, that changes old_save to new_save if replayed, for saves of the same room.
+        Like records, it assumes location checks and received items only get added.
+        """
+        delta: typing.Dict[str, typing.Any] = {}
+        old_checks = old_save.get("location_checks", {})
+        location_checks = {key: locations - old_checks.get(key, set())
+                           for key, locations in new_save.get("location_checks", {}).items()
+                           if len(locations) != len(old_checks.get(key, ()))}
+        if location_checks:
+            delta["location_checks"] = location_checks
+        old_received = old_save.get("received_items", {})
+        received_items = {key: (len(old_received.get(key, ())), items[len(old_received.get(key, ())):])
+                          for key, items in new_save.get("received_items", {}).items()
+                          if len(items) != len(old_received.get(key, ()))}
+        if received_items:
+            delta["received_items"] = received_items
+        old_hints = old_save.get("hints", {})
+        hints = {key: set(slot_hints) for key, slot_hints in new_save.get("hints", {}).items()
+                 if old_hints.get(key, set()) != slot_hints}
+        if hints:
+            delta["hints"] = hints
+        # changes to stored data aren't tracked between saves, so it is compared and replaced whole
+        others = {key: value for key, value in new_save.items()
+                  if (key not in cls.journaled_keys or key == "stored_data") and old_save.get(key) != value}
+        if others:
+            delta["others"] = others
+        return delta
+
+
+class EncodedMessageCache:
+    """Encoded messages, or parts of them, keyed by the version of their content. The least recently used are dropped."""
+    max_size: int
+    _cache: collections.OrderedDict[typing.Hashable, str]
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._cache = collections.OrderedDict()
+
+    def get(self, key: typing.Hashable, encode_message: typing.Callable[[], str]) -> str:
+        """Returns the encoded message for key, calling encode_message if it is not cached."""
+        try:
+            self._cache.move_to_end(key)
+        except KeyError:
+            self._cache[key] = encode_message()
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return self._cache[key]
+
+
+class ReadData:
+    """
+    Values of the read-only "_read_" datastore keys.
+    Each value is computed when it is first read and kept, along with its encoding, until it is invalidated.
+    """
+    _getters: typing.Dict[str, typing.Callable[[], typing.Any]]
+    _values: typing.Dict[str, typing.Any]
+    _encoded: typing.Dict[str, str]
+
+    def __init__(self, dumper: typing.Callable[[typing.Any], str]) -> None:
+        self.dumper = dumper
+        self._getters = {}
+        self._values = {}
+        self._encoded = {}
+
+    def __setitem__(self, key: str, getter: typing.Callable[[], typing.Any]) -> None:
+        self._getters[key] = getter
+        self.invalidate(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._getters
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        if key in self._values:
+            return self._values[key]
+        if key not in self._getters:
+            return default
+        value = self._values[key] = self._getters[key]()
+        return value
+
+    def get_encoded(self, key: str) -> str:
+        """Returns the encoded value of key, which is null for unknown keys."""
+        if key not in self._encoded:
+            self._encoded[key] = self.dumper(self.get(key))
+        return self._encoded[key]
+
+    def invalidate(self, key: str) -> None:
+        """Call after the data of key changed, to compute it again on the next read."""
+        self._values.pop(key, None)
+        self._encoded.pop(key, None)
+
+    def invalidate_all(self) -> None:
+        self._values.clear()
+        self._encoded.clear()
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
+    # each game's encoded data package, keyed by game and checksum, so WebHost rooms in a process can share them
+    game_data_cache: typing.ClassVar[EncodedMessageCache] = EncodedMessageCache(512)
 
     simple_options = {"hint_cost": int,
                       "location_check_points": int,
@@ -188,10 +504,15 @@ class Context:
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
-    save_version = 2
-    stored_data: typing.Dict[str, object]
-    read_data: typing.Dict[str, object]
+    save_version = 3
+    """newest version of save data this server loads. Version 3 saves may be followed by save journal records."""
+    legacy_save_version = 2
+    """version of saves without journal records, which older servers load as well"""
+    stored_data: DataStorage
+    read_data: ReadData
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_prefix_notification_clients: typing.Dict[str, typing.Set[Client]]
+    """SetNotify subscriptions of key prefixes, by prefix"""
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -239,6 +560,12 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> remembered hint, to update hints of checked locations directly
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], Hint] = {}
+        # slots that received items not yet sent to their clients, see send_new_items
+        self.new_item_slots: typing.Set[team_slot] = set()
+        self.new_items_flush: typing.Optional[asyncio.Handle] = None
+        self.message_cache = EncodedMessageCache(16)  # payloads of this room that rarely change, like RoomInfo
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -257,6 +584,7 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.save_journal: typing.Optional[SaveJournal] = None
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -264,9 +592,10 @@ class Context:
         self.groups = {}
         self.group_collected: typing.Dict[int, typing.Set[int]] = {}
         self.random = random.Random()
-        self.stored_data = {}
+        self.stored_data = DataStorage()
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
-        self.read_data = {}
+        self.stored_data_prefix_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.read_data = ReadData(self.dumper)
         self.spheres = []
 
         # init empty to satisfy linter, I suppose
@@ -327,6 +656,18 @@ class Context:
     def location_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
+    def get_encoded_data_package(self, games: typing.Iterable[str]) -> str:
+        """Encodes a DataPackage message for the games, reusing each game's encoded data."""
+        parts = []
+        for game in games:
+            game_data = self.gamespackage[game]
+            if "checksum" in game_data:
+                encoded = self.game_data_cache.get((game, game_data["checksum"]), lambda: self.dumper(game_data))
+            else:  # data package of an old multidata, can't be shared
+                encoded = self.message_cache.get(("game_data", game), lambda: self.dumper(game_data))
+            parts.append(f"{self.dumper(game)}:{encoded}")
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{",".join(parts)}}}}}}}]'
+
     # General networking
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
@@ -358,6 +699,10 @@ class Context:
             return True
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        return self.broadcast_encoded_msgs(endpoints, msg)
+
+    def broadcast_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        """Queues an already encoded message on all open endpoints without waiting for the sockets."""
         sockets = []
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
@@ -439,16 +784,13 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+        return NetUtils.decode_multidata(data)
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
-              use_embedded_server_options: bool):
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any],
+              game_data_packages: typing.Dict[str, typing.Any], use_embedded_server_options: bool):
 
-        self.read_data = {}
+        self.read_data = ReadData(self.dumper)
         # there might be a better place to put this.
         self.read_data["race_mode"] = lambda: decoded_obj.get("race_mode", 0)
         mdata_ver = decoded_obj["minimum_versions"]["server"]
@@ -480,14 +822,16 @@ class Context:
             self.player_names[0, slot_id] = slot_info.name
             self.player_name_lookup[slot_info.name] = 0, slot_id
             self.read_data[f"hints_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
-                list(self.get_rechecked_hints(local_team, local_player))
+                list(self.get_rechecked_hints(local_team, local_player))  # kept until on_changed_hints
             self.read_data[f"client_status_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
                 self.client_game_state[local_team, local_player]
 
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        locations = decoded_obj.pop("locations")  # pre-emptively free memory
+        # multidata format 4 decodes locations straight into a LocationStore
+        self.locations = locations if isinstance(locations, LocationStore) else LocationStore(locations)
         self.slot_data = decoded_obj['slot_data']
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
@@ -500,6 +844,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.rebuild_hint_index()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -546,18 +891,32 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if self.save_journal and not self.save_journal.snapshot_due and not exit_save:
+                record = self.save_journal.take_record()
+                if record:
+                    with open(self.save_filename, "ab") as f:
+                        f.write(record)
+            else:
+                # the save written on exit is loadable by servers without journal support
+                save = self.save_journal.take_snapshot(exit_save) if self.save_journal else self.get_save()
+                encoded_save = zlib.compress(pickle.dumps(save))
+                with open(self.save_filename, "wb") as f:
+                    f.write(encoded_save)
+                if self.save_journal:
+                    self.save_journal.set_snapshot_size(len(encoded_save))
         except Exception as e:
+            if self.save_journal:
+                self.save_journal.invalidate()
             self.logger.exception(e)
             return False
         else:
             return True
 
-    def init_save(self, enabled: bool = True):
+    def init_save(self, enabled: bool = True, journal: bool = False):
         self.saving = enabled
         if self.saving:
+            if journal:
+                self.save_journal = SaveJournal(self)
             if not self.save_filename:
                 import os
                 name, ext = os.path.splitext(self.data_filename)
@@ -565,8 +924,7 @@ class Context:
                     else self.data_filename + '_' + 'apsave'
             try:
                 with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                    self.set_save(*SaveJournal.load(f.read()))
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -605,14 +963,21 @@ class Context:
                 atexit.register(self._save, True)  # make sure we save on exit too
 
     def get_save(self) -> dict:
-        self.recheck_hints()
-        d = {
-            "version": self.save_version,
-            "connect_names": self.connect_names,
+        d = self.get_save_others()
+        d.update({
             "received_items": self.received_items,
-            "hints_used": dict(self.hints_used),
             "hints": dict(self.hints),
             "location_checks": dict(self.location_checks),
+            "stored_data": self.stored_data.data,
+        })
+        return d
+
+    def get_save_others(self) -> dict:
+        """Returns the save data, except for the parts the save journal tracks per entry, see SaveJournal."""
+        d = {
+            "version": self.legacy_save_version,
+            "connect_names": self.connect_names,
+            "hints_used": dict(self.hints_used),
             "name_aliases": self.name_aliases,
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
@@ -621,7 +986,6 @@ class Context:
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
@@ -632,14 +996,20 @@ class Context:
 
         return d
 
-    def set_save(self, savedata: dict):
+    def set_save(self, savedata: dict, journal: typing.Iterable[dict] = ()):
+        """Loads savedata, after replaying the deltas of its journal, see SaveJournal."""
+        SaveJournal.replay(savedata, journal)
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
             raise Exception("This savegame is newer than the server.")
+        if self.save_journal:
+            self.save_journal.sequence = savedata.get("journal_sequence", 0)
+            self.save_journal.invalidate()
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        self.rebuild_hint_index()
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -650,6 +1020,8 @@ class Context:
             {tuple(key): datetime.datetime.fromtimestamp(value, datetime.timezone.utc) for key, value
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
+        self.recheck_hints()  # once, afterwards the index keeps hints up to date
+        self.read_data.invalidate_all()  # hints and client status
         self.random.setstate(savedata["random_state"])
 
         if "game_options" in savedata:
@@ -667,7 +1039,7 @@ class Context:
             self.group_collected = savedata["group_collected"]
 
         if "stored_data" in savedata:
-            self.stored_data = savedata["stored_data"]
+            self.stored_data = DataStorage(savedata["stored_data"])
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -680,32 +1052,48 @@ class Context:
             return max(1, int(self.hint_cost * 0.01 * len(self.locations[slot])))
         return 0
 
+    def rebuild_hint_index(self) -> None:
+        """Indexes all remembered hints. Needed after self.hints was modified without going through the index."""
+        self.hint_index.clear()
+        for (team, _), hints in self.hints.items():
+            for hint in hints:
+                key = team, hint.finding_player, hint.location
+                if key not in self.hint_index or hint.found:  # prefer the found version if they diverged
+                    self.hint_index[key] = hint
+
     def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None,
                       changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
         """Refreshes the hints for the specified team/slot. Providing 'None' for either team or slot
         will refresh all teams or all slots respectively. If a set is passed for 'changed', each (team,slot)
         pair that has at least one hint modified will be added to the set.
+        Checking locations already updates their hints through recheck_location_hints, so this is rarely needed.
         """
-        for hint_team, hint_slot in self.hints:
+        for (hint_team, _, _), hint in list(self.hint_index.items()):
             if team != hint_team and team is not None:
                 continue  # Check specified team only, all if team is None
-            if slot != hint_slot and slot is not None:
+            if slot is not None and slot != hint.finding_player and slot not in self.slot_set(hint.receiving_player):
                 continue  # Check specified slot only, all if slot is None
-            new_hints: typing.Set[Hint] = set()
-            for hint in self.hints[hint_team, hint_slot]:
-                new_hint = hint.re_check(self, hint_team)
-                new_hints.add(new_hint)
-                if hint == new_hint:
-                    continue
-                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
-                    if changed is not None:
-                        changed.add((hint_team,player))
-                    if slot is not None and slot != player:
-                        self.replace_hint(hint_team, player, hint, new_hint)
-            self.hints[hint_team, hint_slot] = new_hints
+            self._update_hint(hint_team, hint, hint.re_check(self, hint_team), changed)
+
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes the hints for locations of team/slot that were just checked, see recheck_hints."""
+        for location in locations:
+            hint = self.hint_index.get((team, slot, location))
+            if hint:
+                self._update_hint(team, hint, hint.re_check(self, team), changed)
+
+    def _update_hint(self, team: int, hint: Hint, new_hint: Hint,
+                     changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        if hint == new_hint:
+            return
+        for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+            if changed is not None:
+                changed.add((team, player))
+            self.replace_hint(team, player, hint, new_hint)
 
     def get_rechecked_hints(self, team: int, slot: int):
-        self.recheck_hints(team, slot)
+        # hints are kept up to date when checking locations
         return self.hints[team, slot]
 
     def get_sphere(self, player: int, location_id: int) -> int:
@@ -773,33 +1161,37 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.hint_index[team, hint.finding_player, hint.location] = hint
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
+        if self.save_journal:
+            self.save_journal.changed_hints.update((team, slot) for slot in new_hint_events)
         for slot in new_hint_events:
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
-                clients = filter(lambda c: not c.no_text, self.clients[team].get(slot, []))
+                clients = [client for client in self.clients[team].get(slot, []) if not client.no_text]
                 if not clients:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
-                for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                self.broadcast(clients, client_hints)  # encoded once for all clients of the slot
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
-        return None
+        return self.hint_index.get((team, finding_player, seeked_location), None)
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
-        if old_hint in self.hints[team, slot]:
-            self.hints[team, slot].remove(old_hint)
-            self.hints[team, slot].add(new_hint)
+        hints = self.hints.get((team, slot))
+        if hints and old_hint in hints:
+            hints.remove(old_hint)
+            hints.add(new_hint)
+            if self.save_journal:
+                self.save_journal.changed_hints.add((team, slot))
+            self.hint_index[team, new_hint.finding_player, new_hint.location] = new_hint
+            self.read_data.invalidate(f"hints_{team}_{slot}")
     
     # "events"
 
@@ -821,16 +1213,41 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
-        key: str = f"_read_hints_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
-        if targets:
-            self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
+        self.on_changed_read_data(f"hints_{team}_{slot}")
 
     def on_client_status_change(self, team: int, slot: int):
-        key: str = f"_read_client_status_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        self.on_changed_read_data(f"client_status_{team}_{slot}")
+
+    def get_notification_clients(self, key: str) -> typing.Set[Client]:
+        """Returns the clients that subscribed to changes of key with SetNotify, directly or by a prefix."""
+        targets: typing.Set[Client] = set(self.stored_data_notification_clients.get(key, ()))
+        for prefix, clients in self.stored_data_prefix_notification_clients.items():
+            if key.startswith(prefix):
+                targets.update(clients)
+        return targets
+
+    def on_changed_read_data(self, key: str):
+        self.read_data.invalidate(key)
+        targets = self.get_notification_clients(f"_read_{key}")
         if targets:
-            self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.client_game_state[team, slot]}])
+            self.broadcast_encoded_msgs(targets, self.get_encoded_set_reply(key))
+
+    def get_encoded_set_reply(self, key: str) -> str:
+        """Encodes a SetReply for a read_data key, reusing the encoded value."""
+        return f'[{{"cmd":"SetReply","key":{self.dumper(f"_read_{key}")},"value":{self.read_data.get_encoded(key)}}}]'
+
+    def get_encoded_retrieved(self, args: typing.Dict[str, typing.Any]) -> str:
+        """Encodes a Retrieved for the keys of a Get, reusing the encoded values of read_data."""
+        values = []
+        for key in dict.fromkeys(args["keys"]):
+            if key.startswith("_read_"):
+                value = self.read_data.get_encoded(key[6:])
+            else:
+                value = self.dumper(self.stored_data.get(key, None))
+            values.append(f"{self.dumper(key)}:{value}")
+        # keys is last, so the message can be closed after the values
+        message = self.dumper([{**{arg: value for arg, value in args.items() if arg != "keys"}, "keys": {}}])
+        return f"{message[:-4]}{{{','.join(values)}}}}}]"
 
 
 def update_aliases(ctx: Context, team: int):
@@ -867,31 +1284,33 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
 
 
 async def on_client_connected(ctx: Context, client: Client):
-    players = []
-    for team, clients in ctx.clients.items():
-        for slot, connected_clients in clients.items():
-            if connected_clients:
-                name = ctx.player_names[team, slot]
-                players.append(NetworkPlayer(team, slot, ctx.name_aliases.get((team, slot), name), name))
     games = {ctx.games[x] for x in range(1, len(ctx.games) + 1)}
     games.add("Archipelago")
-    await ctx.send_msgs(client, [{
-        'cmd': 'RoomInfo',
-        'password': bool(ctx.password),
-        'games': games,
-        # tags are for additional features in the communication.
-        # Name them by feature or fork, as you feel is appropriate.
-        'tags': ctx.tags,
-        'version': version_tuple,
-        'generator_version': ctx.generator_version,
-        'permissions': get_permissions(ctx),
-        'hint_cost': ctx.hint_cost,
-        'location_check_points': ctx.location_check_points,
-        'datapackage_checksums': {game: game_data["checksum"] for game, game_data
-                                  in ctx.gamespackage.items() if game in games and "checksum" in game_data},
-        'seed_name': ctx.seed_name,
-        'time': time.time(),
-    }])
+    permissions = get_permissions(ctx)
+
+    def encode_room_info() -> str:
+        encoded = ctx.dumper([{
+            'cmd': 'RoomInfo',
+            'password': bool(ctx.password),
+            'games': games,
+            # tags are for additional features in the communication.
+            # Name them by feature or fork, as you feel is appropriate.
+            'tags': ctx.tags,
+            'version': version_tuple,
+            'generator_version': ctx.generator_version,
+            'permissions': permissions,
+            'hint_cost': ctx.hint_cost,
+            'location_check_points': ctx.location_check_points,
+            'datapackage_checksums': {game: game_data["checksum"] for game, game_data
+                                      in ctx.gamespackage.items() if game in games and "checksum" in game_data},
+            'seed_name': ctx.seed_name,
+        }])
+        return encoded[:-2]  # leave the message open for the time
+
+    # everything but the time only changes through options
+    room_info = ctx.message_cache.get(("RoomInfo", bool(ctx.password), tuple(ctx.tags), tuple(permissions.values()),
+                                       ctx.hint_cost, ctx.location_check_points), encode_room_info)
+    await ctx.send_encoded_msgs(client, f'{room_info},"time":{ctx.dumper(time.time())}}}]')
 
 
 def get_permissions(ctx) -> typing.Dict[str, Permission]:
@@ -1022,19 +1441,38 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    """Sends the items received by the slots in ctx.new_item_slots to their clients.
+    Calls within the same event loop tick are coalesced into a single flush."""
+    if ctx.new_items_flush:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_new_items(ctx)
+    else:
+        ctx.new_items_flush = loop.call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context):
+    ctx.new_items_flush = None
+    dirty_slots, ctx.new_item_slots = ctx.new_item_slots, set()
+    for team, slot in dirty_slots:
+        # clients of a slot with the same item handling and progress get the same message, so encode it once
+        payloads: typing.Dict[typing.Tuple[bool, bool, int], typing.List[Client]] = {}
+        for client in ctx.clients[team][slot]:
+            if not client.no_items:
+                payloads.setdefault((client.remote_start_inventory, client.remote_items, client.send_index),
+                                    []).append(client)
+        for (remote_start_inventory, remote_items, send_index), clients in payloads.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.broadcast_encoded_msgs(clients, ctx.dumper([{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}]))
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -1083,6 +1521,9 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.new_item_slots.add((team, target))
+        if ctx.save_journal:
+            ctx.save_journal.changed_items.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1120,6 +1561,8 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.new_checks.setdefault((team, slot), set()).update(new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1127,7 +1570,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1592,6 +2035,9 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_item_slots.add((self.client.team, self.client.slot))
+                if self.ctx.save_journal:
+                    self.ctx.save_journal.changed_items.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1610,9 +2056,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
         auto_status = HintStatus.HINT_UNSPECIFIED if for_location else HintStatus.HINT_PRIORITY
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.get_rechecked_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1858,23 +2302,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = ctx.gamespackage
+        await ctx.send_encoded_msgs(client, ctx.get_encoded_data_package(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2030,13 +2466,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                               "text": 'Retrieve', "original_cmd": cmd}])
                 return
             args["cmd"] = "Retrieved"
-            keys = args["keys"]
-            args["keys"] = {
-                key: ctx.read_data.get(key[6:], lambda: None)() if key.startswith("_read_") else
-                     ctx.stored_data.get(key, None)
-                for key in keys
-            }
-            await ctx.send_msgs(client, [args])
+            await ctx.send_encoded_msgs(client, ctx.get_encoded_retrieved(args))
 
         elif cmd == "Set":
             if "key" not in args or args["key"].startswith("_read_") or \
@@ -2045,14 +2475,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                               "text": 'Set', "original_cmd": cmd}])
                 return
             args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
+            value = args["original_value"] = ctx.stored_data.get(args["key"], args.get("default", 0))
             args["slot"] = client.slot
             for operation in args["operations"]:
                 func = modify_functions[operation["operation"]]
+                if value is args["original_value"] and operation["operation"] in in_place_modify_functions:
+                    value = copy.copy(value)  # copy on first write, the stored value is never modified
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
+            targets = ctx.get_notification_clients(args["key"])
             if args.get("want_reply", False):
                 targets.add(client)
             if targets:
@@ -2060,12 +2491,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             ctx.save()
 
         elif cmd == "SetNotify":
-            if "keys" not in args or type(args["keys"]) != list:
+            keys = args.get("keys", [])
+            prefixes = args.get("prefixes", [])
+            if ("keys" not in args and "prefixes" not in args) or type(keys) != list or type(prefixes) != list \
+                    or not all(isinstance(prefix, str) for prefix in prefixes):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
-            for key in args["keys"]:
+            for key in keys:
                 ctx.stored_data_notification_clients[key].add(client)
+            for prefix in prefixes:
+                ctx.stored_data_prefix_notification_clients[prefix].add(client)
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -2395,13 +2831,16 @@ class ServerCommandProcessor(CommonCommandProcessor):
         return True
 
     def _cmd_datastore(self):
-        """Debug Tool: list writable datastorage keys and approximate the size of their values with pickle."""
+        """Debug Tool: list writable datastorage keys, approximate the size of their values with pickle
+        and show how often they are written and how many clients are notified about it."""
         total: int = 0
         texts = []
         for key, value in self.ctx.stored_data.items():
             size = len(pickle.dumps(value))
             total += size
-            texts.append(f"Key: {key} | Size: {size}B")
+            texts.append(f"Key: {key} | Size: {size}B | Writes: {self.ctx.stored_data.writes[key]} "
+                         f"({self.ctx.stored_data.get_write_rate(key):.1f}/min) | "
+                         f"Notified: {len(self.ctx.get_notification_clients(key))}")
         texts.insert(0, f"Found {len(self.ctx.stored_data)} keys, "
                         f"approximately totaling {Utils.format_SI_prefix(total, power=1024)}B")
         self.output("\n".join(texts))
@@ -2439,6 +2878,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--save_journal', default=defaults["save_journal"], action='store_true',
+                        help="append only changes to the save file, writing a full save once in a while")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2486,6 +2927,8 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--convert_multidata', action="store_true",
+                        help="convert the given .archipelago file to the current multidata format in place and exit")
     args = parser.parse_args()
     return args
 
@@ -2516,6 +2959,18 @@ async def auto_shutdown(ctx, to_cancel=None):
                     await asyncio.wait_for(ctx.exit_event.wait(), seconds)
 
 
+def convert_multidata_file(path: str) -> None:
+    """Rewrites a .archipelago file of an older format, so it can be loaded lazily."""
+    if not path or not path.lower().endswith(".archipelago"):
+        raise ValueError("Converting multidata requires the path to an .archipelago file.")
+    with open(path, "rb") as f:
+        data = f.read()
+    converted = NetUtils.convert_multidata(data)
+    with open(path, "wb") as f:
+        f.write(converted)
+    logging.info(f"Converted {path} from multidata format {data[0]} to {converted[0]}.")
+
+
 def load_server_cert(path: str, cert_key: typing.Optional[str]) -> "ssl.SSLContext":
     import ssl
     ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
@@ -2529,6 +2984,10 @@ async def main(args: argparse.Namespace):
                        loglevel=args.loglevel.lower(),
                        add_timestamp=args.logtime)
 
+    if args.convert_multidata:
+        convert_multidata_file(args.multidata)
+        return
+
     ctx = Context(args.host, args.port, args.server_password, args.password, args.location_check_points,
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.remaining_mode,
@@ -2562,7 +3021,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
-    ctx.init_save(not args.disable_save)
+    ctx.init_save(not args.disable_save, args.save_journal)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import array
+import concurrent.futures
+import pickle
 import typing
 import enum
+import math
+import struct
+import sys
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -134,10 +146,44 @@ _encode = JSONEncoder(
 ).encode
 
 
-def encode(obj: typing.Any) -> str:
+def _json_encode(obj: typing.Any) -> str:
     return _encode(_scan_for_TypedTuples(obj))
 
 
+def _orjson_default(obj: typing.Any) -> typing.Any:
+    # orjson only calls this for types it can't serialize itself, instead of copying the whole message first
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def _has_non_finite_float(obj: typing.Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite_float(key) or _has_non_finite_float(value) for key, value in obj.items())
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        return any(_has_non_finite_float(value) for value in obj)
+    return False
+
+
+def encode(obj: typing.Any) -> str:
+    if orjson:
+        try:
+            data = orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # integers beyond 64 bit, which the json module can handle
+        else:
+            # orjson writes null for inf and nan, where the json module writes Infinity and NaN
+            if b"null" not in data or not _has_non_finite_float(obj):
+                return data.decode("utf-8")
+    return _json_encode(obj)
+
+
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -169,7 +215,46 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
-decode = JSONDecoder(object_hook=_object_hook).decode
+_json_decode = JSONDecoder(object_hook=_object_hook).decode
+
+
+def _convert_objects(obj: typing.Any) -> typing.Any:
+    """Converts the dicts of a decoded message like _object_hook does, innermost first, like JSONDecoder does."""
+    if obj.__class__ is list:
+        for index, value in enumerate(obj):
+            if value.__class__ in _containers:
+                obj[index] = _convert_objects(value)
+        return obj
+    for key, value in obj.items():
+        if value.__class__ in _containers:
+            obj[key] = _convert_objects(value)
+    cls = allowlist.get(obj.get("class", None), None)
+    if cls:
+        del obj["class"]
+        try:
+            return cls(**obj)
+        except TypeError:
+            obj["class"] = cls.__name__  # unknown or missing fields, let _object_hook deal with them
+    elif "class" not in obj:
+        return obj
+    return _object_hook(obj)
+
+
+_containers = (list, dict)
+
+
+def decode(s: str) -> typing.Any:
+    if orjson:
+        try:
+            obj = orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass  # let the json module handle or report it, including Infinity and NaN
+        else:
+            # a class key is either written as "class", or with \u escapes, which the walk has to find
+            if obj.__class__ in _containers and ('"class"' in s or "\\u" in s):
+                return _convert_objects(obj)
+            return obj  # nothing to convert, which is the case for most messages from clients
+    return _json_decode(s)
 
 
 class Endpoint:
@@ -424,6 +509,71 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    @classmethod
+    def from_columns(cls, player_count: int, senders: typing.Sequence[int], locations: typing.Sequence[int],
+                     items: typing.Sequence[int], receivers: typing.Sequence[int], flags: typing.Sequence[int]
+                     ) -> _LocationStore:
+        """
+        Creates a store from one array per field, for players 1 to player_count.
+        Entries have to be sorted by sender, then location, as they are in the store.
+        """
+        if not len(senders) == len(locations) == len(items) == len(receivers) == len(flags):
+            raise ValueError("Columns differ in length")
+        values: typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]] = \
+            {player: {} for player in range(1, player_count + 1)}
+        for sender, location, item, receiver, item_flags in zip(senders, locations, items, receivers, flags):
+            if sender not in values:
+                raise ValueError(f"Invalid player id {sender} for location")
+            values[sender][location] = item, receiver, item_flags
+        return cls(values)
+
+    _buffer_header = struct.Struct("=8sIIQQ")
+    _buffer_index_entry = struct.Struct("=QQ")
+    _buffer_location_entry = struct.Struct("=qIIqI4x")
+    _buffer_receiver_order = struct.Struct("=Q")
+
+    def to_buffer(self) -> bytes:
+        """Serializes the store into the flat buffer of _speedups.LocationStore on 64-bit platforms."""
+        index: typing.List[bytes] = [self._buffer_index_entry.pack(0, 0)]
+        entries: typing.List[bytes] = []
+        receiver_keys: typing.List[typing.Tuple[int, int, int]] = []
+        for sender in range(1, len(self) + 1):
+            locations = self[sender]
+            index.append(self._buffer_index_entry.pack(len(entries), len(locations)))
+            for location, data in sorted(locations.items()):
+                receiver_keys.append((data[1], data[0], len(entries)))
+                entries.append(self._buffer_location_entry.pack(location, sender, data[1], data[0],
+                                                                data[2] if len(data) > 2 else 0))
+        # positions of entries sorted by receiver and item, which _speedups uses as index
+        receiver_order = [self._buffer_receiver_order.pack(position) for _, _, position in sorted(receiver_keys)]
+        header = self._buffer_header.pack(b"APLocSt2", self._buffer_index_entry.size,
+                                          self._buffer_location_entry.size, len(self), len(entries))
+        return b"".join([header, *index, *entries, *receiver_order])
+
+    @classmethod
+    def from_buffer(cls, buffer: typing.Any) -> _LocationStore:
+        """Creates a store from a buffer created by to_buffer. Unlike _speedups, this copies the data."""
+        view = memoryview(buffer)
+        if len(view) < cls._buffer_header.size:
+            raise ValueError("Buffer too small for a LocationStore")
+        magic, index_entry_size, location_entry_size, player_count, entry_count = \
+            cls._buffer_header.unpack_from(view)
+        if magic != b"APLocSt2":
+            raise ValueError("Buffer does not contain a LocationStore")
+        if index_entry_size != cls._buffer_index_entry.size or \
+                location_entry_size != cls._buffer_location_entry.size:
+            raise ValueError("Buffer was created on an incompatible platform")
+        entries_offset = cls._buffer_header.size + index_entry_size * (player_count + 1)
+        order_offset = entries_offset + location_entry_size * entry_count
+        if len(view) != order_offset + cls._buffer_receiver_order.size * entry_count:
+            raise ValueError("Buffer size does not match its LocationStore")
+        values: typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]] = \
+            {player: {} for player in range(1, player_count + 1)}
+        for location, sender, receiver, item, flags in \
+                cls._buffer_location_entry.iter_unpack(view[entries_offset:order_offset]):
+            values[sender][location] = item, receiver, flags
+        return cls(values)
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
         for finding_player, check_data in self.items():
@@ -493,3 +643,188 @@ else:
             warnings.warn("_speedups not available. Falling back to pure python LocationStore. "
                           "Install a matching C++ compiler for your platform to compile _speedups.")
             LocationStore = _LocationStore
+
+
+multidata_format_version = 4
+"""newest format byte of multidata, written by encode_multidata by default. Versions up to 3 are a zlib compressed
+pickle, which is the newest format older servers can load."""
+legacy_multidata_format_version = 3
+
+_section_header = struct.Struct("<BQQ")  # encoding, offset, length
+_locations_header = struct.Struct("<QQ")  # player count, location count
+
+
+class _SectionEncoding(enum.IntEnum):
+    pickle = 0
+    """zlib compressed pickle of the section's value"""
+    locations = 1
+    """zlib compressed columns of the LocationStore's fields"""
+
+
+def _encode_locations(locations: typing.Mapping[int, typing.Mapping[int, typing.Sequence[int]]]) -> bytes:
+    columns = senders, location_ids, items, receivers, flags = \
+        array.array("I"), array.array("q"), array.array("q"), array.array("I"), array.array("I")
+    for sender, sender_locations in sorted(locations.items()):
+        for location_id, data in sorted(sender_locations.items()):
+            senders.append(sender)
+            location_ids.append(location_id)
+            items.append(data[0])
+            receivers.append(data[1])
+            flags.append(data[2] if len(data) > 2 else 0)
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    return zlib.compress(_locations_header.pack(max(locations, default=0), len(senders)) +
+                         b"".join(column.tobytes() for column in columns), 9)
+
+
+def _decode_locations(data: bytes) -> LocationStore:
+    view = memoryview(zlib.decompress(data))
+    player_count, count = _locations_header.unpack_from(view)
+    offset = _locations_header.size
+    columns: typing.List[memoryview] = []
+    for type_code, size in (("I", 4), ("q", 8), ("q", 8), ("I", 4), ("I", 4)):
+        column = view[offset:offset + count * size].cast(type_code)
+        if sys.byteorder != "little":
+            swapped = array.array(type_code, column)
+            swapped.byteswap()
+            column = memoryview(swapped)
+        columns.append(column)
+        offset += count * size
+    return LocationStore.from_columns(player_count, *columns)
+
+
+class MultiData(typing.MutableMapping[str, typing.Any]):
+    """
+    Multidata of format version 4, which stores each top-level key in its own section.
+    Sections are only decoded when accessed, and locations are decoded straight into a LocationStore.
+    """
+    _data: bytes
+    _sections: typing.Dict[str, typing.Tuple[_SectionEncoding, int, int]]
+    """encoding, offset and length of the sections not decoded yet"""
+    _decoded: typing.Dict[str, typing.Any]
+
+    def __init__(self, data: bytes) -> None:
+        if data[0] != multidata_format_version:
+            raise ValueError(f"Not a multidata of format version {multidata_format_version}.")
+        self._data = data
+        self._sections = {}
+        self._decoded = {}
+        offset = 1
+        section_count, = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(section_count):
+            name_length = data[offset]
+            name = data[offset + 1:offset + 1 + name_length].decode()
+            offset += 1 + name_length
+            encoding, section_offset, length = _section_header.unpack_from(data, offset)
+            offset += _section_header.size
+            self._sections[name] = _SectionEncoding(encoding), section_offset, length
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        try:
+            encoding, offset, length = self._sections[key]
+        except KeyError:
+            # another thread sharing this multidata may have decoded it in the meantime
+            return self._decoded[key]
+        data = self._data[offset:offset + length]
+        if encoding == _SectionEncoding.locations:
+            value = _decode_locations(data)
+        else:
+            value = restricted_loads(zlib.decompress(data))
+        value = self._decoded.setdefault(key, value)
+        self._sections.pop(key, None)
+        return value
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self._sections.pop(key, None)
+        self._decoded[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._decoded:
+            del self._decoded[key]
+        else:
+            del self._sections[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._decoded or key in self._sections
+
+    def __iter__(self) -> typing.Iterator[str]:
+        yield from tuple(self._decoded)
+        yield from tuple(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._decoded) + len(self._sections)
+
+    def get_raw_section(self, key: str) -> typing.Optional[typing.Tuple[_SectionEncoding, bytes]]:
+        """Returns the encoded section of key, if it hasn't been decoded yet."""
+        if key in self._sections:
+            encoding, offset, length = self._sections[key]
+            return encoding, self._data[offset:offset + length]
+        return None
+
+
+def _encode_pickle_section(value: typing.Any) -> bytes:
+    return zlib.compress(pickle.dumps(value), 9)
+
+
+def encode_multidata(multidata: typing.Mapping[str, typing.Any],
+                     executor: typing.Optional[concurrent.futures.Executor] = None,
+                     format_version: int = multidata_format_version) -> bytes:
+    """
+    Encodes multidata, including the format byte.
+
+    :param executor: if given, pickled sections are compressed in it concurrently, as zlib releases the GIL.
+    :param format_version: multidata_format_version, or legacy_multidata_format_version for servers older than it.
+    """
+    if format_version == legacy_multidata_format_version:
+        legacy_multidata = dict(multidata)
+        locations = legacy_multidata.get("locations")
+        if locations is not None and type(locations) is not dict:
+            # older servers build their own LocationStore from plain dicts
+            legacy_multidata["locations"] = {player: dict(locations[player].items()) for player in locations}
+        return bytes([format_version]) + zlib.compress(pickle.dumps(legacy_multidata), 9)
+    if format_version != multidata_format_version:
+        raise ValueError(f"Can't encode multidata format {format_version}.")
+    sections: typing.List[typing.Tuple[str, _SectionEncoding, bytes]] = []
+    pending: typing.Dict[int, concurrent.futures.Future[bytes]] = {}
+    for key in multidata:
+        raw_section = multidata.get_raw_section(key) if isinstance(multidata, MultiData) else None
+        if raw_section:
+            sections.append((key, *raw_section))
+        elif key == "locations":
+            sections.append((key, _SectionEncoding.locations, _encode_locations(multidata[key])))
+        elif executor:
+            pending[len(sections)] = executor.submit(_encode_pickle_section, multidata[key])
+            sections.append((key, _SectionEncoding.pickle, b""))
+        else:
+            sections.append((key, _SectionEncoding.pickle, _encode_pickle_section(multidata[key])))
+    for index, future in pending.items():
+        key, encoding, _ = sections[index]
+        sections[index] = key, encoding, future.result()
+
+    header_size = 1 + 4 + sum(1 + len(key.encode()) + _section_header.size for key, _, _ in sections)
+    header = [bytes([multidata_format_version]), struct.pack("<I", len(sections))]
+    offset = header_size
+    for key, encoding, data in sections:
+        encoded_key = key.encode()
+        header.append(bytes([len(encoded_key)]) + encoded_key + _section_header.pack(encoding, offset, len(data)))
+        offset += len(data)
+    return b"".join(header + [data for _, _, data in sections])
+
+
+def decode_multidata(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+    """Decodes multidata of any supported format, including the format byte. Format 4 is decoded lazily."""
+    format_version = data[0]
+    if format_version == multidata_format_version:
+        return MultiData(data)
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    return restricted_loads(zlib.decompress(data[1:]))
+
+
+def convert_multidata(data: bytes) -> bytes:
+    """Converts multidata of any supported format to the current format."""
+    return encode_multidata(decode_multidata(data))
@@ -15,6 +15,8 @@ import collections
 import importlib
 import logging
 import warnings
+import bisect
+import struct
 
 from argparse import Namespace
 from settings import Settings, get_settings
@@ -388,6 +390,140 @@ def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> N
             logging.debug(f"Could not store data package: {e}")
 
 
+class NameLookupTable(typing.Mapping[int, str]):
+    """
+    Read-only id -> name mapping of a sorted id array and a string table, which can be backed by a memory-mapped file.
+    Names are only decoded when looked up, so opening a table costs nothing regardless of its size.
+    """
+    __slots__ = ("_ids", "_ends", "_names")
+
+    _ids: memoryview
+    """sorted ids, as signed 64-bit integers"""
+    _ends: memoryview
+    """end offset of each id's name in _names, as unsigned 32-bit integers"""
+    _names: memoryview
+    """UTF-8 encoded names, concatenated in the order of the ids"""
+
+    header = struct.Struct("=II")
+    """number of ids and size of the string table in bytes, in front of each table in a name lookup cache"""
+
+    def __init__(self, ids: memoryview, ends: memoryview, names: memoryview) -> None:
+        self._ids = ids
+        self._ends = ends
+        self._names = names
+
+    @classmethod
+    def from_name_to_id(cls, name_to_id: typing.Mapping[str, int]) -> NameLookupTable:
+        """Builds a table in memory from a data package's name to id lookup."""
+        import array
+
+        # same as inverting the dict, later names win for duplicate ids
+        id_to_name = {code: name for name, code in name_to_id.items()}
+        ids = array.array("q", sorted(id_to_name))
+        encoded_names = [id_to_name[code].encode("utf-8") for code in ids]
+        ends = array.array("I", itertools.accumulate(map(len, encoded_names)))
+        return cls(memoryview(ids), memoryview(ends), memoryview(b"".join(encoded_names)))
+
+    @classmethod
+    def from_buffer(cls, buffer: memoryview, offset: int) -> typing.Tuple[NameLookupTable, int]:
+        """Reads a table from buffer at offset, without copying it. Returns the table and the offset after it."""
+        count, names_size = cls.header.unpack_from(buffer, offset)
+        offset += cls.header.size
+        ids = buffer[offset:offset + 8 * count].cast("q")
+        offset += 8 * count
+        ends = buffer[offset:offset + 4 * count].cast("I")
+        offset += 4 * count
+        names = buffer[offset:offset + names_size]
+        offset += names_size
+        if len(names) != names_size or (count and ends[-1] != names_size):
+            raise ValueError("Truncated name lookup table")
+        return cls(ids, ends, names), offset + -offset % 8
+
+    def to_bytes(self) -> bytes:
+        """Returns the table in the format read by from_buffer, padded to keep following tables aligned."""
+        data = b"".join((self.header.pack(len(self._ids), len(self._names)),
+                         self._ids.tobytes(), self._ends.tobytes(), self._names.tobytes()))
+        return data + bytes(-len(data) % 8)
+
+    def __getitem__(self, key: int) -> str:
+        if not isinstance(key, int):
+            raise KeyError(key)
+        ids = self._ids
+        index = bisect.bisect_left(ids, key)
+        if index == len(ids) or ids[index] != key:
+            raise KeyError(key)
+        return str(self._names[self._ends[index - 1] if index else 0:self._ends[index]], "utf-8")
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class NameLookupTables(typing.NamedTuple):
+    """id -> name lookups of a game's data package"""
+    item_names: NameLookupTable
+    location_names: NameLookupTable
+
+
+_name_lookup_magic = b"APNL\x01\x00\x00\x00"
+_name_lookups: Dict[str, NameLookupTables] = {}
+
+
+def _name_lookup_path(game: str, checksum: str) -> str:
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    return cache_path("datapackage", get_file_safe_name(game), f"{checksum}.lookup")
+
+
+def load_name_lookup_for_checksum(game: str, checksum: typing.Optional[str]) -> typing.Optional[NameLookupTables]:
+    """
+    Returns the id -> name lookups cached by store_name_lookup_for_checksum, memory-mapped instead of parsed,
+    so any number of clients can share them. Returns None if they are not cached.
+    """
+    if not checksum or not game:
+        return None
+    path = _name_lookup_path(game, checksum)
+    if path in _name_lookups:
+        return _name_lookups[path]
+    if not os.path.exists(path):
+        return None
+    try:
+        import mmap
+        with open(path, "rb") as f:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        if buffer[:len(_name_lookup_magic)] != _name_lookup_magic:
+            raise ValueError("Not a name lookup cache of this version")
+        item_names, offset = NameLookupTable.from_buffer(buffer, len(_name_lookup_magic))
+        location_names, offset = NameLookupTable.from_buffer(buffer, offset)
+    except Exception as e:
+        logging.debug(f"Could not load name lookup: {e}")
+        return None
+    _name_lookups[path] = name_lookup = NameLookupTables(item_names, location_names)
+    return name_lookup
+
+
+def store_name_lookup_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
+    """Caches the id -> name lookups of a game's data package, in a format that can be loaded without parsing."""
+    checksum = data.get("checksum")
+    if checksum and game:
+        path = _name_lookup_path(game, checksum)
+        try:
+            tables = (NameLookupTable.from_name_to_id(data["item_name_to_id"]),
+                      NameLookupTable.from_name_to_id(data["location_name_to_id"]))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written under a temporary name, so other clients never map a partially written file
+            temp_path = f"{path}.{os.getpid()}"
+            with open(temp_path, "wb") as f:
+                f.write(_name_lookup_magic)
+                for table in tables:
+                    f.write(table.to_bytes())
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.debug(f"Could not store name lookup: {e}")
+
+
 def get_default_adjuster_settings(game_name: str) -> Namespace:
     import LttPAdjuster
     adjuster_settings = Namespace()
@@ -0,0 +1,101 @@
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from flask import abort, jsonify, request, Response
+
+from . import api_endpoints
+from ..models import Room
+from ..tracker import TeamPlayer, TrackerData
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>')
+def tracker_info(tracker: UUID) -> Response:
+    return get_tracker_response(tracker, None)
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>/<int:team>/<int:player>')
+def tracker_slot_info(tracker: UUID, team: int, player: int) -> Response:
+    return get_tracker_response(tracker, (team, player))
+
+
+def get_tracker_response(tracker: UUID, slot: Optional[TeamPlayer]) -> Response:
+    """
+    Returns checked locations, received items, hints, status and last activity of each slot, or only the given one.
+    With ?since=<version> of an earlier response, only what changed since is returned, if the changes are still known.
+    Responses carry strong ETags, so unchanged data can be revalidated with If-None-Match.
+    """
+    room = Room.get(tracker=tracker)
+    if not room:
+        abort(404)
+    since: Optional[int] = None
+    if "since" in request.args:
+        try:
+            since = int(request.args["since"])
+        except ValueError:
+            abort(400)
+
+    tracker_data = TrackerData(room)
+    slots = [(team, player) for team, players in tracker_data.get_all_slots().items() for player in players]
+    if slot:
+        if slot not in slots:
+            abort(404)
+        slots = [slot]
+
+    version = tracker_data.get_save_version()
+    changes = None if since is None else tracker_data.get_save_changes(since)
+    if changes is None:
+        since = None
+        slot_data = [get_slot_info(tracker_data, team, player) for team, player in slots]
+    else:
+        slot_data = get_slot_changes(tracker_data, slots, changes)
+
+    response = jsonify({"version": version, "since": since, "slots": slot_data})
+    response.set_etag(f"{version}" if since is None else f"{since}-{version}")
+    return response.make_conditional(request)
+
+
+def get_slot_info(tracker_data: TrackerData, team: int, player: int) -> Dict[str, Any]:
+    return {
+        "team": team,
+        "player": player,
+        "checked_locations": sorted(tracker_data.get_player_checked_locations(team, player)),
+        "received_items": tracker_data.get_player_received_items(team, player),
+        "hints": sorted(tracker_data.get_player_hints(team, player)),
+        "status": tracker_data.get_player_client_status(team, player),
+        "last_activity": tracker_data.get_room_activity_timestamps().get((team, player), None),
+    }
+
+
+def get_slot_changes(tracker_data: TrackerData, slots: List[TeamPlayer],
+                     changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Returns the changed fields of each slot that changed, with the start index of any new received items."""
+    checked_locations: Dict[TeamPlayer, Set[int]] = {}
+    received_starts: Dict[TeamPlayer, int] = {}
+    changed_hints: Set[TeamPlayer] = set()
+    changed_others: Set[str] = set()
+    for delta in changes:
+        for key, locations in delta.get("location_checks", {}).items():
+            checked_locations.setdefault(key, set()).update(locations)
+        for (team, player, remote), (start, _) in delta.get("received_items", {}).items():
+            if remote:
+                received_starts[team, player] = min(start, received_starts.get((team, player), start))
+        changed_hints.update(delta.get("hints", {}))
+        changed_others.update(delta.get("others", {}))
+
+    slot_changes = []
+    for team, player in slots:
+        changed: Dict[str, Any] = {}
+        if (team, player) in checked_locations:
+            changed["checked_locations"] = sorted(checked_locations[team, player])
+        if (team, player) in received_starts:
+            changed["received_items_start"] = start = received_starts[team, player]
+            changed["received_items"] = tracker_data.get_player_received_items(team, player)[start:]
+        if (team, player) in changed_hints:
+            changed["hints"] = sorted(tracker_data.get_player_hints(team, player))
+        if "client_game_state" in changed_others:
+            changed["status"] = tracker_data.get_player_client_status(team, player)
+        if "client_activity_timers" in changed_others:
+            changed["last_activity"] = tracker_data.get_room_activity_timestamps().get((team, player), None)
+        if changed:
+            slot_changes.append({"team": team, "player": player, **changed})
+    return slot_changes
@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 import multiprocessing
+import time
 import typing
 from datetime import timedelta, datetime
 from threading import Event, Thread
@@ -94,7 +95,7 @@ def cleanup():
         rooms = Room.select(lambda room: room.owner == UUID(int=0)).delete(bulk=True)
         seeds = Seed.select(lambda seed: seed.owner == UUID(int=0) and not seed.rooms).delete(bulk=True)
         slots = Slot.select(lambda slot: not slot.seed).delete(bulk=True)
-        # Command gets deleted by ponyorm Cascade Delete, as Room is Required
+        # Command and SaveRecord get deleted by ponyorm Cascade Delete, as Room is Required
     if rooms or seeds or slots:
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
@@ -111,15 +112,9 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
+                scheduler = RoomScheduler(hosters)
                 while not stop_event.wait(0.1):
-                    with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= datetime.utcnow() - timedelta(days=3))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                    scheduler.update()
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -127,6 +122,89 @@ def autohost(config: dict):
     Thread(target=keep_running, name="AP_Autohost").start()
 
 
+class RoomScheduler:
+    """
+    Starts rooms with recent activity on the least busy hoster.
+    Only rooms with recent last_activity are read from the database, and only those that changed are processed.
+    """
+    window: typing.ClassVar[timedelta] = timedelta(minutes=5)
+    """how far updates look back from this process's clock, so activity that was committed late,
+    or written by a host with a skewed clock, is not missed"""
+    stats_interval: typing.ClassVar[float] = 600
+
+    hosters: typing.List[MultiworldInstance]
+    active: typing.Dict[UUID, datetime]
+    """rooms that should be running, with the time they time out at"""
+    seen: typing.Dict[UUID, datetime]
+    """last_activity of the rooms read within window, to skip unchanged ones"""
+    queries: int
+
+    def __init__(self, hosters: typing.List[MultiworldInstance]):
+        self.hosters = hosters
+        self.active = {}
+        self.seen = {}
+        self.since = datetime.utcnow() - timedelta(days=3)
+        self.queries = 0
+        self._stats_start = self._last_stats = time.monotonic()
+
+    @property
+    def queries_per_second(self) -> float:
+        return self.queries / max(time.monotonic() - self._stats_start, 1)
+
+    @property
+    def rooms_per_hoster(self) -> typing.Dict[str, int]:
+        return {hoster.name: len(hoster.room_ids) for hoster in self.hosters}
+
+    def _read(self, room: Room, now: datetime) -> None:
+        # this could be part of the query, but the per-room timeout can't currently be PonyORM transpiled.
+        end = room.last_activity + timedelta(seconds=room.timeout + 5)
+        if end > now:
+            self.active[room.id] = end
+        else:
+            self.active.pop(room.id, None)
+
+    @db_session
+    def update(self) -> None:
+        now = datetime.utcnow()
+        fresh: typing.Set[UUID] = set()
+        since = self.since
+        # not based on the last_activity read, which may be ahead of rooms that have yet to commit theirs
+        self.since = now - self.window
+        rooms = select(room for room in Room if room.last_activity >= since)
+        self.queries += 1
+        for room in rooms:
+            if self.seen.get(room.id) != room.last_activity:
+                self.seen[room.id] = room.last_activity
+                self._read(room, now)
+                fresh.add(room.id)
+        self.seen = {room_id: last_activity for room_id, last_activity in self.seen.items()
+                     if last_activity >= self.since}
+
+        self.active = {room_id: end for room_id, end in self.active.items() if end > now}
+        hosted: typing.Set[UUID] = set()
+        for hoster in self.hosters:
+            hoster.collect_shut_down_rooms()
+            hosted.update(hoster.room_ids)
+        to_start = [room_id for room_id in self.active if room_id not in hosted]
+
+        # rooms that shut down before timing out, e.g. from /exit, moved their last_activity back,
+        # which updates don't see, so they are read again before being restarted.
+        stale = [room_id for room_id in to_start if room_id not in fresh]
+        if stale:
+            for room in select(room for room in Room if room.id in stale):
+                self._read(room, now)
+            self.queries += 1
+            to_start = [room_id for room_id in to_start if room_id in self.active]
+
+        for room_id in to_start:
+            min(self.hosters, key=lambda hoster: len(hoster.room_ids)).start_room(room_id)
+
+        if time.monotonic() - self._last_stats >= self.stats_interval:
+            self._last_stats = time.monotonic()
+            logging.info(f"Autohost: {self.queries_per_second:.1f} queries per second, "
+                         f"rooms per hoster: {self.rooms_per_hoster}")
+
+
 def autogen(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -191,9 +269,12 @@ class MultiworldInstance():
         process.start()
         self.process = process
 
-    def start_room(self, room_id):
+    def collect_shut_down_rooms(self):
         while not self.rooms_shutting_down.empty():
             self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+
+    def start_room(self, room_id):
+        self.collect_shut_down_rooms()
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
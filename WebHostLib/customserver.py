@@ -5,7 +5,9 @@ import collections
 import datetime
 import functools
 import logging
+import mmap
 import multiprocessing
+import os
 import pickle
 import random
 import socket
@@ -19,10 +21,12 @@ from pony.orm import commit, db_session, select
 
 import Utils
 
-from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
-from Utils import restricted_loads, cache_argsless
+from MultiServer import Context, SaveJournal, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, \
+    load_server_cert
+from NetUtils import LocationStore
+from Utils import cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveRecord, db, get_multisave
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -86,18 +90,13 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            time.sleep(5)
+    @property
+    def db_command_interval(self) -> float:
+        """Seconds between checks for commands from the room's page, shorter while an admin is logged in."""
+        admin = self.commandprocessor.client
+        if admin and admin.socket and admin.socket.open:
+            return DBCommandPoller.admin_interval
+        return DBCommandPoller.interval
 
     @db_session
     def load(self, room_id: int):
@@ -109,6 +108,7 @@ class WebHostContext(Context):
             self.port = get_random_port()
 
         multidata = self.decompress(room.seed.multidata)
+        multidata["locations"] = get_shared_location_store(room.seed.id, multidata)
         game_data_packages = {}
 
         static_gamespackage = self.gamespackage  # this is shared across all rooms
@@ -147,34 +147,169 @@ class WebHostContext(Context):
         return self._load(multidata, game_data_packages, True)
 
     @db_session
-    def init_save(self, enabled: bool = True):
+    def init_save(self, enabled: bool = True, journal: bool = True):
         self.saving = enabled
         if self.saving:
-            savegame_data = Room.get(id=self.room_id).multisave
+            if journal:
+                self.save_journal = SaveJournal(self)
+            savegame_data = get_multisave(Room.get(id=self.room_id))
             if savegame_data:
-                self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
+                self.set_save(*SaveJournal.load(savegame_data, compressed=False))
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
         room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
-        # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
-        if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
-            room.last_activity = datetime.datetime.utcnow()
+        try:
+            if self.save_journal and not self.save_journal.snapshot_due and not exit_save:
+                record = self.save_journal.take_record()
+                if record:
+                    SaveRecord(room=room, data=record)
+            else:
+                # the save written on exit is loadable by WebHosts without journal support
+                save = self.save_journal.take_snapshot(exit_save) if self.save_journal else self.get_save()
+                room.multisave = pickle.dumps(save)
+                SaveRecord.select(lambda record: record.room == room).delete(bulk=True)
+                if self.save_journal:
+                    self.save_journal.set_snapshot_size(len(room.multisave))
+            # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
+            if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
+                room.last_activity = datetime.datetime.utcnow()
+            commit()  # a record that didn't make it into the database has to be included in the next snapshot
+        except Exception:
+            if self.save_journal:
+                self.save_journal.invalidate()
+            raise
         return True
 
-    def get_save(self) -> dict:
-        d = super(WebHostContext, self).get_save()
+    def get_save_others(self) -> dict:
+        d = super(WebHostContext, self).get_save_others()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
         return d
 
 
+class DBCommandPoller(threading.Thread):
+    """
+    Fetches the Commands of all rooms hosted by this process with a single query
+    and hands them to the event loops of their rooms.
+    """
+    interval: typing.ClassVar[float] = 5
+    admin_interval: typing.ClassVar[float] = 1
+
+    _rooms: typing.Dict[typing.Any, typing.Tuple[WebHostContext, DBCommandProcessor]]
+    _next_poll: typing.Dict[typing.Any, float]
+
+    def __init__(self):
+        super().__init__(name="DBCommandPoller", daemon=True)
+        self._rooms = {}
+        self._next_poll = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def add_room(self, ctx: WebHostContext) -> None:
+        """Starts passing commands to ctx until its exit_event is set."""
+        with self._lock:
+            self._rooms[ctx.room_id] = ctx, DBCommandProcessor(ctx)
+            self._next_poll[ctx.room_id] = 0
+        self._wakeup.set()
+
+    def poll(self) -> float:
+        """Dispatches the commands of all rooms that are due and returns the seconds until the next room is due."""
+        now = time.monotonic()
+        with self._lock:
+            for room_id, (ctx, _) in list(self._rooms.items()):
+                if ctx.exit_event.is_set():
+                    del self._rooms[room_id], self._next_poll[room_id]
+            due = {room_id: room for room_id, room in self._rooms.items() if self._next_poll[room_id] <= now}
+            for room_id, (ctx, _) in due.items():
+                self._next_poll[room_id] = now + ctx.db_command_interval
+
+        if due:
+            room_ids = list(due)
+            with db_session:
+                commands = select(command for command in Command if command.room.id in room_ids)
+                if commands:
+                    for command in commands:
+                        ctx, cmdprocessor = due[command.room.id]
+                        ctx.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
+                        command.delete()
+                    commit()
+
+        with self._lock:
+            next_poll = min(self._next_poll.values(), default=now + self.interval)
+        return next_poll - time.monotonic()
+
+    def run(self):
+        while 1:
+            try:
+                timeout = self.poll()
+            except Exception:
+                logging.exception("Exception while polling room commands")
+                timeout = self.interval
+            self._wakeup.wait(max(0.0, timeout))
+            self._wakeup.clear()
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
 
+location_store_cache_lifetime = datetime.timedelta(days=7)
+
+
+def location_store_cache_path(*path: str) -> str:
+    return Utils.cache_path("location_stores", *path)
+
+
+def _map_location_store(path: str) -> LocationStore:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    os.utime(path)  # mark as used for clean_location_store_cache
+    return LocationStore.from_buffer(mapped)
+
+
+def get_shared_location_store(seed_id: typing.Any, multidata: typing.Mapping[str, typing.Any]) -> LocationStore:
+    """
+    Returns the seed's LocationStore, memory mapped from a cache file, so rooms of the same seed share its pages,
+    including rooms in other processes. The cache file is created from multidata if it does not exist yet.
+    """
+    path = location_store_cache_path(f"{seed_id}.bin")
+    try:
+        return _map_location_store(path)
+    except (OSError, ValueError):
+        pass  # missing, or written by an incompatible version
+
+    locations = multidata["locations"]
+    if not isinstance(locations, LocationStore):
+        locations = LocationStore(locations)
+    try:
+        os.makedirs(location_store_cache_path(), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(locations.to_buffer())
+        os.replace(temp_path, path)  # atomic, so other processes never map a partial file
+        return _map_location_store(path)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not cache locations of seed {seed_id}: {e}")
+        return locations
+
+
+def clean_location_store_cache() -> None:
+    """Deletes cached LocationStores that were not used by any room recently."""
+    try:
+        file_names = os.listdir(location_store_cache_path())
+    except FileNotFoundError:
+        return
+    expired = time.time() - location_store_cache_lifetime.total_seconds()
+    for file_name in file_names:
+        path = location_store_cache_path(file_name)
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)  # running rooms keep their mapping
+        except OSError:
+            pass  # in use on Windows, or already deleted by another process
+
+
 @cache_argsless
 def get_static_server_data() -> dict:
     import worlds
@@ -267,9 +402,12 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
             return ssl_context
 
     del ponyconfig
+    clean_location_store_cache()
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    db_command_poller = DBCommandPoller()
+    db_command_poller.start()
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -278,6 +416,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
+                db_command_poller.add_room(ctx)
                 assert ctx.server is None
                 try:
                     ctx.server = websockets.serve(
@@ -26,6 +26,7 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    save_records = Set('SaveRecord')
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
@@ -50,6 +51,19 @@ class Command(db.Entity):
     commandtext = Required(str)
 
 
+class SaveRecord(db.Entity):
+    """save journal record appended to the room's multisave since its last snapshot, see MultiServer.SaveJournal"""
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    data = Required(bytes)
+
+
+def get_multisave(room: Room) -> bytes:
+    """Returns the room's save, which is its last snapshot followed by the save journal records written since."""
+    records = SaveRecord.select(lambda record: record.room == room).order_by(SaveRecord.id)
+    return (room.multisave or b"") + b"".join(record.data for record in records)
+
+
 class Generation(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     owner = Required(UUID)
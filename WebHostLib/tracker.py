@@ -1,28 +1,258 @@
 import datetime
 import collections
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Mapping, Optional, Set, Tuple, NamedTuple, Counter, TypeVar
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import make_response, render_template, request, Request, Response
 from werkzeug.exceptions import abort
 
-from MultiServer import Context, get_saving_second
+from MultiServer import Context, SaveJournal, get_saving_second
 from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
-from .models import GameDataPackage, Room
+from .models import GameDataPackage, Room, get_multisave
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
+# Parsed data packages and decoded multidata kept in each process, shared by all tracker requests.
+TRACKER_DATA_PACKAGE_CACHE_SIZE = 256
+TRACKER_MULTIDATA_CACHE_SIZE = 32
+TRACKER_ROOM_CACHE_SIZE = 256
+# Number of save deltas kept per room, to answer what changed since a recent version of the save.
+TRACKER_HISTORY_LENGTH = 100
 
-_multidata_cache = {}
 _multiworld_trackers: Dict[str, Callable] = {}
 _player_trackers: Dict[str, Callable] = {}
 
 TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
+T = TypeVar("T")
+
+
+class LRUCache:
+    """A thread-safe cache of values that never change for their key. The least recently used are dropped."""
+    max_size: int
+    hits: int
+    misses: int
+    _cache: collections.OrderedDict[Hashable, Any]
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        """Returns the value for key, calling load if it is not cached."""
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        # loading can take a while, so it is done unlocked. Concurrent misses may load twice, keeping one of them.
+        value = load()
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.max_size}
+
+
+class GameDataLookup(NamedTuple):
+    """The lookup tables of a game's data package, in both directions. Shared, so they must not be modified."""
+    item_name_to_id: Dict[str, int]
+    location_name_to_id: Dict[str, int]
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+
+
+_data_package_cache = LRUCache(TRACKER_DATA_PACKAGE_CACHE_SIZE)
+"""GameDataLookup by data package checksum"""
+_multidata_cache = LRUCache(TRACKER_MULTIDATA_CACHE_SIZE)
+"""decoded multidata by seed id, seeds never change"""
+_room_trackers = LRUCache(TRACKER_ROOM_CACHE_SIZE)
+"""RoomTracker by room id"""
+
+
+def get_tracker_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Returns the hit and miss counts and sizes of the process-wide tracker caches."""
+    return {"data_package": _data_package_cache.get_stats(), "multidata": _multidata_cache.get_stats(),
+            "room": _room_trackers.get_stats()}
+
+
+def _load_game_data_lookup(checksum: str) -> GameDataLookup:
+    game_package = restricted_loads(GameDataPackage.get(checksum=checksum).data)
+    return GameDataLookup(
+        game_package["item_name_to_id"],
+        game_package["location_name_to_id"],
+        {id: name for name, id in game_package["item_name_to_id"].items()},
+        {id: name for name, id in game_package["location_name_to_id"].items()},
+    )
+
+
+class RoomTrackerState:
+    """
+    The save data of a room, along with the aggregates over all slots that trackers read.
+
+    Instead of being rebuilt for every request, it is updated from the save journal records appended to the room's
+    save since, or if the room wrote a new snapshot, from the difference to it. An update returns a new state sharing
+    everything that did not change, so requests can keep reading the state they started with while others update it.
+    """
+    save: Dict[str, Any]
+    received_counts: Dict[Tuple[int, int, bool], Counter[int]]
+    """count of each received item by received_items key, without the starting inventory"""
+    team_hints: Dict[int, FrozenSet[Hint]]
+    """all hints of each team, by team"""
+    history: Tuple[Tuple[int, Dict[str, Any]], ...]
+    """the last deltas applied, each with the sequence it brought the save to"""
+    history_start: int
+    """sequence of the save before the first delta of history. Changes since any later sequence are known."""
+    _snapshot: bytes
+    """the snapshot part of the save this was loaded from, which journal records get appended to"""
+    _journal_end: int
+    """offset in the save after the last record included"""
+
+    def __init__(self, save: Dict[str, Any], snapshot: bytes, journal_end: int) -> None:
+        self.save = save
+        self.received_counts = {key: collections.Counter(item.item for item in items)
+                                for key, items in save.get("received_items", {}).items()}
+        self.team_hints = self._count_team_hints(save.get("hints", {}), {team for team, _ in save.get("hints", {})})
+        self.history = ()
+        self.history_start = self.sequence
+        self._snapshot = snapshot
+        self._journal_end = journal_end
+
+    @classmethod
+    def load(cls, multisave: Optional[bytes]) -> "RoomTrackerState":
+        if not multisave:
+            return cls({}, b"", 0)
+        save, offset = SaveJournal.load_snapshot(multisave, compressed=False)
+        deltas, journal_end = SaveJournal.load_records(multisave, offset)
+        snapshot_sequence = save.get("journal_sequence", 0)
+        SaveJournal.replay(save, deltas)
+        state = cls(save, multisave[:offset], journal_end)
+        state._add_history(snapshot_sequence, [(delta["sequence"], delta) for delta in deltas
+                                               if delta["sequence"] > snapshot_sequence])
+        return state
+
+    @property
+    def sequence(self) -> int:
+        """sequence number of the last save journal record included"""
+        return self.save.get("journal_sequence", 0)
+
+    def update(self, multisave: Optional[bytes]) -> "RoomTrackerState":
+        """Returns the state of the room's current multisave, which is self if nothing changed."""
+        if not multisave:
+            return self
+        if self._snapshot and multisave.startswith(self._snapshot):
+            if len(multisave) <= self._journal_end:
+                return self  # no new records, or an older version of this save
+            deltas, journal_end = SaveJournal.load_records(multisave, self._journal_end)
+            if not deltas:
+                return self  # the next record is still incomplete
+            return self._apply(deltas, self._snapshot, journal_end)
+        # the room wrote a new snapshot, which is compared to the current state instead of replacing it
+        new = RoomTrackerState.load(multisave)
+        if new.sequence < self.sequence:
+            return self  # older than what is already known
+        state = self._apply([SaveJournal.diff(self.save, new.save)], new._snapshot, new._journal_end)
+        if new.sequence == self.sequence:
+            # without a journal, the sequence doesn't change, so the changes can't be told apart
+            state.history = ()
+            state.history_start = state.sequence
+        return state
+
+    def get_changes(self, since: int) -> Optional[List[Dict[str, Any]]]:
+        """Returns the deltas changing the save of sequence since to this one, None if they are not known."""
+        if since < self.history_start or since > self.sequence:
+            return None
+        return [delta for sequence, delta in self.history if sequence > since]
+
+    def _add_history(self, start: int, changes: List[Tuple[int, Dict[str, Any]]]) -> None:
+        if not self.history:
+            self.history_start = start
+        history = self.history + tuple(changes)
+        if len(history) > TRACKER_HISTORY_LENGTH:
+            self.history_start = history[-TRACKER_HISTORY_LENGTH - 1][0]
+            history = history[-TRACKER_HISTORY_LENGTH:]
+        self.history = history
+
+    def _apply(self, deltas: List[Dict[str, Any]], snapshot: bytes, journal_end: int) -> "RoomTrackerState":
+        state = RoomTrackerState.__new__(RoomTrackerState)
+        state.save = save = dict(self.save)
+        state.received_counts = dict(self.received_counts)
+        state.team_hints = self.team_hints
+        state.history = self.history
+        state.history_start = self.history_start
+        state._snapshot = snapshot
+        state._journal_end = journal_end
+        changes: List[Tuple[int, Dict[str, Any]]] = []
+        for delta in deltas:
+            if "sequence" in delta and delta["sequence"] <= save.get("journal_sequence", 0):
+                continue  # already included in the snapshot
+            if delta.get("location_checks"):
+                save["location_checks"] = location_checks = dict(save.get("location_checks", {}))
+                for key, locations in delta["location_checks"].items():
+                    location_checks[key] = location_checks.get(key, set()) | locations
+            if delta.get("received_items"):
+                save["received_items"] = received_items = dict(save.get("received_items", {}))
+                for key, (start, items) in delta["received_items"].items():
+                    received = received_items.get(key, [])
+                    counts = state.received_counts.get(key, collections.Counter())
+                    if start != len(received):
+                        counts = collections.Counter(item.item for item in received[:start])
+                    received_items[key] = received[:start] + items
+                    state.received_counts[key] = counts + collections.Counter(item.item for item in items)
+            if delta.get("hints"):
+                save["hints"] = hints = dict(save.get("hints", {}))
+                for key, slot_hints in delta["hints"].items():
+                    hints[key] = set(slot_hints)
+                state.team_hints = {**state.team_hints,
+                                    **self._count_team_hints(hints, {team for team, _ in delta["hints"]})}
+            if delta.get("stored_data"):
+                save["stored_data"] = {**save.get("stored_data", {}), **delta["stored_data"]}
+            save.update(delta.get("others", {}))
+            if "sequence" in delta:
+                save["journal_sequence"] = delta["sequence"]
+            changes.append((state.sequence, delta))
+        state._add_history(self.sequence, changes)
+        return state
+
+    @staticmethod
+    def _count_team_hints(hints: Dict[TeamPlayer, Set[Hint]], teams: Set[int]) -> Dict[int, FrozenSet[Hint]]:
+        team_hints: Dict[int, Set[Hint]] = {team: set() for team in teams}
+        for (team, _), slot_hints in hints.items():
+            if team in team_hints:
+                team_hints[team] |= slot_hints
+        return {team: frozenset(team_hint_set) for team, team_hint_set in team_hints.items()}
+
+
+class RoomTracker:
+    """Keeps the latest RoomTrackerState of a room in this process."""
+    state: Optional[RoomTrackerState]
+
+    def __init__(self) -> None:
+        self.state = None
+        self._lock = threading.Lock()
+
+    def get_state(self, room: Room) -> RoomTrackerState:
+        """Returns the state of the room's multisave, updating the kept state from it."""
+        multisave = get_multisave(room)
+        with self._lock:
+            if self.state is None:
+                self.state = RoomTrackerState.load(multisave)
+            else:
+                self.state = self.state.update(multisave)
+            return self.state
 
 
 def _cache_results(func: Callable) -> Callable:
@@ -50,36 +280,41 @@ class TrackerData:
     """
     room: Room
     _multidata: Dict[str, Any]
+    _state: RoomTrackerState
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        seed = room.seed
+        self._multidata = _multidata_cache.get(seed.id, lambda: Context.decompress(seed.multidata))
+        self._state = _room_trackers.get(room.id, RoomTracker).get_state(room)
+        self._multisave = self._state.save
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
         self.location_name_to_id: Dict[str, Dict[str, int]] = {}
 
         # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+        self.item_id_to_name: Dict[str, Mapping[int, str]] = KeyedDefaultDict(lambda game_name: {
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
         })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+        self.location_id_to_name: Dict[str, Mapping[int, str]] = KeyedDefaultDict(lambda game_name: {
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
         for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
+            checksum = game_package["checksum"]
+            lookup = _data_package_cache.get(checksum, lambda: _load_game_data_lookup(checksum))
+            # the shared tables are chained instead of copied, unknown ids are only added to this request's own
+            self.item_id_to_name[game] = collections.ChainMap(
+                lookup.item_id_to_name, KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})"))
+            self.location_id_to_name[game] = collections.ChainMap(
+                lookup.location_id_to_name, KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})"))
 
             # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+            self.item_name_to_id[game] = lookup.item_name_to_id
+            self.location_name_to_id[game] = lookup.location_name_to_id
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -125,11 +360,8 @@ class TrackerData:
     @_cache_results
     def get_player_inventory_counts(self, team: int, player: int) -> collections.Counter:
         """Retrieves a dictionary of all items received by their id and their received count."""
-        received_items = self.get_player_received_items(team, player)
         starting_items = self.get_player_starting_inventory(team, player)
-        inventory = collections.Counter()
-        for item in received_items:
-            inventory[item.item] += 1
+        inventory = collections.Counter(self._state.received_counts.get((team, player, True), ()))
         for item in starting_items:
             inventory[item] += 1
 
@@ -165,15 +397,9 @@ class TrackerData:
         }
 
     @_cache_results
-    def get_team_hints(self) -> Dict[int, Set[Hint]]:
+    def get_team_hints(self) -> Dict[int, FrozenSet[Hint]]:
         """Retrieves a dictionary of all hints per team."""
-        hints = {}
-        for team, players in self.get_all_slots().items():
-            hints[team] = set()
-            for player in players:
-                hints[team] |= self.get_player_hints(team, player)
-
-        return hints
+        return {team: self._state.team_hints.get(team, frozenset()) for team in self.get_all_slots()}
 
     @_cache_results
     def get_team_locations_total_count(self) -> Dict[int, int]:
@@ -275,11 +501,19 @@ class TrackerData:
         """
         last_activity: Dict[TeamPlayer, datetime.timedelta] = {}
         now = datetime.datetime.utcnow()
-        for (team, player), timestamp in self._multisave.get("client_activity_timers", []):
+        for (team, player), timestamp in self.get_room_activity_timestamps().items():
             last_activity[team, player] = now - datetime.datetime.utcfromtimestamp(timestamp)
 
         return last_activity
 
+    @_cache_results
+    def get_room_activity_timestamps(self) -> Dict[TeamPlayer, float]:
+        """Retrieves a dictionary of all players and the POSIX timestamp of their last activity.
+        Does not include players who have no activity recorded.
+        """
+        return {(team, player): timestamp
+                for (team, player), timestamp in self._multisave.get("client_activity_timers", [])}
+
     @_cache_results
     def get_room_videos(self) -> Dict[TeamPlayer, Tuple[str, str]]:
         """Retrieves a dictionary of any players who have video streaming enabled and their feeds.
@@ -292,6 +526,16 @@ class TrackerData:
 
         return video_feeds
 
+    def get_save_version(self) -> int:
+        """Retrieves the version of the room's save, which changes with every save that changed anything."""
+        return self._state.sequence
+
+    def get_save_changes(self, since: int) -> Optional[List[Dict[str, Any]]]:
+        """Retrieves the changes since the save of version since, in the format of save journal records.
+        Returns None if they are not known anymore.
+        """
+        return self._state.get_changes(since)
+
     @_cache_results
     def get_spheres(self) -> List[List[int]]:
         """ each sphere is { player: { location_id, ... } } """
@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -13,7 +12,9 @@ import warnings
 from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
-from libc.stdint cimport int64_t, uint32_t
+from libc.stdint cimport INT64_MIN, int64_t, uint32_t, uint64_t
+from libc.stdlib cimport qsort
+from libc.string cimport memcpy
 from collections import defaultdict
 
 cdef extern from *:
@@ -31,27 +32,6 @@ ctypedef int64_t ap_id_t
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
 
 cdef struct LocationEntry:
     # layout is so that
@@ -69,6 +49,37 @@ cdef struct IndexEntry:
     size_t count
 
 
+cdef struct ReceiverKey:
+    # sort key of LocationStore.receiver_order, only used while building it
+    ap_player_t receiver
+    ap_id_t item
+    size_t entry
+
+
+cdef int compare_receiver_keys(const void* a, const void* b) noexcept nogil:
+    cdef const ReceiverKey* x = <const ReceiverKey*>a
+    cdef const ReceiverKey* y = <const ReceiverKey*>b
+    if x.receiver != y.receiver:
+        return -1 if x.receiver < y.receiver else 1
+    if x.item != y.item:
+        return -1 if x.item < y.item else 1
+    if x.entry != y.entry:
+        return -1 if x.entry < y.entry else 1
+    return 0
+
+
+cdef struct BufferHeader:
+    # header of LocationStore.to_buffer, followed by sender_index, entries and receiver_order as they are in memory
+    char magic[8]
+    uint32_t index_entry_size  # changes with pointer size and, byte-swapped, with byte order
+    uint32_t location_entry_size
+    uint64_t player_count
+    uint64_t entry_count
+
+
+cdef char* BUFFER_MAGIC = b"APLocSt2"
+
+
 if TYPE_CHECKING:
     State = Dict[Tuple[int, int], Set[int]]
 else:
@@ -87,11 +98,13 @@ cdef class LocationStore:
     # Using std::map might be worth investigating, but memory overhead would be ~100% compared to arrays.
 
     cdef Pool _mem
+    cdef object _buffer  # keeps the buffer alive if the arrays point into one, see from_buffer
     cdef object _len
     cdef LocationEntry* entries  # 3.2MB/100k items
     cdef size_t entry_count
     cdef IndexEntry* sender_index  # 16KB/1000 players
     cdef size_t sender_index_size
+    cdef size_t* receiver_order  # 800KB/100k items, entries sorted by receiver, item and position, for find_item
     cdef list _keys  # ~36KB/1000 players, speed up iter (28 per int + 8 per list entry)
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
@@ -106,6 +119,7 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        size += sizeof(size_t) * self.entry_count
         return size
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
@@ -172,7 +186,13 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        self._build_proxies(max_sender, count)
+        self._build_receiver_index()
+
+    cdef _build_proxies(self, size_t max_sender, size_t count):
         # build pyobject caches
+        cdef object key
+        cdef size_t i
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
         for i in range(1, max_sender + 1):
@@ -188,7 +208,163 @@ cdef class LocationStore:
 
         self.sender_index_size = max_sender + 1
         self.entry_count = count
-        self._len = sender_count
+        self._len = max_sender
+
+    cdef _build_receiver_index(self):
+        cdef ReceiverKey* keys
+        cdef size_t i
+        if not self.entry_count:
+            return
+        keys = <ReceiverKey*>self._mem.alloc(self.entry_count, sizeof(ReceiverKey))
+        for i in range(self.entry_count):
+            keys[i].receiver = self.entries[i].receiver
+            keys[i].item = self.entries[i].item
+            keys[i].entry = i
+        qsort(keys, self.entry_count, sizeof(ReceiverKey), compare_receiver_keys)
+        self.receiver_order = <size_t*>self._mem.alloc(self.entry_count, sizeof(size_t))
+        for i in range(self.entry_count):
+            self.receiver_order[i] = keys[i].entry
+        self._mem.free(keys)
+
+    cdef size_t _find_receiver(self, ap_player_t receiver, ap_id_t item) noexcept nogil:
+        # binary search for the first position in receiver_order that is not before (receiver, item)
+        cdef LocationEntry* entry
+        cdef size_t l = 0
+        cdef size_t r = self.entry_count
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            entry = self.entries + self.receiver_order[m]
+            if entry.receiver < receiver or (entry.receiver == receiver and entry.item < item):
+                l = m + 1
+            else:
+                r = m
+        return l
+
+    @classmethod
+    def from_columns(cls, size_t player_count, const uint32_t[:] senders, const int64_t[:] locations,
+                     const int64_t[:] items, const uint32_t[:] receivers, const uint32_t[:] flags) -> LocationStore:
+        """
+        Creates a store from one array per field, for players 1 to player_count.
+        Entries have to be sorted by sender, then location, as they are in the store.
+        """
+        cdef LocationStore store = cls.__new__(cls)
+        cdef size_t count = senders.shape[0]
+        cdef size_t i
+        cdef ap_player_t sender
+
+        if not player_count:
+            raise ValueError(f"Rejecting game with 0 players")
+        if player_count > MAX_PLAYER_ID:
+            raise ValueError(f"Invalid player id {player_count} for location")
+        if (<size_t>locations.shape[0] != count or <size_t>items.shape[0] != count
+                or <size_t>receivers.shape[0] != count or <size_t>flags.shape[0] != count):
+            raise ValueError("Columns differ in length")
+        if not count:
+            warnings.warn("Game has no locations")
+
+        store._mem = Pool()
+        store._keys = []
+        store._items = []
+        store._proxies = []
+        if count:
+            store.entries = <LocationEntry*>store._mem.alloc(count, sizeof(LocationEntry))
+        store.sender_index = <IndexEntry*>store._mem.alloc(player_count + 1, sizeof(IndexEntry))
+        store._raw_proxies = <PyObject**>store._mem.alloc(player_count + 1, sizeof(PyObject*))
+        for sender in range(player_count + 1):
+            store.sender_index[sender].start = count  # empty, but in range, for players without locations
+
+        for i in range(count):
+            sender = senders[i]
+            if sender < 1 or sender > player_count:
+                raise ValueError(f"Invalid player id {sender} for location")
+            if receivers[i] < 1 or receivers[i] > MAX_PLAYER_ID:
+                raise ValueError(f"Invalid player id {receivers[i]} for item")
+            if i and (sender < senders[i - 1] or (sender == senders[i - 1] and locations[i] <= locations[i - 1])):
+                raise ValueError("Locations not sorted")
+            if not store.sender_index[sender].count:
+                store.sender_index[sender].start = i
+            store.sender_index[sender].count += 1
+            store.entries[i].sender = sender
+            store.entries[i].location = locations[i]
+            store.entries[i].item = items[i]
+            store.entries[i].receiver = receivers[i]
+            store.entries[i].flags = flags[i]
+
+        store._build_proxies(player_count, count)
+        store._build_receiver_index()
+        return store
+
+    def to_buffer(self) -> bytes:
+        """Serializes the store into a flat buffer for from_buffer. The layout is native to this platform."""
+        cdef BufferHeader header
+        cdef size_t index_size = sizeof(IndexEntry) * self.sender_index_size
+        cdef size_t entries_size = sizeof(LocationEntry) * self.entry_count
+        cdef size_t order_size = sizeof(size_t) * self.entry_count
+        memcpy(header.magic, BUFFER_MAGIC, 8)
+        header.index_entry_size = sizeof(IndexEntry)
+        header.location_entry_size = sizeof(LocationEntry)
+        header.player_count = self.sender_index_size - 1
+        header.entry_count = self.entry_count
+        buffer = bytearray(sizeof(BufferHeader) + index_size + entries_size + order_size)
+        cdef unsigned char[::1] view = buffer
+        memcpy(&view[0], &header, sizeof(BufferHeader))
+        memcpy(&view[sizeof(BufferHeader)], self.sender_index, index_size)
+        if entries_size:
+            memcpy(&view[sizeof(BufferHeader) + index_size], self.entries, entries_size)
+            memcpy(&view[sizeof(BufferHeader) + index_size + entries_size], self.receiver_order, order_size)
+        return bytes(buffer)
+
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> LocationStore:
+        """
+        Creates a store that reads its entries and index directly from a buffer created by to_buffer,
+        without copying or sorting them. The buffer is kept alive by the store and must not be modified.
+        Passing a read-only mmap lets processes share the pages of a store.
+        """
+        cdef const unsigned char[::1] view = buffer
+        cdef LocationStore store = cls.__new__(cls)
+        cdef BufferHeader header
+        cdef size_t index_size
+        cdef size_t entries_size
+        cdef size_t i
+
+        if <size_t>view.shape[0] < sizeof(BufferHeader):
+            raise ValueError("Buffer too small for a LocationStore")
+        memcpy(&header, &view[0], sizeof(BufferHeader))
+        if header.magic[:8] != BUFFER_MAGIC[:8]:
+            raise ValueError("Buffer does not contain a LocationStore")
+        if header.index_entry_size != sizeof(IndexEntry) or header.location_entry_size != sizeof(LocationEntry):
+            raise ValueError("Buffer was created on an incompatible platform")
+        if not header.player_count:
+            raise ValueError(f"Rejecting game with 0 players")
+        if header.player_count > MAX_PLAYER_ID:
+            raise ValueError(f"Invalid player id {header.player_count} for location")
+        index_size = sizeof(IndexEntry) * (header.player_count + 1)
+        entries_size = sizeof(LocationEntry) * header.entry_count
+        if <size_t>view.shape[0] != (sizeof(BufferHeader) + index_size + entries_size
+                                     + sizeof(size_t) * header.entry_count):
+            raise ValueError("Buffer size does not match its LocationStore")
+
+        store._mem = Pool()
+        store._buffer = view
+        store._keys = []
+        store._items = []
+        store._proxies = []
+        store.sender_index = <IndexEntry*>&view[sizeof(BufferHeader)]
+        if header.entry_count:
+            store.entries = <LocationEntry*>&view[sizeof(BufferHeader) + index_size]
+            store.receiver_order = <size_t*>&view[sizeof(BufferHeader) + index_size + entries_size]
+        for i in range(header.player_count + 1):
+            if store.sender_index[i].count and (store.sender_index[i].start >= header.entry_count or
+                    store.sender_index[i].start + store.sender_index[i].count > header.entry_count):
+                raise ValueError("Buffer contains an invalid index")
+        for i in range(header.entry_count):
+            if store.receiver_order[i] >= header.entry_count:
+                raise ValueError("Buffer contains an invalid index")
+        store._raw_proxies = <PyObject**>store._mem.alloc(header.player_count + 1, sizeof(PyObject*))
+        store._build_proxies(header.player_count, header.entry_count)
+        return store
 
     # fake dict access
     def __len__(self) -> int:
@@ -218,44 +394,49 @@ cdef class LocationStore:
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
         cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef LocationEntry* entry
+        cdef size_t i
+        cdef list matches
+        if len(slots) == 1:
+            # specialized implementation for single slot, matches are already in order of entries
+            receiver = next(iter(slots))
+            i = self._find_receiver(receiver, item)
+            while i < self.entry_count:
+                entry = self.entries + self.receiver_order[i]
+                if entry.receiver != receiver or entry.item != item:
+                    break
+                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
+                i += 1
+        elif slots:
+            # generic implementation, collects the matches of each slot and sorts them into order of entries
+            matches = []
+            for receiver in slots:
+                i = self._find_receiver(receiver, item)
+                while i < self.entry_count:
+                    entry = self.entries + self.receiver_order[i]
+                    if entry.receiver != receiver or entry.item != item:
+                        break
+                    matches.append(self.receiver_order[i])
+                    i += 1
+            matches.sort()
+            for i in matches:
+                entry = self.entries + i
+                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
         cdef ap_player_t receiver = slot
+        cdef LocationEntry* entry
+        cdef size_t i = self._find_receiver(receiver, INT64_MIN)
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        while i < self.entry_count:
+            entry = self.entries + self.receiver_order[i]
+            if entry.receiver != receiver:
+                break
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
+            i += 1
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -364,6 +545,9 @@ cdef class PlayerLocationProxy:
             return entry.item, entry.receiver, entry.flags
         raise KeyError(f"No location {key} for player {self._player}")
 
+    def __contains__(self, key: int) -> bool:
+        return self._get(key) != NULL
+
     def get(self, key: int, default: T) -> Union[Tuple[int, int, int], T]:
         cdef LocationEntry* entry = self._get(key)
         if entry:
@@ -582,6 +582,13 @@ class ServerOptions(Group):
     class AutoShutdown(int):
         """Automatically shut down the server after this many seconds without new location checks, 0 to keep running"""
 
+    class SaveJournal(Bool):
+        """
+        Append only what changed to the save file, instead of rewriting all of it on every save.
+        A full save is still written once in a while. Reduces the time spent saving in big games.
+        Older servers can only load the save written when the server shuts down.
+        """
+
     class Compatibility(IntEnum):
         """
         Compatibility handling
@@ -604,6 +611,7 @@ class ServerOptions(Group):
     multidata: str | None = None
     savefile: str | None = None
     disable_save: bool = False
+    save_journal: SaveJournal | bool = False
     loglevel: str = "info"
     logtime: bool = False
     server_password: ServerPassword | None = None
@@ -675,6 +683,28 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class StageThreads(int):
+        """
+        Number of threads to run the per-player generation steps in, for worlds declaring them slot-isolated.
+        0 -> Run every world's generation steps one after another.
+        """
+
+    class OutputProcesses(int):
+        """
+        Number of processes to generate output files in, for worlds declaring their output process-safe.
+        The processes are forked after fill, which is only supported on Linux. Other systems always use threads.
+        0 -> Generate every world's output in threads.
+        """
+
+    class MultidataFormat(IntEnum):
+        """
+        Format of the generated .archipelago file.
+        3 -> zlib compressed pickle, which older servers and WebHosts can host as well.
+        4 -> sectioned, loads faster and only decodes what is used. Older servers reject it as incompatible multidata.
+        """
+        LEGACY = 3
+        SECTIONED = 4
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -684,6 +714,9 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    stage_threads: StageThreads = StageThreads(0)
+    output_processes: OutputProcesses = OutputProcesses(0)
+    multidata_format: MultidataFormat = MultidataFormat(3)
     loglevel: str = "info"
     logtime: bool = False
 
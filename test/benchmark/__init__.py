@@ -5,3 +5,13 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import state_copy
+    state_copy.run_state_copy_benchmark()
+    import save_journal
+    save_journal.run_save_journal_benchmark()
+    import location_store
+    location_store.run_location_store_benchmark()
+    import net_codec
+    net_codec.run_net_codec_benchmark()
+    import playthrough
+    playthrough.run_playthrough_benchmark()
@@ -0,0 +1,70 @@
+def run_location_store_benchmark():
+    import logging
+    import random
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from NetUtils import LocationStore, _LocationStore
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        players: int = 200
+        locations_per_player: int = 500
+        items: int = 300
+        lookups: int = 1_000
+
+        def create_locations(self) -> typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]:
+            rand = random.Random(0)
+            return {
+                player: {location: (rand.randrange(self.items), rand.randint(1, self.players), 0)
+                         for location in range(1, self.locations_per_player + 1)}
+                for player in range(1, self.players + 1)
+            }
+
+        def hint_test(self, store: typing.Union[LocationStore, _LocationStore], name: str) -> float:
+            """Looks up items like !hint does for a single slot and for a slot in an item link group."""
+            rand = random.Random(1)
+            with TimeIt(f"{self.lookups} {name} find_item calls", logger) as t:
+                for _ in range(self.lookups):
+                    player = rand.randint(1, self.players)
+                    item = rand.randrange(self.items)
+                    for _ in store.find_item({player}, item):
+                        pass
+                    for _ in store.find_item({player, player % self.players + 1}, item):
+                        pass
+            return t.dif
+
+        def collect_test(self, store: typing.Union[LocationStore, _LocationStore], name: str) -> float:
+            with TimeIt(f"{self.players} {name} get_for_player calls", logger) as t:
+                for player in range(1, self.players + 1):
+                    store.get_for_player(player)
+            return t.dif
+
+        def main(self):
+            locations = self.create_locations()
+            logger.info(f"{self.players * self.locations_per_player} locations")
+            if LocationStore is _LocationStore:
+                logger.warning("_speedups not available, comparing the pure python store to itself")
+            with TimeIt("building the pure python store", logger):
+                python_store = _LocationStore(locations)
+            with TimeIt("building the indexed store", logger):
+                store = LocationStore(locations)
+            python_time = self.hint_test(python_store, "pure python")
+            indexed_time = self.hint_test(store, "indexed")
+            logger.info(f"indexed find_item is {python_time / indexed_time:.1f}x faster")
+            python_time = self.collect_test(python_store, "pure python")
+            indexed_time = self.collect_test(store, "indexed")
+            logger.info(f"indexed get_for_player is {python_time / indexed_time:.1f}x faster")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_location_store_benchmark()
@@ -0,0 +1,72 @@
+def run_net_codec_benchmark():
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    import NetUtils
+    from Utils import init_logging
+    from NetUtils import HintStatus, NetworkItem
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        iterations: int = 2_000
+        received_items: int = 500
+
+        def create_messages(self) -> typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]:
+            items = [NetworkItem(item, 10_000 + item, item % 50 + 1, item % 4) for item in range(self.received_items)]
+            print_json = [{
+                "cmd": "PrintJSON", "type": "ItemSend", "receiving": 2, "item": item,
+                "data": [
+                    {"type": "player_id", "text": "1"},
+                    {"text": " sent "},
+                    {"type": "item_id", "text": str(item.item), "player": 2, "flags": item.flags},
+                    {"text": " to "},
+                    {"type": "player_id", "text": "2"},
+                    {"text": " ("},
+                    {"type": "location_id", "text": str(item.location), "player": 1},
+                    {"text": ")"},
+                ]} for item in items[:20]]
+            print_json.append({"cmd": "PrintJSON", "type": "Hint", "receiving": 2, "item": items[0], "found": False,
+                               "hint_status": HintStatus.HINT_PRIORITY, "data": [{"text": "hint"}]})
+            return {
+                "ReceivedItems": [{"cmd": "ReceivedItems", "index": 0, "items": items}],
+                "PrintJSON": print_json,
+                "LocationChecks": [{"cmd": "LocationChecks", "locations": list(range(10_000, 10_500))}],
+            }
+
+        def codec_test(self, name: str, messages: typing.List[typing.Dict[str, typing.Any]],
+                       encode: typing.Callable[[typing.Any], str],
+                       decode: typing.Callable[[str], typing.Any]) -> typing.Tuple[float, float]:
+            data = encode(messages)
+            with TimeIt(f"{self.iterations} {name} encodes", None) as encode_time:
+                for _ in range(self.iterations):
+                    encode(messages)
+            with TimeIt(f"{self.iterations} {name} decodes", None) as decode_time:
+                for _ in range(self.iterations):
+                    decode(data)
+            size = len(data.encode("utf-8")) * self.iterations / 1024 / 1024
+            logger.info(f"{name}: encode {size / encode_time.dif:.1f} MiB/s, decode {size / decode_time.dif:.1f} MiB/s")
+            return encode_time.dif, decode_time.dif
+
+        def main(self):
+            if not NetUtils.orjson:
+                logger.warning("orjson is not installed, comparing the json module to itself")
+            for cmd, messages in self.create_messages().items():
+                json_encode, json_decode = self.codec_test(f"json {cmd}", messages,
+                                                           NetUtils._json_encode, NetUtils._json_decode)
+                fast_encode, fast_decode = self.codec_test(f"fast {cmd}", messages,
+                                                           NetUtils.encode, NetUtils.decode)
+                logger.info(f"{cmd}: fast encode is {json_encode / fast_encode:.1f}x faster, "
+                            f"fast decode is {json_decode / fast_decode:.1f}x faster")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_net_codec_benchmark()
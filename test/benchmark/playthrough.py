@@ -0,0 +1,75 @@
+def run_playthrough_benchmark():
+    import argparse
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import CollectionState, MultiWorld
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import distribute_items_restrictive
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early",
+            "create_regions",
+            "create_items",
+            "set_rules",
+            "connect_entrances",
+            "generate_basic",
+            "pre_fill",
+        )
+        games: typing.Tuple[str, ...] = (
+            "A Link to the Past",
+            "Hollow Knight",
+            "Timespinner",
+            "Pokemon Emerald",
+            "Stardew Valley",
+        )
+        players: int = 50
+
+        def create_multiworld(self) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            for player in multiworld.player_ids:
+                multiworld.game[player] = self.games[player % len(self.games)]
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            args = argparse.Namespace()
+            for player in multiworld.player_ids:
+                world_type = AutoWorld.AutoWorldRegister.world_types[multiworld.game[player]]
+                for name, option in world_type.options_dataclass.type_hints.items():
+                    updated_options = getattr(args, name, {})
+                    updated_options[player] = option.from_any(option.default)
+                    setattr(args, name, updated_options)
+            multiworld.set_options(args)
+            multiworld.state = CollectionState(multiworld)
+            for step in self.gen_steps:
+                with TimeIt(f"{self.players} players step {step}", logger):
+                    call_all(multiworld, step)
+            with TimeIt(f"{self.players} players fill", logger):
+                distribute_items_restrictive(multiworld)
+            call_all(multiworld, "post_fill")
+            return multiworld
+
+        def main(self):
+            multiworld = self.create_multiworld()
+            with TimeIt(f"{self.players} players playthrough", logger):
+                multiworld.spoiler.create_playthrough(create_paths=False)
+            progression = sum(1 for location in multiworld.get_filled_locations() if location.item.advancement)
+            required = sum(len(sphere) for name, sphere in multiworld.spoiler.playthrough.items() if name != "0")
+            logger.info(f"{required} of {progression} progression locations required, "
+                        f"in {len(multiworld.spoiler.playthrough) - 1} spheres")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_playthrough_benchmark()
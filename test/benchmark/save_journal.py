@@ -0,0 +1,83 @@
+def run_save_journal_benchmark():
+    import logging
+    import os
+    import tempfile
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from MultiServer import Context, SaveJournal
+    from NetUtils import Hint, NetworkItem
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkContext(Context):
+        def _load_game_data(self) -> None:
+            pass  # saving doesn't use game data
+
+    class BenchmarkRunner:
+        players: int = 200
+        locations_per_player: int = 500
+        stored_data_keys: int = 2_000
+        saves: int = 50
+        checks_per_save: int = 10
+
+        def create_context(self, save_filename: str, journal: bool) -> Context:
+            """Creates a context late into a big game, with most locations checked."""
+            ctx = BenchmarkContext("", 0, "", "", 0, 0, False)
+            ctx.connect_names = {f"Player{player}": (0, player) for player in range(1, self.players + 1)}
+            ctx.save_filename = save_filename
+            ctx.saving = True
+            if journal:
+                ctx.save_journal = SaveJournal(ctx)
+            for player in range(1, self.players + 1):
+                checked = range(1, self.locations_per_player * 9 // 10)
+                ctx.location_checks[0, player] = set(checked)
+                ctx.received_items[0, player, True] = [NetworkItem(location, location, player % self.players + 1, 0)
+                                                       for location in checked]
+                ctx.hints[0, player] = {Hint(player, player % self.players + 1, location, location, False)
+                                        for location in range(self.locations_per_player - 10,
+                                                              self.locations_per_player)}
+            for key in range(self.stored_data_keys):
+                ctx.stored_data[f"key{key}"] = {"value": key, "list": list(range(10))}
+            return ctx
+
+        def check_locations(self, ctx: Context, save: int) -> None:
+            for check in range(self.checks_per_save):
+                player = (save * self.checks_per_save + check) % self.players + 1
+                location = self.locations_per_player * 9 // 10 + save
+                ctx.location_checks[0, player].add(location)
+                ctx.received_items[0, player, True].append(NetworkItem(location, location, player, 0))
+                if ctx.save_journal:  # noted like register_location_checks does
+                    ctx.save_journal.new_checks.setdefault((0, player), set()).add(location)
+                    ctx.save_journal.changed_items.add((0, player))
+            ctx.stored_data[f"key{save}"] = {"value": -save}
+
+        def save_test(self, journal: bool, name: str) -> float:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                ctx = self.create_context(os.path.join(temp_dir, "benchmark.apsave"), journal)
+                ctx._save()  # initial snapshot
+                total = 0.0
+                for save in range(self.saves):
+                    self.check_locations(ctx, save)
+                    with TimeIt(f"{name} save", None) as t:
+                        ctx._save()
+                    total += t.dif
+                logger.info(f"{total / self.saves * 1000:.2f} ms per {name} save, "
+                            f"{os.path.getsize(ctx.save_filename) / 1024:.0f} KiB after {self.saves} saves")
+            return total
+
+        def main(self):
+            full = self.save_test(False, "full")
+            journaled = self.save_test(True, "journaled")
+            logger.info(f"journaled saves are {full / journaled:.1f}x faster")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_save_journal_benchmark()
@@ -0,0 +1,107 @@
+def run_state_copy_benchmark():
+    import argparse
+    import gc
+    import logging
+    import tracemalloc
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import CollectionState, MultiWorld
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early",
+            "create_regions",
+            "create_items",
+            "set_rules",
+            "connect_entrances",
+            "generate_basic",
+        )
+        games: typing.Tuple[str, ...] = (
+            "A Link to the Past",
+            "Hollow Knight",
+            "Timespinner",
+            "Pokemon Emerald",
+            "Stardew Valley",
+        )
+        players: int = 100
+        copy_iterations: int = 1_000
+        held_copies: int = 100
+
+        def create_multiworld(self) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            for player in multiworld.player_ids:
+                multiworld.game[player] = self.games[player % len(self.games)]
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            args = argparse.Namespace()
+            for player in multiworld.player_ids:
+                world_type = AutoWorld.AutoWorldRegister.world_types[multiworld.game[player]]
+                for name, option in world_type.options_dataclass.type_hints.items():
+                    updated_options = getattr(args, name, {})
+                    updated_options[player] = option.from_any(option.default)
+                    setattr(args, name, updated_options)
+            multiworld.set_options(args)
+            multiworld.state = CollectionState(multiworld)
+            for step in self.gen_steps:
+                with TimeIt(f"{self.players} players step {step}", logger):
+                    call_all(multiworld, step)
+            return multiworld
+
+        def copy_test(self, state: CollectionState, copy_on_write: bool, name: str) -> float:
+            with TimeIt(f"{self.copy_iterations} {name} copies", logger) as t:
+                for _ in range(self.copy_iterations):
+                    state.copy(copy_on_write)
+            return t.dif
+
+        def touched_copy_test(self, state: CollectionState, copy_on_write: bool, name: str) -> float:
+            """Copy, then collect one item, as sweep_from_pool and balancing do for a few players at a time."""
+            item = next(item for item in state.multiworld.itempool if item.advancement)
+            with TimeIt(f"{self.copy_iterations} {name} copies collecting one item", logger) as t:
+                for _ in range(self.copy_iterations):
+                    state.copy(copy_on_write).collect(item, True)
+            return t.dif
+
+        def memory_test(self, state: CollectionState, copy_on_write: bool, name: str) -> int:
+            gc.collect()
+            tracemalloc.start()
+            copies = [state.copy(copy_on_write) for _ in range(self.held_copies)]
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del copies
+            logger.info(f"{size / self.held_copies / 1024:.1f} KiB per held {name} copy")
+            return size
+
+        def main(self):
+            multiworld = self.create_multiworld()
+            state = multiworld.get_all_state(False)
+            for player in multiworld.get_all_ids():
+                state.update_reachable_regions(player)
+
+            eager = self.copy_test(state, False, "eager")
+            cow = self.copy_test(state, True, "copy-on-write")
+            logger.info(f"copy-on-write copies are {eager / cow:.1f}x faster")
+
+            eager = self.touched_copy_test(state, False, "eager")
+            cow = self.touched_copy_test(state, True, "copy-on-write")
+            logger.info(f"copy-on-write copies touching one player are {eager / cow:.1f}x faster")
+
+            eager = self.memory_test(state, False, "eager")
+            cow = self.memory_test(state, True, "copy-on-write")
+            logger.info(f"copy-on-write copies use {eager / cow:.1f}x less memory")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_state_copy_benchmark()
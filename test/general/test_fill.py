@@ -463,6 +463,23 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_fills_first_fillable_location(self):
+        """Test that items go into the first location that can take them, and the rest keep their order"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 6, 1, 2)
+        excluded, rejecting, filler_only, open_location, *unfilled = player1.locations
+        excluded.progress_type = LocationProgressType.EXCLUDED
+        add_item_rule(rejecting, lambda item: item.name != player1.prog_items[0].name)
+        add_item_rule(filler_only, lambda item: not item.advancement)
+
+        fill_restrictive(multiworld, multiworld.state, player1.locations,
+                         [*player1.basic_items, *player1.prog_items], one_item_per_player=False)
+
+        self.assertEqual(open_location.item, player1.prog_items[0])
+        self.assertEqual(excluded.item, player1.basic_items[1])
+        self.assertEqual(rejecting.item, player1.basic_items[0])
+        self.assertEqual(player1.locations, [filler_only, *unfilled])
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+from BaseClasses import MultiWorld, Spoiler
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+class TestPlaythrough(unittest.TestCase):
+    games = ("Timespinner", "A Short Hike", "Timespinner")
+
+    def setUp(self) -> None:
+        self.multiworld = setup_multiworld([AutoWorldRegister.world_types[game] for game in self.games], seed=0)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_matches_can_beat_game(self) -> None:
+        """Culling by collecting in sphere order should keep the same locations as re-sweeping with can_beat_game."""
+        self.multiworld.spoiler.create_playthrough(create_paths=True)
+        playthrough, paths = self.multiworld.spoiler.playthrough, self.multiworld.spoiler.paths
+
+        def can_beat_game(spoiler: Spoiler, state, spheres, required_locations) -> bool:
+            return MultiWorld.can_beat_game(spoiler.multiworld, state, required_locations)
+
+        with mock.patch.object(Spoiler, "_can_beat_game_in_order", can_beat_game):
+            self.multiworld.spoiler.create_playthrough(create_paths=True)
+        self.assertEqual(playthrough, self.multiworld.spoiler.playthrough)
+        self.assertEqual(paths, self.multiworld.spoiler.paths)
+        self.assertGreater(len(playthrough), 1)
+
+    def test_culled_locations_are_not_required(self) -> None:
+        """The game should still be beatable from the final playthrough's locations alone."""
+        self.multiworld.spoiler.create_playthrough(create_paths=False)
+        required = {location_name for sphere in list(self.multiworld.spoiler.playthrough.values())[1:]
+                    for location_name in sphere}
+        locations = [location for location in self.multiworld.get_filled_locations()
+                     if location.item.advancement and str(location) in required]
+        self.assertEqual(len(locations), len(required))
+        self.assertTrue(self.multiworld.can_beat_game(locations=locations))
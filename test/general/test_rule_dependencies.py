@@ -0,0 +1,147 @@
+import unittest
+
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, Location, Region
+from . import generate_test_multiworld
+
+
+class TestRuleDependencies(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.multiworld.worlds[1].track_rule_dependencies = True
+        self.menu = self.multiworld.get_region("Menu", 1)
+        self.evaluations: dict[str, int] = {}
+
+    def connect(self, name: str, rule) -> Region:
+        region = Region(name, 1, self.multiworld)
+        self.multiworld.regions.append(region)
+
+        def counting_rule(state: CollectionState) -> bool:
+            self.evaluations[name] = self.evaluations.get(name, 0) + 1
+            return rule(state)
+
+        entrance = Entrance(1, f"Menu -> {name}", self.menu)
+        self.menu.exits.append(entrance)
+        entrance.connect(region)
+        entrance.access_rule = counting_rule
+        return region
+
+    def place_event(self, name: str, region: Region, rule) -> Location:
+        location = Location(1, name, None, region)
+        region.locations.append(location)
+
+        def counting_rule(state: CollectionState) -> bool:
+            self.evaluations[name] = self.evaluations.get(name, 0) + 1
+            return rule(state)
+
+        location.access_rule = counting_rule
+        location.place_locked_item(self.create_item(f"{name} Event"))
+        return location
+
+    @staticmethod
+    def create_item(name: str, player: int = 1) -> Item:
+        return Item(name, ItemClassification.progression, None, player)
+
+    def test_only_dependent_entrances_are_reevaluated(self) -> None:
+        """Collecting an item should only re-evaluate the blocked entrances whose rules read that item."""
+        key_region = self.connect("Key Room", lambda state: state.has("Key", 1))
+        boots_region = self.connect("Boots Room", lambda state: state.has_all(("Boots", "Gloves"), 1))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(key_region.can_reach(state))
+        self.assertFalse(boots_region.can_reach(state))
+        self.assertEqual(self.evaluations, {"Key Room": 1, "Boots Room": 1})
+
+        state.collect(self.create_item("Key"), True)
+        self.assertTrue(key_region.can_reach(state))
+        self.assertFalse(boots_region.can_reach(state))
+        self.assertEqual(self.evaluations, {"Key Room": 2, "Boots Room": 1})
+
+        # Gloves is not read while Boots is missing, so collecting it doesn't trigger a re-evaluation
+        state.collect(self.create_item("Gloves"), True)
+        self.assertFalse(boots_region.can_reach(state))
+        self.assertEqual(self.evaluations["Boots Room"], 1)
+
+        state.collect(self.create_item("Boots"), True)
+        self.assertTrue(boots_region.can_reach(state))
+        self.assertEqual(self.evaluations["Boots Room"], 2)
+
+    def test_untracked_rules_are_always_reevaluated(self) -> None:
+        """Rules that don't read any item counts can't be tracked and have to be re-evaluated on every update."""
+        unlocked = []
+        region = self.connect("Puzzle Room", lambda state: bool(unlocked))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(region.can_reach(state))
+
+        unlocked.append(True)
+        state.collect(self.create_item("Unrelated"), True)
+        self.assertTrue(region.can_reach(state))
+        self.assertEqual(self.evaluations["Puzzle Room"], 2)
+
+    def test_copies_are_independent(self) -> None:
+        """Recorded dependencies should be copied with the state and invalidated separately."""
+        region = self.connect("Key Room", lambda state: state.has("Key", 1, 2))
+        state = CollectionState(self.multiworld)
+        state.collect(self.create_item("Key"), True)
+        self.assertFalse(region.can_reach(state))
+
+        copied_state = state.copy()
+        copied_state.collect(self.create_item("Key"), True)
+        self.assertTrue(region.can_reach(copied_state))
+        self.assertFalse(region.can_reach(state))
+
+        state.remove(self.create_item("Key"))
+        state.collect(self.create_item("Key"), True)
+        state.collect(self.create_item("Key"), True)
+        self.assertTrue(region.can_reach(state))
+
+    def test_sweep_only_reevaluates_dependent_locations(self) -> None:
+        """Sweeping should only re-test the unreachable advancement locations whose rules read a changed item."""
+        self.place_event("Key Event", self.menu, lambda state: state.has("Key", 1))
+        self.place_event("Boots Event", self.menu, lambda state: state.has("Boots", 1))
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertEqual(self.evaluations, {"Key Event": 1, "Boots Event": 1})
+
+        state.collect(self.create_item("Key"))
+        self.assertTrue(state.has("Key Event Event", 1))
+        self.assertEqual(self.evaluations, {"Key Event": 2, "Boots Event": 1})
+
+        # the recording is carried over to copies
+        copied_state = state.copy(copy_on_write=True)
+        copied_state.sweep_for_advancements()
+        self.assertEqual(self.evaluations["Boots Event"], 1)
+        copied_state.collect(self.create_item("Boots"))
+        self.assertTrue(copied_state.has("Boots Event Event", 1))
+        self.assertFalse(state.has("Boots Event Event", 1))
+
+    def test_sweep_reevaluates_region_rules(self) -> None:
+        """Location rules checking region reachability can't be tracked by item names."""
+        key_region = self.connect("Key Room", lambda state: state.has("Key", 1))
+        self.place_event("Door Event", self.menu, lambda state: key_region.can_reach(state))
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        state.sweep_for_advancements()
+        self.assertEqual(self.evaluations["Door Event"], 2)
+
+        state.collect(self.create_item("Key"))
+        self.assertTrue(state.has("Door Event Event", 1))
+
+    def test_sweep_reevaluates_other_players_rules(self) -> None:
+        """Location rules reading another player's items can't be tracked by this player's item names."""
+        self.place_event("Shared Event", self.menu, lambda state: state.has("Sword", 1) or state.has("Boots", 2))
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertFalse(state.has("Shared Event Event", 1))
+
+        state.collect(self.create_item("Boots", 2))
+        self.assertTrue(state.has("Shared Event Event", 1))
+
+    def test_sweep_skips_unreachable_regions(self) -> None:
+        """Locations in unreachable regions shouldn't have their rules tested."""
+        key_region = self.connect("Key Room", lambda state: state.has("Key", 1))
+        self.place_event("Chest Event", key_region, lambda state: True)
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertNotIn("Chest Event", self.evaluations)
+
+        state.collect(self.create_item("Key"))
+        self.assertTrue(state.has("Chest Event Event", 1))
@@ -0,0 +1,72 @@
+import unittest
+
+from BaseClasses import CollectionState, Location
+from Fill import distribute_items_restrictive, swap_location_item
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+class TestSphereAnalysis(unittest.TestCase):
+    games = ("Timespinner", "A Short Hike", "Timespinner")
+
+    def setUp(self) -> None:
+        self.multiworld = setup_multiworld([AutoWorldRegister.world_types[game] for game in self.games], seed=0)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_cached_per_placement(self) -> None:
+        """The analysis should be reused until the placement changes."""
+        analysis = self.multiworld.get_sphere_analysis()
+        self.assertIs(analysis, self.multiworld.get_sphere_analysis())
+        self.multiworld.can_beat_game()
+        list(self.multiworld.get_sendable_spheres())
+        self.assertIs(analysis, self.multiworld.get_sphere_analysis())
+
+        first, second = self.multiworld.get_filled_locations()[:2]
+        swap_location_item(first, second)
+        self.assertIsNot(analysis, self.multiworld.get_sphere_analysis())
+        analysis = self.multiworld.get_sphere_analysis()
+        self.multiworld.push_precollected(self.multiworld.create_item("Timespinner Wheel", 1))
+        self.assertIsNot(analysis, self.multiworld.get_sphere_analysis())
+
+    def test_matches_sweeps(self) -> None:
+        """The cached results should match sweeping from a new state."""
+        self.assertTrue(self.multiworld.can_beat_game())
+        self.assertEqual(self.multiworld.can_beat_game(CollectionState(self.multiworld)),
+                         self.multiworld.can_beat_game())
+        self.assertEqual(self.multiworld.fulfills_accessibility(CollectionState(self.multiworld)),
+                         self.multiworld.fulfills_accessibility())
+
+        sendable = {location for location in self.multiworld.get_filled_locations()
+                    if type(location.item.code) is int and type(location.address) is int}
+        spheres = list(self.multiworld.get_sendable_spheres())
+        self.assertTrue(all(spheres))
+        self.assertEqual(sendable, set().union(*spheres))
+        self.assertEqual(len(sendable), sum(map(len, spheres)))
+
+        # each step is reachable from the state before it, and collects locations of its own
+        analysis = self.multiworld.get_sphere_analysis()
+        for step, state in zip(analysis.steps, analysis.get_states()):
+            self.assertTrue(all(location.can_reach(state.copy()) for location in step))
+        self.assertEqual(len(set().union(*analysis.steps)), sum(map(len, analysis.steps)))
+
+    def test_early_exit_without_analysis(self) -> None:
+        """Without an analysis of the current placement, as during fill, can_beat_game should not build one."""
+        self.assertTrue(self.multiworld.can_beat_game())
+        self.assertIsNone(self.multiworld._sphere_analysis)
+        analysis = self.multiworld.get_sphere_analysis()
+        first, second = self.multiworld.get_filled_locations()[:2]
+        swap_location_item(first, second)
+        self.assertTrue(self.multiworld.can_beat_game())
+        self.assertIs(analysis, self.multiworld._sphere_analysis)
+
+    def test_unbeatable(self) -> None:
+        """Taking all progression out of the placement should be noticed by all readers of the analysis."""
+        for location in self.multiworld.get_filled_locations():
+            if location.item.advancement and not location.locked:
+                location.item = None
+                Location.item_changes += 1
+        self.assertEqual(self.multiworld.can_beat_game(CollectionState(self.multiworld)),
+                         self.multiworld.can_beat_game())
+        self.assertFalse(self.multiworld.can_beat_game())
+        self.assertFalse(self.multiworld.fulfills_accessibility())
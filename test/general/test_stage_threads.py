@@ -0,0 +1,55 @@
+import concurrent.futures
+import time
+import unittest
+
+from BaseClasses import Item, ItemClassification, MultiWorld
+from worlds.AutoWorld import call_all
+from . import generate_test_multiworld
+
+
+class TestStageThreads(unittest.TestCase):
+    players = 4
+
+    def setUp(self) -> None:
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.players)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def create_multiworld(self, isolated_players) -> MultiWorld:
+        multiworld = generate_test_multiworld(self.players)
+        for player in multiworld.player_ids:
+            world = multiworld.worlds[player]
+            if player in isolated_players:
+                world.slot_isolated_stages = frozenset({"create_items"})
+
+            def create_items(world=world) -> None:
+                for i in range(5):
+                    # later players finish first, so items get appended out of order
+                    time.sleep(0.001 * (self.players - world.player))
+                    name = f"Item {world.random.randrange(1000)}"
+                    world.multiworld.itempool.append(Item(name, ItemClassification.filler, None, world.player))
+
+            world.create_items = create_items
+        return multiworld
+
+    def test_concurrent_items_match_serial(self) -> None:
+        """Calling slot-isolated steps concurrently should result in the same itempool as calling them serially."""
+        serial_multiworld = self.create_multiworld(())
+        call_all(serial_multiworld, "create_items")
+        for isolated_players in ((1, 2, 3, 4), (1, 2, 4), (2,)):
+            with self.subTest(isolated_players=isolated_players):
+                multiworld = self.create_multiworld(isolated_players)
+                call_all(multiworld, "create_items", executor=self.executor)
+                self.assertEqual([(item.name, item.player) for item in multiworld.itempool],
+                                 [(item.name, item.player) for item in serial_multiworld.itempool])
+
+    def test_shared_random_is_blocked(self) -> None:
+        """Slot-isolated steps can't use the multiworld's random, since the result would depend on thread timing."""
+        multiworld = self.create_multiworld((1, 2, 3, 4))
+        for world in multiworld.worlds.values():
+            world.create_items = lambda world=world: world.multiworld.random.random()
+        with self.assertRaises(RuntimeError):
+            call_all(multiworld, "create_items", executor=self.executor)
+        # and is available again afterwards
+        multiworld.random.random()
@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_locations, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,56 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        for player in self.multiworld.player_ids:
+            menu = self.multiworld.get_region("Menu", player)
+            region = Region("Locked", player, self.multiworld)
+            self.multiworld.regions.append(region)
+            menu.connect(region, rule=lambda state, player=player: state.has("Key", player))
+            generate_locations(1, player, region)
+
+    def test_copies_are_independent(self) -> None:
+        """Changes to either a state or its copy-on-write copy should not be visible in the other."""
+        state = CollectionState(self.multiworld)
+        locked = self.multiworld.get_region("Locked", 1)
+        self.assertFalse(locked.can_reach(state))
+
+        copied_state = state.copy(copy_on_write=True)
+        key = Item("Key", ItemClassification.progression, None, 1)
+        copied_state.collect(key, True, self.multiworld.get_location("player1_location0", 1))
+        self.assertTrue(locked.can_reach(copied_state))
+        self.assertFalse(locked.can_reach(state))
+        self.assertEqual(state.count("Key", 1), 0)
+        self.assertFalse(state.locations_checked)
+        self.assertNotIn(locked, state.path)
+
+        state.collect(Item("Key", ItemClassification.progression, None, 2), True)
+        self.assertTrue(self.multiworld.get_region("Locked", 2).can_reach(state))
+        self.assertFalse(self.multiworld.get_region("Locked", 2).can_reach(copied_state))
+
+    def test_entrance_paths_are_independent(self) -> None:
+        """Paths added by checking an entrance on a copy-on-write copy should not be visible in its source."""
+        state = CollectionState(self.multiworld)
+        state.update_reachable_regions(1)
+        source_path = dict(state.path)
+        entrance = Entrance(1, "Side Door", self.multiworld.get_region("Menu", 1))
+
+        copied_state = state.copy(copy_on_write=True)
+        self.assertTrue(entrance.can_reach(copied_state))
+        self.assertIn(entrance, copied_state.path)
+        self.assertEqual(source_path, dict(state.path))
+
+    def test_untouched_players_are_shared(self) -> None:
+        """A copy-on-write copy should only copy the players it modifies."""
+        state = CollectionState(self.multiworld)
+        for player in self.multiworld.player_ids:
+            state.update_reachable_regions(player)
+        copied_state = state.copy(copy_on_write=True)
+        copied_state.collect(Item("Key", ItemClassification.progression, None, 1), True)
+        self.assertIsNot(copied_state.prog_items[1], state.prog_items[1])
+        self.assertIs(copied_state.prog_items[2], state.prog_items[2])
+        self.assertIs(copied_state.reachable_regions[2], state.reachable_regions[2])
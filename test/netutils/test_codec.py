@@ -0,0 +1,67 @@
+# Tests for NetUtils.encode and decode, which use orjson if it is installed, against the json module
+import unittest
+
+import NetUtils
+from NetUtils import HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode, encode
+from Utils import Version
+
+messages = [
+    {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(item, 1000 + item, 2, 1) for item in range(10)]},
+    {"cmd": "PrintJSON", "type": "Hint", "found": False, "hint_status": HintStatus.HINT_PRIORITY,
+     "receiving": 1, "item": NetworkItem(1, 2, 3, 0),
+     "data": [{"type": "player_id", "text": "1"}, {"text": " found their Übersetzung \U0001F600"}]},
+    {"cmd": "Connected", "players": [NetworkPlayer(0, 1, "Alias", "Player")], "checked_locations": {1, 2, 3},
+     "slot_info": {1: NetworkSlot("Player", "Game", SlotType.player)}, "version": Version(0, 6, 2)},
+]
+
+
+class TestCodec(unittest.TestCase):
+    def test_encode(self) -> None:
+        """Encoded messages should match the json module's output."""
+        for message in messages:
+            with self.subTest(cmd=message["cmd"]):
+                self.assertEqual(encode([message]), NetUtils._json_encode([message]))
+
+    def test_decode(self) -> None:
+        """Decoded messages should match the json module's output, including the allowlisted classes."""
+        for message in messages:
+            with self.subTest(cmd=message["cmd"]):
+                data = encode([message])
+                self.assertEqual(decode(data), NetUtils._json_decode(data))
+        decoded = decode(encode(messages))
+        self.assertIsInstance(decoded[0]["items"][0], NetworkItem)
+        self.assertIsInstance(decoded[1]["item"], NetworkItem)
+        self.assertIsInstance(decoded[2]["players"][0], NetworkPlayer)
+        self.assertEqual(decoded[2]["version"], Version(0, 6, 2))
+
+    def test_decode_unknown_class(self) -> None:
+        """Only allowlisted classes should be converted, and unknown fields of them dropped."""
+        data = '[{"class": "Hint", "item": 1}, {"class": "NetworkItem", "item": 1, "location": 2, "player": 3, "x": 4}]'
+        self.assertEqual(decode(data), [{"class": "Hint", "item": 1}, NetworkItem(1, 2, 3)])
+        self.assertEqual(decode(data), NetUtils._json_decode(data))
+
+    def test_decode_escaped_class(self) -> None:
+        """Classes should be converted even if the class key is written with escapes."""
+        data = '[{"cl\\u0061ss": "NetworkItem", "item": 1, "location": 2, "player": 3}]'
+        self.assertEqual(decode(data), [NetworkItem(1, 2, 3)])
+        self.assertEqual(decode(data), NetUtils._json_decode(data))
+        self.assertEqual(decode('"\\u00dc"'), "\u00dc")
+
+    def test_non_finite_floats(self) -> None:
+        """Infinity and NaN should be encoded like the json module does, instead of as null."""
+        message = {"cmd": "Set", "key": "x", "value": float("inf"), "original_value": None,
+                   "operations": [{"operation": "max", "value": float("-inf")}], float("nan"): 1.5}
+        self.assertEqual(encode([message]), NetUtils._json_encode([message]))
+        self.assertEqual(encode([None, 1.5]), "[null,1.5]")
+        decoded = decode(encode([message]))[0]
+        self.assertEqual(decoded["value"], float("inf"))
+        self.assertEqual(decoded["operations"][0]["value"], float("-inf"))
+        self.assertIsNone(decoded["original_value"])
+
+    def test_big_int(self) -> None:
+        """Integers beyond 64 bit should still be encoded."""
+        self.assertEqual(encode([1 << 70]), f"[{1 << 70}]")
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            decode('[{"cmd": ')
@@ -1,5 +1,10 @@
 # Tests for _speedups.LocationStore and NetUtils._LocationStore
+import array
+import mmap
 import os
+import random
+import struct
+import tempfile
 import typing
 import unittest
 import warnings
@@ -45,6 +50,11 @@ one_state: State = {
 }
 
 
+def columns(*entries: typing.Tuple[int, int, int, int, int]) -> typing.List[array.array]:
+    """Packs (sender, location, item, receiver, flags) entries into the arrays LocationStore.from_columns takes."""
+    return [array.array(type_code, column) for type_code, column in zip("IqqII", zip(*entries))]
+
+
 class Base:
     class TestLocationStore(unittest.TestCase):
         """Test method calls on a loaded store."""
@@ -170,6 +180,23 @@ class Base:
             locations.intersection_update(self.store[1])
             self.assertEqual(locations, {11, 12})
 
+        def test_buffer(self) -> None:
+            buffer = self.store.to_buffer()
+            store = type(self.store).from_buffer(buffer)
+            self.assertEqual(len(store), len(self.store))
+            for player in sample_data:
+                self.assertEqual(dict(store[player].items()), dict(self.store[player].items()))
+            self.assertEqual(sorted(store.find_item({3, 5}, 99)), sorted(self.store.find_item({3, 5}, 99)))
+            self.assertEqual(store.to_buffer(), buffer)
+
+        def test_buffer_mmap(self) -> None:
+            with tempfile.TemporaryFile() as f:
+                f.write(self.store.to_buffer())
+                f.flush()
+                store = type(self.store).from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                self.assertEqual(store[1][11], (21, 2, 7))
+                self.assertEqual(store.get_for_player(2), self.store.get_for_player(2))
+
     class TestLocationStoreConstructor(unittest.TestCase):
         """Test constructors for a given store type."""
         type: type
@@ -241,6 +268,39 @@ class Base:
             self.assertEqual(len(store[1]), 1)
             self.assertEqual(len(store[2]), 0)
 
+        def test_from_columns(self) -> None:
+            entries = [(sender, location, *data) for sender, locations in sorted(sample_data.items())
+                       for location, data in sorted(locations.items())]
+            store = self.type.from_columns(len(sample_data), *columns(*entries))
+            expected = self.type(sample_data)
+            self.assertEqual(len(store), len(expected))
+            for player in sample_data:
+                self.assertEqual(dict(store[player].items()), dict(expected[player].items()))
+                self.assertEqual(store.get_for_player(player), expected.get_for_player(player))
+
+        def test_from_columns_empty_player(self) -> None:
+            store = self.type.from_columns(3, *columns((2, 1, 1, 2, 3)))
+            self.assertEqual(len(store), 3)
+            self.assertEqual(len(store[1]), 0)
+            self.assertEqual(store[2][1], (1, 2, 3))
+            self.assertEqual(len(store[3]), 0)
+
+        def test_from_columns_invalid(self) -> None:
+            with self.assertRaises(ValueError):
+                self.type.from_columns(1, *columns((2, 1, 1, 2, 3)))
+            senders, locations, items, receivers, flags = columns((1, 1, 1, 1, 0), (1, 2, 1, 1, 0))
+            with self.assertRaises(ValueError):
+                self.type.from_columns(1, senders, locations, items, receivers, flags[:1])
+
+        def test_from_buffer_invalid(self) -> None:
+            buffer = self.type(sample_data).to_buffer()
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(buffer[:-1])
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(b"\0" + buffer[1:])
+            with self.assertRaises(ValueError):
+                self.type.from_buffer(b"")
+
 
 class TestPurePythonLocationStore(Base.TestLocationStore):
     """Run base method tests for pure python implementation."""
@@ -264,6 +324,28 @@ class TestSpeedupsLocationStore(Base.TestLocationStore):
         self.store = LocationStore(sample_data)
         super().setUp()
 
+    def test_index_parity(self) -> None:
+        """find_item and get_for_player use an index by receiver and should match the pure python results."""
+        rand = random.Random(0)
+        data: RawLocations = {
+            sender: {location: (rand.randrange(20), rand.randint(1, 30), rand.randrange(8))
+                     for location in rand.sample(range(1, 1000), rand.randrange(200))}
+            for sender in range(1, 21)
+        }
+        reference = _LocationStore(data)
+        for store in (LocationStore(data), LocationStore.from_buffer(LocationStore(data).to_buffer())):
+            for _ in range(200):
+                slots = set(rand.sample(range(35), rand.randrange(4)))
+                item = rand.randrange(-1, 21)
+                self.assertEqual(sorted(store.find_item(slots, item)), sorted(reference.find_item(slots, item)))
+            for slot in range(35):
+                self.assertEqual(store.get_for_player(slot), reference.get_for_player(slot))
+
+    @unittest.skipIf(struct.calcsize("P") != 8, "buffer layout of the pure python store is the 64-bit one")
+    def test_buffer_parity(self) -> None:
+        """Both implementations should write the same buffer, including the receiver order _speedups maps."""
+        self.assertEqual(self.store.to_buffer(), _LocationStore(sample_data).to_buffer())
+
 
 @unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
 class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
@@ -0,0 +1,66 @@
+import pickle
+import unittest
+import zlib
+
+from NetUtils import LocationStore, MultiData, NetworkSlot, SlotType, convert_multidata, decode_multidata, \
+    encode_multidata, legacy_multidata_format_version, multidata_format_version
+from Utils import VersionException
+
+
+class TestMultiData(unittest.TestCase):
+    multidata = {
+        "locations": {
+            1: {11: (21, 2, 7), 12: (22, 2, 0)},
+            2: {21: (11, 1, 0)},
+        },
+        "slot_info": {
+            1: NetworkSlot("Player1", "Game 1", SlotType.player),
+            2: NetworkSlot("Player2", "Game 2", SlotType.player),
+        },
+        "seed_name": "12345",
+        "version": (0, 6, 0),
+    }
+
+    def test_round_trip(self) -> None:
+        decoded = decode_multidata(encode_multidata(self.multidata))
+        self.assertIsInstance(decoded, MultiData)
+        self.assertEqual(sorted(decoded), sorted(self.multidata))
+        self.assertIsInstance(decoded["locations"], LocationStore)
+        for player, locations in self.multidata["locations"].items():
+            self.assertEqual(dict(decoded["locations"][player].items()), locations)
+        for key in ("slot_info", "seed_name", "version"):
+            self.assertEqual(decoded[key], self.multidata[key])
+
+    def test_lazy_sections(self) -> None:
+        """Sections should only be decoded when accessed, and be re-encoded unchanged otherwise."""
+        decoded = decode_multidata(encode_multidata(self.multidata))
+        raw_slot_info = decoded.get_raw_section("slot_info")
+        self.assertIsNotNone(raw_slot_info)
+        decoded["seed_name"] = "67890"
+        del decoded["version"]
+
+        reencoded = decode_multidata(encode_multidata(decoded))
+        self.assertEqual(reencoded.get_raw_section("slot_info"), raw_slot_info)
+        self.assertEqual(reencoded["seed_name"], "67890")
+        self.assertNotIn("version", reencoded)
+
+        self.assertEqual(reencoded["slot_info"], self.multidata["slot_info"])
+        self.assertIsNone(reencoded.get_raw_section("slot_info"))
+
+    def test_convert_legacy_format(self) -> None:
+        legacy = bytes([3]) + zlib.compress(pickle.dumps(self.multidata), 9)
+        self.assertEqual(decode_multidata(legacy), self.multidata)
+        converted = convert_multidata(legacy)
+        self.assertEqual(converted[0], multidata_format_version)
+        self.assertEqual(decode_multidata(converted)["slot_info"], self.multidata["slot_info"])
+
+    def test_encode_legacy_format(self) -> None:
+        """Multidata for older servers should be the plain compressed pickle they load, also from decoded format 4."""
+        for multidata in (self.multidata, decode_multidata(encode_multidata(self.multidata))):
+            legacy = encode_multidata(multidata, format_version=legacy_multidata_format_version)
+            self.assertEqual(legacy[0], legacy_multidata_format_version)
+            self.assertEqual(pickle.loads(zlib.decompress(legacy[1:])), self.multidata)
+
+    def test_future_format(self) -> None:
+        with self.assertRaises(VersionException):
+            decode_multidata(bytes([multidata_format_version + 1]))
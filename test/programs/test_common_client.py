@@ -1,6 +1,10 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import NetUtils
+import Utils
 from CommonClient import CommonContext
 
 
@@ -93,3 +97,32 @@ class TestCommonContext(unittest.IsolatedAsyncioTestCase):
         assert self.ctx.item_names.lookup_in_slot(-1, 3) == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame1") == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+
+    async def test_name_lookup_cache(self):
+        game_package = {
+            "item_name_to_id": {"Test Item 4 - Cached": 2**54 + 4, "Test Item 5 - Ünicode": -2**54},
+            "location_name_to_id": {},
+            "checksum": "0123456789abcdef",
+        }
+        # the mapped file stays open for the rest of the process
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as cache_dir, \
+                mock.patch.object(Utils.cache_path, "cached_path", cache_dir, create=True):
+            self.assertIsNone(Utils.load_name_lookup_for_checksum("__TestGame3", game_package["checksum"]))
+            Utils.store_name_lookup_for_checksum("__TestGame3", game_package)
+            self.assertEqual(os.listdir(os.path.join(cache_dir, "datapackage", "__TestGame3")),
+                             ["0123456789abcdef.lookup"])
+
+            with mock.patch.object(Utils, "load_data_package_for_checksum", side_effect=AssertionError):
+                await self.ctx.prepare_data_package({"__TestGame3"}, {"__TestGame3": game_package["checksum"]})
+
+        assert self.ctx.checksums["__TestGame3"] == "0123456789abcdef"
+        assert dict(self.ctx.item_names["__TestGame3"]) == {
+            **self.ctx.item_names["Archipelago"],
+            **{code: name for name, code in game_package["item_name_to_id"].items()},
+        }
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 4, "__TestGame3") == "Test Item 4 - Cached"
+        assert self.ctx.item_names.lookup_in_game(-2 ** 54, "__TestGame3") == "Test Item 5 - Ünicode"
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 3, "__TestGame3") == f"Unknown item (ID: {2 ** 54 + 3})"
+        assert self.ctx.item_names.lookup_in_game("Test", "__TestGame3") == "Unknown item (ID: Test)"
+        assert self.ctx.item_names.lookup_in_game(-1, "__TestGame3") == "Nothing"
+        assert self.ctx.location_names.lookup_in_game(-1, "__TestGame3") == "Cheat Console"
@@ -1,9 +1,12 @@
 # Tests for Generate.py (ArchipelagoGenerate.exe)
 
+import threading
 import unittest
+import unittest.mock
 import os
 import os.path
 import sys
+import zipfile
 
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -137,3 +140,76 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+
+class TestGenerateOutputProcesses(TestGenerateMain):
+    """Tests generating output of process-safe worlds in forked processes."""
+
+    test_generate_absolute = None
+    test_generate_relative = None
+    test_generate_yaml = None
+
+    def setUp(self):
+        super().setUp()
+        from settings import get_settings
+        self.settings = get_settings()
+        self.original_players = self.settings.generator.players
+        self.original_output_processes = self.settings.generator.output_processes
+        self.settings.generator.players = 0
+        self.settings.generator.output_processes = 2
+
+    def tearDown(self):
+        self.settings.generator.players = self.original_players
+        self.settings.generator.output_processes = self.original_output_processes
+        super().tearDown()
+
+    @unittest.skipUnless(sys.platform == "linux", "Output processes are only supported on Linux")
+    def test_output_processes(self):
+        from worlds.timespinner import TimespinnerWorld
+
+        def generate_output(world, output_directory: str) -> None:
+            with open(os.path.join(output_directory, f"{world.player}.txt"), "w") as f:
+                f.write(str(os.getpid()))
+            world.output_pid = os.getpid()
+            world.output_event.set()
+
+        def fill_slot_data(world):
+            # like ROM based worlds waiting for their rom name in modify_multidata
+            world.output_event.wait()
+            return {"output_pid": world.output_pid}
+
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name]
+        with unittest.mock.patch.object(TimespinnerWorld, "output_process_attributes",
+                                        frozenset({"output_pid", "output_event"}), create=True), \
+                unittest.mock.patch.object(TimespinnerWorld, "generate_output", generate_output), \
+                unittest.mock.patch.object(TimespinnerWorld, "fill_slot_data", fill_slot_data), \
+                unittest.mock.patch.object(TimespinnerWorld, "output_event", threading.Event(), create=True):
+            multiworld = Main.main(*Generate.main())
+
+        self.assertOutput(self.output_tempdir.name)
+        output_pid = multiworld.worlds[1].output_pid
+        self.assertNotEqual(output_pid, os.getpid())
+        with zipfile.ZipFile(next(Path(self.output_tempdir.name).glob("*.zip"))) as zf:
+            self.assertEqual(zf.read("1.txt").decode(), str(output_pid))
+            multidata = next(info for info in zf.infolist() if info.filename.endswith(".archipelago"))
+            self.assertEqual(multidata.compress_type, zipfile.ZIP_STORED)
+
+
+class TestWriteToArchive(unittest.TestCase):
+    def test_same_file_names(self):
+        """Files of the same name from different output tasks should be archived once, or fail if they differ."""
+        with TemporaryDirectory() as temp_dir:
+            directories = [os.path.join(temp_dir, str(player)) for player in range(1, 4)]
+            for directory, content in zip(directories, ("same", "same", "different")):
+                os.mkdir(directory)
+                with open(os.path.join(directory, "readme.txt"), "w") as f:
+                    f.write(content)
+            archived: dict[str, str] = {}
+            with zipfile.ZipFile(os.path.join(temp_dir, "output.zip"), "w") as zf:
+                Main._write_to_archive(zf, directories[0], archived)
+                Main._write_to_archive(zf, directories[1], archived)
+                self.assertEqual(zf.namelist(), ["readme.txt"])
+                with self.assertRaises(FileExistsError):
+                    Main._write_to_archive(zf, directories[2], archived)
@@ -1,5 +1,18 @@
+import asyncio
+import copy
+import os
+import pickle
+import tempfile
+import time
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from unittest import mock
+
+from MultiServer import Client, Context, SaveJournal, ServerCommandProcessor, on_client_connected, process_client_cmd, \
+    send_items_to, send_new_items
+from NetUtils import Hint, HintStatus, NetworkItem
+from Utils import restricted_loads
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +51,369 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class OfflineContext(Context):
+    def _load_game_data(self) -> None:
+        pass  # not needed for these tests, and can only run once per process
+
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ctx = self.create_context()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def create_context(self) -> Context:
+        ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        ctx.connect_names = {"Player1": (0, 1), "Player2": (0, 2)}
+        ctx.save_filename = os.path.join(self.temp_dir.name, "test.apsave")
+        ctx.saving = True
+        ctx.save_journal = SaveJournal(ctx)
+        return ctx
+
+    def load_context(self) -> Context:
+        ctx = self.create_context()
+        with open(ctx.save_filename, "rb") as f:
+            ctx.set_save(*SaveJournal.load(f.read()))
+        return ctx
+
+    def progress(self, location: int) -> None:
+        """Makes progress and notes it for the save journal, like register_location_checks and notify_hints do."""
+        journal = self.ctx.save_journal
+        self.ctx.location_checks[0, 1].add(location)
+        journal.new_checks.setdefault((0, 1), set()).add(location)
+        self.ctx.recheck_location_hints(0, 1, {location})
+        self.ctx.received_items.setdefault((0, 2, True), []).append(NetworkItem(location, location, 1, 0))
+        journal.changed_items.add((0, 2))
+        hint = Hint(2, 1, location + 1, location + 1, False)
+        self.ctx.hints[0, 1].add(hint)
+        self.ctx.hint_index[0, 1, hint.location] = hint
+        journal.changed_hints.add((0, 1))
+        self.ctx.stored_data[f"key{location}"] = location
+
+    def test_replay_matches_save(self) -> None:
+        """Loading a snapshot followed by records should result in the same state as a full save."""
+        self.assertTrue(self.ctx._save())
+        snapshot_size = os.path.getsize(self.ctx.save_filename)
+        for location in range(1, 4):
+            self.progress(location)
+            self.assertTrue(self.ctx._save())
+        self.ctx.name_aliases[0, 1] = "Alias"
+        self.assertTrue(self.ctx._save())
+        self.assertGreater(os.path.getsize(self.ctx.save_filename), snapshot_size)
+
+        loaded = self.load_context()
+        self.assertEqual(loaded.get_save(), self.ctx.get_save())
+        self.assertEqual(loaded.save_journal.sequence, self.ctx.save_journal.sequence)
+
+        # the first save after loading writes a new snapshot
+        self.assertTrue(loaded.save_journal.snapshot_due)
+        self.assertTrue(loaded._save())
+        self.assertEqual(self.load_context().get_save(), self.ctx.get_save())
+
+    def test_compaction(self) -> None:
+        """After enough records, the next save should write a snapshot and drop the journal."""
+        self.ctx.save_journal.compact_after = 2
+        self.assertTrue(self.ctx._save())
+        for location in range(1, 3):
+            self.progress(location)
+            self.assertTrue(self.ctx._save())
+        self.assertTrue(self.ctx.save_journal.snapshot_due)
+        self.progress(3)
+        self.assertTrue(self.ctx._save())
+        _, journal = SaveJournal.load(open(self.ctx.save_filename, "rb").read())
+        self.assertEqual(journal, [])
+        self.assertEqual(self.load_context().get_save(), self.ctx.get_save())
+
+    def test_record_of_noted_changes(self) -> None:
+        """Records should only include changes noted for the journal, without comparing the whole save."""
+        self.assertTrue(self.ctx._save())
+        self.ctx.location_checks[0, 1].add(1)
+        self.assertEqual(self.ctx.save_journal.take_record(), b"")
+        self.ctx.save_journal.new_checks[0, 1] = {1}
+        delta = restricted_loads(zlib.decompress(self.ctx.save_journal.take_record()[SaveJournal.record_header.size:]))
+        self.assertEqual(delta["location_checks"], {(0, 1): {1}})
+        self.assertEqual(self.ctx.save_journal.new_checks, {})
+
+    def test_snapshot_rejected_without_journal(self) -> None:
+        """Servers without journal support should reject saves that may have records, but load the save on exit."""
+        self.assertTrue(self.ctx._save())
+        self.progress(1)
+        self.assertTrue(self.ctx._save())
+        with open(self.ctx.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        self.assertGreater(save_data["version"], Context.legacy_save_version)
+
+        self.assertTrue(self.ctx._save(True))
+        with open(self.ctx.save_filename, "rb") as f:
+            data = f.read()
+        save_data = restricted_loads(zlib.decompress(data))
+        self.assertEqual(save_data["version"], Context.legacy_save_version)
+        self.assertEqual(save_data["location_checks"], {(0, 1): {1}})
+        self.assertEqual(SaveJournal.load(data)[1], [])
+        self.assertTrue(self.ctx.save_journal.snapshot_due)
+
+    def test_uncompressed_snapshot(self) -> None:
+        """WebHost stores snapshots as plain pickles, which records are appended to the same way."""
+        multisave = pickle.dumps(self.ctx.save_journal.take_snapshot())
+        self.progress(1)
+        multisave += self.ctx.save_journal.take_record()
+        save_data, journal = SaveJournal.load(multisave, compressed=False)
+        self.assertEqual(len(journal), 1)
+        SaveJournal.replay(save_data, journal)
+        self.assertEqual(save_data["location_checks"], {(0, 1): {1}})
+        self.assertEqual(save_data["stored_data"], {"key1": 1})
+
+
+class TestHintIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        self.ctx.groups = {3: {1, 2}}
+        self.hints = [Hint(receiving_player=2, finding_player=1, location=location, item=location, found=False)
+                      for location in range(1, 101)]
+        self.group_hint = Hint(receiving_player=3, finding_player=2, location=1, item=1, found=False)
+        for hint in self.hints:
+            self.ctx.hints[0, 1].add(hint)
+            self.ctx.hints[0, 2].add(hint)
+        for slot in (1, 2):
+            self.ctx.hints[0, slot].add(self.group_hint)
+        self.ctx.rebuild_hint_index()
+
+    def test_get_hint(self) -> None:
+        self.assertEqual(self.ctx.get_hint(0, 1, 5), self.hints[4])
+        self.assertEqual(self.ctx.get_hint(0, 2, 1), self.group_hint)
+        self.assertIsNone(self.ctx.get_hint(0, 2, 5))
+        self.assertIsNone(self.ctx.get_hint(1, 1, 5))
+
+    def test_recheck_location_hints(self) -> None:
+        """Checking a location should only re-check and update the hints for that location."""
+        self.ctx.location_checks[0, 1].add(5)
+        changed = set()
+        with mock.patch.object(Hint, "re_check", autospec=True, side_effect=Hint.re_check) as re_check:
+            self.ctx.recheck_location_hints(0, 1, {5}, changed)
+        self.assertEqual(re_check.call_count, 1)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        found_hint = self.hints[4]._replace(found=True, status=HintStatus.HINT_FOUND)
+        for slot in (1, 2):
+            self.assertIn(found_hint, self.ctx.hints[0, slot])
+            self.assertNotIn(self.hints[4], self.ctx.hints[0, slot])
+        self.assertEqual(self.ctx.get_hint(0, 1, 5), found_hint)
+
+    def test_recheck_group_hints(self) -> None:
+        """Hints for items of a group concern all members of the group."""
+        self.ctx.location_checks[0, 2].add(1)
+        changed = set()
+        self.ctx.recheck_location_hints(0, 2, {1}, changed)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertTrue(self.ctx.get_hint(0, 2, 1).found)
+        self.assertFalse(self.ctx.get_hint(0, 1, 1).found)
+
+    def test_recheck_hints(self) -> None:
+        """Rechecking everything should pick up checks that were not registered through recheck_location_hints."""
+        self.ctx.location_checks[0, 1].update({1, 2})
+        self.ctx.recheck_hints()
+        self.assertEqual(sum(hint.found for hint in self.ctx.hints[0, 2]), 2)
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        self.ctx.clients = {0: {1: [], 2: []}}
+        self.ctx.start_inventory = {1: [NetworkItem(1, -2, 0)]}
+
+    def connect(self, slot: int, items_handling: int) -> Client:
+        client = Client(mock.Mock(open=True), self.ctx)
+        client.team, client.slot, client.items_handling = 0, slot, items_handling
+        self.ctx.clients[0][slot].append(client)
+        return client
+
+    async def test_flush_is_coalesced(self) -> None:
+        """Items sent within one tick should be delivered with one message per distinct payload."""
+        local, *remote = (self.connect(1, 0b001), self.connect(1, 0b111), self.connect(1, 0b111))
+        other = self.connect(2, 0b111)
+        with mock.patch("MultiServer.websockets.broadcast") as broadcast:
+            for location in range(1, 4):
+                send_items_to(self.ctx, 0, 1, NetworkItem(location, location, 2))
+                send_new_items(self.ctx)
+            broadcast.assert_not_called()
+            await asyncio.sleep(0)
+
+        messages = {}
+        for (sockets, msg), _ in broadcast.call_args_list:
+            for socket in sockets:
+                messages.setdefault(socket, []).extend(self.ctx.loader(msg))
+        self.assertEqual(broadcast.call_count, 2)
+        self.assertEqual(len(messages[local.socket][0]["items"]), 3)
+        for client in remote:
+            self.assertEqual(messages[client.socket], messages[remote[0].socket])
+            self.assertEqual(client.send_index, 4)
+        self.assertEqual(len(messages[remote[0].socket][0]["items"]), 4)
+        self.assertEqual(local.send_index, 3)
+        self.assertNotIn(other.socket, messages)
+
+    async def test_only_new_items_are_sent(self) -> None:
+        """Clients that already received some items should only get the rest."""
+        first, second = self.connect(1, 0b111), self.connect(1, 0b111)
+        send_items_to(self.ctx, 0, 1, NetworkItem(1, 1, 2))
+        with mock.patch("MultiServer.websockets.broadcast") as broadcast:
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)
+            self.assertEqual(broadcast.call_count, 1)
+            third = self.connect(1, 0b111)
+            send_items_to(self.ctx, 0, 1, NetworkItem(2, 2, 2))
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)
+        self.assertEqual(broadcast.call_count, 3)
+        for (sockets, msg), _ in broadcast.call_args_list[1:]:
+            message = self.ctx.loader(msg)[0]
+            if third.socket in sockets:
+                self.assertEqual((message["index"], len(message["items"])), (0, 3))
+            else:
+                self.assertEqual(set(sockets), {first.socket, second.socket})
+                self.assertEqual((message["index"], len(message["items"])), (2, 1))
+
+
+class TestEncodedMessages(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        self.ctx.gamespackage = {
+            "Archipelago": {"item_name_to_id": {"Nothing": -1}, "checksum": "test-encoded-messages-ap"},
+            "Test Game": {"item_name_to_id": {"Sword": 1, "Bow": 2}, "location_name_to_id": {"Chest": 1}},
+        }
+        self.ctx.games = {1: "Test Game"}
+        self.ctx.dumper = mock.Mock(side_effect=Context.dumper)
+
+    def test_data_package(self) -> None:
+        """Encoded data packages should match encoding the whole message, and each game should only be encoded once."""
+        for games in (self.ctx.gamespackage, ["Test Game"], []):
+            with self.subTest(games=games):
+                expected = Context.dumper([{"cmd": "DataPackage", "data": {"games": {
+                    game: self.ctx.gamespackage[game] for game in games}}}])
+                self.assertEqual(self.ctx.get_encoded_data_package(games), expected)
+        encoded_game_data = [call.args[0] for call in self.ctx.dumper.call_args_list if isinstance(call.args[0], dict)]
+        self.assertEqual(encoded_game_data, list(self.ctx.gamespackage.values()))
+
+    async def test_room_info(self) -> None:
+        """RoomInfo should only be encoded again after options change, but always have the current time."""
+        client = Client(mock.Mock(open=True, send=mock.AsyncMock()), self.ctx)
+        for _ in range(2):
+            await on_client_connected(self.ctx, client)
+        self.ctx.password = "secret"
+        await on_client_connected(self.ctx, client)
+        room_info_encodes = [call for call in self.ctx.dumper.call_args_list if isinstance(call.args[0], list)]
+        self.assertEqual(len(room_info_encodes), 2)
+
+        messages = [Context.loader(call.args[0])[0] for call in client.socket.send.call_args_list]
+        self.assertEqual([message["password"] for message in messages], [False, False, True])
+        for message in messages:
+            self.assertEqual(message["cmd"], "RoomInfo")
+            self.assertEqual(set(message["games"]), {"Archipelago", "Test Game"})
+            self.assertEqual(message["datapackage_checksums"], {"Archipelago": "test-encoded-messages-ap"})
+            self.assertAlmostEqual(message["time"], time.time(), delta=60)
+
+
+class TestReadData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        self.hint = Hint(receiving_player=2, finding_player=1, location=1, item=1, found=False)
+        self.ctx.hints[0, 1].add(self.hint)
+        self.ctx.rebuild_hint_index()
+        self.getter = mock.Mock(side_effect=lambda: list(self.ctx.get_rechecked_hints(0, 1)))
+        self.ctx.read_data["hints_0_1"] = self.getter
+        self.ctx.stored_data["key"] = {"value": 1}
+
+    def retrieve(self, *keys: str) -> dict:
+        return Context.loader(self.ctx.get_encoded_retrieved({"cmd": "Retrieved", "keys": list(keys), "echo": 1}))[0]
+
+    def test_retrieved(self) -> None:
+        """Retrieved should contain the same values as the datastore and read_data."""
+        self.assertEqual(self.retrieve("key", "_read_hints_0_1", "_read_missing", "missing"), {
+            "cmd": "Retrieved", "echo": 1, "keys": {
+                "key": {"value": 1},
+                "_read_hints_0_1": Context.loader(Context.dumper([self.hint])),
+                "_read_missing": None,
+                "missing": None,
+            }})
+
+    def test_cached_until_changed(self) -> None:
+        """read_data values should only be computed again after their data changed."""
+        for _ in range(3):
+            self.retrieve("_read_hints_0_1")
+        self.assertEqual(self.getter.call_count, 1)
+
+        found_hint = self.hint._replace(found=True)
+        self.ctx.replace_hint(0, 1, self.hint, found_hint)
+        self.assertTrue(self.retrieve("_read_hints_0_1")["keys"]["_read_hints_0_1"][0]["found"])
+        self.assertEqual(self.getter.call_count, 2)
+
+        self.ctx.on_changed_hints(0, 1)
+        self.retrieve("_read_hints_0_1")
+        self.assertEqual(self.getter.call_count, 3)
+
+    def test_set_reply(self) -> None:
+        """SetReply for changed read_data should be encoded once for all clients that want it."""
+        clients = [Client(mock.Mock(open=True), self.ctx) for _ in range(3)]
+        for client in clients:
+            self.ctx.stored_data_notification_clients["_read_hints_0_1"].add(client)
+        with mock.patch("MultiServer.websockets.broadcast") as broadcast:
+            self.ctx.on_changed_hints(0, 1)
+        (sockets, msg), _ = broadcast.call_args
+        self.assertEqual(set(sockets), {client.socket for client in clients})
+        self.assertEqual(Context.loader(msg), [{"cmd": "SetReply", "key": "_read_hints_0_1",
+                                                "value": Context.loader(Context.dumper([self.hint]))}])
+
+
+class TestDataStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = OfflineContext("", 0, "", "", 0, 0, False)
+        self.clients = []
+        for slot in (1, 2):
+            client = Client(mock.Mock(open=True, send=mock.AsyncMock()), self.ctx)
+            client.auth, client.team, client.slot = True, 0, slot
+            self.clients.append(client)
+
+    async def set(self, key: str, *operations: typing.Tuple[str, typing.Any]) -> None:
+        await process_client_cmd(self.ctx, self.clients[0], {
+            "cmd": "Set", "key": key, "default": [],
+            "operations": [{"operation": operation, "value": value} for operation, value in operations]})
+
+    async def test_original_value(self) -> None:
+        """Operations should not modify the stored value, which is sent as original_value without copying it."""
+        original = [1, 2]
+        self.ctx.stored_data["list"] = original
+        with mock.patch("MultiServer.copy.copy", wraps=copy.copy) as copy_mock:
+            await self.set("list", ("add", [3]), ("update", [4]))
+            copy_mock.assert_not_called()  # add already created a new list
+            await self.set("list", ("update", [5]), ("remove", 1))
+            self.assertEqual(copy_mock.call_count, 1)
+        self.assertEqual(original, [1, 2])
+        self.assertEqual(self.ctx.stored_data["list"], [2, 3, 4, 5])
+
+    async def test_prefix_notify(self) -> None:
+        """Prefixes should subscribe to all keys starting with them, while keys ending in * are still exact keys."""
+        await process_client_cmd(self.ctx, self.clients[1], {"cmd": "SetNotify", "keys": ["other", "star*"],
+                                                             "prefixes": ["game_"]})
+        with mock.patch("MultiServer.websockets.broadcast") as broadcast:
+            for key in ("game_1", "game_2", "other", "unrelated", "game", "star*", "stars"):
+                await self.set(key, ("replace", key))
+            await asyncio.sleep(0)  # broadcast task
+        notified = [Context.loader(msg)[0]["key"] for (sockets, msg), _ in broadcast.call_args_list
+                    if self.clients[1].socket in sockets]
+        self.assertEqual(notified, ["game_1", "game_2", "other", "star*"])
+        self.assertNotIn("unrelated", self.ctx.stored_data_notification_clients)
+
+    async def test_changes_and_writes(self) -> None:
+        """Writes should be tracked for the save journal and the datastore command."""
+        for _ in range(3):
+            await self.set("key", ("add", [1]))
+        await self.set("other", ("add", [1]))
+        self.assertEqual(self.ctx.stored_data.changed, {"key", "other"})
+        self.assertEqual(self.ctx.stored_data.writes["key"], 3)
+        self.assertEqual(self.ctx.stored_data.get_write_rate("key"), 3.0)  # first minute counts as a whole minute
+        with mock.patch.object(ServerCommandProcessor, "output") as output:
+            ServerCommandProcessor(self.ctx)("/datastore")
+        self.assertIn("Key: key | Size:", output.call_args.args[0])
+        self.assertIn("Writes: 3 (3.0/min)", output.call_args.args[0])
@@ -0,0 +1,110 @@
+import pickle
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from flask import url_for
+
+from . import TestBase
+
+
+class TestAPITracker(TestBase):
+    room_id: UUID
+    tracker_uuid: UUID
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from MultiServer import Context as MultiServerContext
+        from WebHostLib.models import GameDataPackage, Room, Seed
+
+        super().setUp()
+        with (Path(__file__).parent / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            data = f.read()
+        multidata = MultiServerContext.decompress(data)
+        self.save: Dict[str, Any] = {
+            "location_checks": {(0, 1): set()},
+            "received_items": {(0, 1, True): []},
+            "hints": {},
+            "client_game_state": {(0, 1): 0},
+            "client_activity_timers": (),
+            "journal_sequence": 1,
+        }
+        owner = uuid4()
+        self.tracker_uuid = uuid4()
+        with db_session:
+            for game, game_data in multidata["datapackage"].items():
+                if not GameDataPackage.get(checksum=game_data["checksum"]):
+                    GameDataPackage(checksum=game_data["checksum"], data=pickle.dumps(game_data))
+            seed = Seed(multidata=data, owner=owner)
+            room = Room(seed=seed, owner=owner, tracker=self.tracker_uuid, multisave=pickle.dumps(self.save))
+            self.room_id = room.id
+        self.location = 1234
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            room.seed.delete()
+
+    def get(self, query: str = "", slot: str = "", tracker: Optional[UUID] = None, **kwargs: Any) -> Any:
+        with self.app.app_context(), self.app.test_request_context():
+            url = url_for("api.tracker_info", tracker=tracker or self.tracker_uuid)
+        return self.client.get(url + slot + query, **kwargs)
+
+    def append_record(self, delta: Dict[str, Any]) -> None:
+        from pony.orm import db_session
+        from MultiServer import SaveJournal
+        from WebHostLib.models import Room, SaveRecord
+
+        record = zlib.compress(pickle.dumps(delta))
+        with db_session:
+            SaveRecord(room=Room.get(id=self.room_id), data=SaveJournal.record_header.pack(len(record)) + record)
+
+    def test_tracker(self) -> None:
+        """Verify that the full tracker data is served and revalidated with its ETag"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["version"], 1)
+        self.assertIsNone(response.json["since"])
+        self.assertEqual(response.json["slots"], [{"team": 0, "player": 1, "checked_locations": [],
+                                                   "received_items": [], "hints": [], "status": 0,
+                                                   "last_activity": None}])
+        etag = response.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+
+        response = self.get(headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.get(slot="/0/1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.append_record({"location_checks": {(0, 1): {self.location}}, "sequence": 2})
+        response = self.get(headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["version"], 2)
+        self.assertEqual(response.json["slots"][0]["checked_locations"], [self.location])
+
+    def test_since(self) -> None:
+        """Verify that only the changes since a known version are served"""
+        self.get()
+        self.append_record({"location_checks": {(0, 1): {self.location}},
+                            "others": {"client_game_state": {(0, 1): 30}}, "sequence": 2})
+        response = self.get("?since=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"version": 2, "since": 1, "slots": [
+            {"team": 0, "player": 1, "checked_locations": [self.location], "status": 30}]})
+        self.assertEqual(response.headers["ETag"], '"1-2"')
+
+        response = self.get("?since=2")
+        self.assertEqual(response.json, {"version": 2, "since": 2, "slots": []})
+
+        # versions of which the changes aren't known get the full data
+        response = self.get("?since=0")
+        self.assertIsNone(response.json["since"])
+        self.assertEqual(response.json["slots"][0]["checked_locations"], [self.location])
+
+        self.assertEqual(self.get("?since=x").status_code, 400)
+        self.assertEqual(self.get(slot="/0/2").status_code, 404)
+        self.assertEqual(self.get(tracker=uuid4()).status_code, 404)
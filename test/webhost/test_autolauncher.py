@@ -0,0 +1,93 @@
+import typing
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+from . import TestBase
+
+
+class FakeHoster:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.room_ids: typing.Set[UUID] = set()
+        self.shut_down: typing.List[UUID] = []
+        self.started: typing.List[UUID] = []
+
+    def collect_shut_down_rooms(self) -> None:
+        self.room_ids.difference_update(self.shut_down)
+        self.shut_down.clear()
+
+    def start_room(self, room_id: UUID) -> None:
+        self.room_ids.add(room_id)
+        self.started.append(room_id)
+
+
+class TestRoomScheduler(TestBase):
+    seed_id: UUID
+    room_ids: typing.List[UUID]
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import RoomScheduler
+        from WebHostLib.models import Room, Seed
+
+        super().setUp()
+        owner = uuid4()
+        with db_session:
+            seed = Seed(multidata=b"", owner=owner)
+            self.seed_id = seed.id
+            self.room_ids = [Room(seed=seed, owner=owner, tracker=uuid4()).id for _ in range(5)]
+            self.room_ids.append(Room(seed=seed, owner=owner, tracker=uuid4(),
+                                      last_activity=datetime.utcnow() - timedelta(days=1)).id)
+        self.hosters = [FakeHoster("Hoster0"), FakeHoster("Hoster1")]
+        self.scheduler = RoomScheduler(self.hosters)
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Seed
+
+        with db_session:
+            # all rooms share the seed, deleting it deletes them as well
+            Seed.get(id=self.seed_id).delete()
+
+    def set_last_activity(self, room_id: UUID, last_activity: datetime) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with db_session:
+            Room.get(id=room_id).last_activity = last_activity
+
+    def test_start_active_rooms(self) -> None:
+        """Verify that rooms with recent activity are started once and spread over the hosters."""
+        self.scheduler.update()
+        self.scheduler.update()
+        started = self.hosters[0].started + self.hosters[1].started
+        self.assertEqual(sorted(started), sorted(self.room_ids[:5]))
+        self.assertEqual(sorted(self.scheduler.rooms_per_hoster.values()), [2, 3])
+
+        self.set_last_activity(self.room_ids[5], datetime.utcnow())
+        self.scheduler.update()
+        self.assertEqual(self.scheduler.rooms_per_hoster, {"Hoster0": 3, "Hoster1": 3})
+
+    def test_exited_room_is_not_restarted(self) -> None:
+        """Verify that a room that shut down and moved its last_activity back only restarts on new activity."""
+        self.scheduler.update()
+        room_id = self.room_ids[0]
+        hoster = next(hoster for hoster in self.hosters if room_id in hoster.room_ids)
+        self.set_last_activity(room_id, datetime.utcnow() - timedelta(days=1))
+        hoster.shut_down.append(room_id)
+        self.scheduler.update()
+        self.assertNotIn(room_id, hoster.room_ids)
+        self.assertEqual(hoster.started.count(room_id), 1)
+
+        self.set_last_activity(room_id, datetime.utcnow())
+        self.scheduler.update()
+        self.assertEqual(sum(hoster.started.count(room_id) for hoster in self.hosters), 2)
+
+    def test_late_activity_is_not_missed(self) -> None:
+        """Verify that activity committed late, or by a host with a clock ahead, does not hide other rooms."""
+        self.set_last_activity(self.room_ids[0], datetime.utcnow() + timedelta(minutes=2))
+        self.scheduler.update()
+        self.scheduler.update()
+        self.set_last_activity(self.room_ids[5], datetime.utcnow() - timedelta(minutes=1))
+        self.scheduler.update()
+        self.assertEqual(sum(hoster.started.count(self.room_ids[5]) for hoster in self.hosters), 1)
@@ -191,3 +191,29 @@ class TestHostFakeRoom(TestBase):
         with db_session:
             commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
             self.assertNotIn("/help", (command.commandtext for command in commands))
+
+    def test_command_poller(self) -> None:
+        """Verify that queued commands are handed to the room's loop once and removed."""
+        import threading
+        from unittest import mock
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import DBCommandPoller
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            Command(room=Room.get(id=self.room_id), commandtext="/help")
+
+        ctx = mock.Mock(room_id=self.room_id, exit_event=threading.Event(), db_command_interval=5)
+        poller = DBCommandPoller()
+        poller.add_room(ctx)
+        self.assertGreater(poller.poll(), 0)
+        self.assertEqual(ctx.main_loop.call_soon_threadsafe.call_args.args[1], "/help")
+        with db_session:
+            commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
+            self.assertEqual(commands.count(), 0)
+
+        # not due yet
+        with db_session:
+            Command(room=Room.get(id=self.room_id), commandtext="/players")
+        poller.poll()
+        self.assertEqual(ctx.main_loop.call_soon_threadsafe.call_count, 1)
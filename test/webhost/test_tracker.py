@@ -1,5 +1,7 @@
 import os
 import pickle
+import unittest
+import zlib
 from pathlib import Path
 from typing import ClassVar
 from uuid import UUID, uuid4
@@ -93,3 +95,97 @@ class TestTracker(TestBase):
                 headers={"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00"},  # missing timezone
             )
             self.assertEqual(response.status_code, 400)
+
+    def test_tracker_data_cache(self) -> None:
+        """
+        Verify that trackers of the same seed share its decoded multidata and data packages between requests
+        """
+        from WebHostLib.tracker import get_tracker_cache_stats
+
+        with self.app.app_context(), self.app.test_request_context():
+            before = get_tracker_cache_stats()
+            for endpoint, arguments in (("get_player_tracker", {"tracked_team": 0, "tracked_player": 1}),
+                                        ("get_generic_game_tracker", {"tracked_team": 0, "tracked_player": 1}),
+                                        ("get_multiworld_tracker", {})):
+                response = self.client.get(url_for(endpoint, tracker=self.tracker_uuid, **arguments))
+                self.assertEqual(response.status_code, 200)
+            after = get_tracker_cache_stats()
+            self.assertEqual(after["multidata"]["misses"], before["multidata"]["misses"] + 1)
+            self.assertEqual(after["multidata"]["hits"], before["multidata"]["hits"] + 2)
+            self.assertGreater(after["data_package"]["hits"], before["data_package"]["hits"])
+
+
+class TestRoomTrackerState(unittest.TestCase):
+    def setUp(self) -> None:
+        from NetUtils import Hint, NetworkItem
+
+        self.items = [NetworkItem(100 + n % 3, n, 2, 0) for n in range(6)]
+        self.hint = Hint(1, 2, 3, 4, False)
+        self.save = {
+            "location_checks": {(0, 1): {1, 2}, (0, 2): set()},
+            "received_items": {(0, 1, True): self.items[:2]},
+            "hints": {(0, 1): set()},
+            "client_game_state": {(0, 1): 0},
+            "journal_sequence": 1,
+        }
+        self.delta = {
+            "location_checks": {(0, 1): {3}},
+            "received_items": {(0, 1, True): (2, self.items[2:5])},
+            "hints": {(0, 1): frozenset({self.hint}), (0, 2): frozenset({self.hint})},
+            "others": {"client_game_state": {(0, 1): 30}},
+            "sequence": 2,
+        }
+
+    @staticmethod
+    def record(delta: dict) -> bytes:
+        from MultiServer import SaveJournal
+
+        data = zlib.compress(pickle.dumps(delta))
+        return SaveJournal.record_header.pack(len(data)) + data
+
+    def assert_state(self, state, checks: set, items: list, game_state: int) -> None:
+        from collections import Counter
+
+        self.assertEqual(state.save["location_checks"][0, 1], checks)
+        self.assertEqual(state.save["received_items"][0, 1, True], items)
+        self.assertEqual(state.received_counts[0, 1, True], Counter(item.item for item in items))
+        self.assertEqual(state.save["client_game_state"], {(0, 1): game_state})
+
+    def test_journal_records(self) -> None:
+        """Verify that records appended to the save are applied, without changing the previous state"""
+        from WebHostLib.tracker import RoomTrackerState
+
+        snapshot = pickle.dumps(self.save)
+        state = RoomTrackerState.load(snapshot)
+        self.assertIs(state.update(snapshot), state)
+        self.assert_state(state, {1, 2}, self.items[:2], 0)
+        self.assertEqual(state.team_hints, {0: frozenset()})
+
+        new_state = state.update(snapshot + self.record(self.delta))
+        self.assert_state(state, {1, 2}, self.items[:2], 0)
+        self.assert_state(new_state, {1, 2, 3}, self.items[:5], 30)
+        self.assertEqual(new_state.team_hints, {0: frozenset({self.hint})})
+        self.assertEqual(new_state.sequence, 2)
+
+        # a record that is still being written is ignored until it is complete
+        record = self.record({"received_items": {(0, 1, True): (5, self.items[5:])}, "sequence": 3})
+        multisave = snapshot + self.record(self.delta) + record
+        self.assertIs(new_state.update(multisave[:-1]), new_state)
+        self.assert_state(new_state.update(multisave), {1, 2, 3}, self.items, 30)
+
+    def test_new_snapshot(self) -> None:
+        """Verify that a new snapshot is compared to the previous state, resulting in the same state as loading it"""
+        from MultiServer import SaveJournal
+        from WebHostLib.tracker import RoomTrackerState
+
+        state = RoomTrackerState.load(pickle.dumps(self.save))
+        SaveJournal.replay(self.save, [self.delta])
+        new_snapshot = pickle.dumps(self.save)
+        new_state = state.update(new_snapshot)
+        loaded_state = RoomTrackerState.load(new_snapshot)
+        self.assertEqual(new_state.save, loaded_state.save)
+        self.assertEqual(new_state.received_counts, loaded_state.received_counts)
+        self.assertEqual(new_state.team_hints, loaded_state.team_hints)
+        self.assertIs(new_state.update(new_snapshot), new_state)
+        # an older save, from a request that loaded it before this one, doesn't undo anything
+        self.assertIs(new_state.update(pickle.dumps({**self.save, "journal_sequence": 0})), new_state)
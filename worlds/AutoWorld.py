@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
@@ -188,21 +189,93 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
-def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
+def _assert_no_duplicate_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
+def call_all(multiworld: "MultiWorld", method_name: str, *args: Any,
+             executor: Optional[concurrent.futures.Executor] = None) -> None:
+    """
+    Calls method_name on every player's world, then the stage_ method of every world type.
+
+    :param executor: if given, consecutive players whose world lists method_name in its slot_isolated_stages are called
+    concurrently in it, while the other players are called in player order in between.
+    """
+    if executor is None:
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                _assert_no_duplicate_items(multiworld, player, multiworld.itempool[prev_item_count:])
+    else:
+        _call_all_concurrently(multiworld, method_name, executor, *args)
+
+    call_stage(multiworld, method_name, *args)
+
+
+def _timed_call_single(multiworld: "MultiWorld", method_name: str, player: int, *args: Any) -> float:
+    start = time.perf_counter()
+    call_single(multiworld, method_name, player, *args)
+    return time.perf_counter() - start
+
+
+def _call_all_concurrently(multiworld: "MultiWorld", method_name: str, executor: concurrent.futures.Executor,
+                           *args: Any) -> None:
+    start = time.perf_counter()
+    isolated_time = 0.0  # time spent by slot-isolated worlds, as if they had been called one after another
+    isolated_wall_time = 0.0
+    isolated_players = 0
+    batch: List[int] = []
+
+    def call_batch() -> None:
+        nonlocal isolated_time, isolated_wall_time, isolated_players
+        batch_start = time.perf_counter()
+        prev_item_count = len(multiworld.itempool)
+        # slot-isolated worlds have to use their own World.random, using the shared one would depend on thread timing
+        futures: List[concurrent.futures.Future[float]] = []
+        multiworld.random.passthrough = False
+        try:
+            for player in batch:
+                futures.append(executor.submit(_timed_call_single, multiworld, method_name, player, *args))
+            concurrent.futures.wait(futures)
+        finally:
+            multiworld.random.passthrough = True
+        for future in futures:
+            isolated_time += future.result()  # re-raises the exception of the first failed player
+        isolated_wall_time += time.perf_counter() - batch_start
+        isolated_players += len(batch)
+
+        # slot-isolated worlds only add their own items, so a stable sort by player restores the serial item order
+        new_items = multiworld.itempool[prev_item_count:]
+        new_items.sort(key=lambda item: item.player)
+        multiworld.itempool[prev_item_count:] = new_items
+        if __debug__:
+            for player in batch:
+                _assert_no_duplicate_items(multiworld, player, [item for item in new_items if item.player == player])
+        batch.clear()
+
     for player in multiworld.player_ids:
+        if method_name in multiworld.worlds[player].slot_isolated_stages:
+            batch.append(player)
+            continue
+        if batch:
+            call_batch()
         prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
         call_single(multiworld, method_name, player, *args)
         if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+            _assert_no_duplicate_items(multiworld, player, multiworld.itempool[prev_item_count:])
+    if batch:
+        call_batch()
 
-    call_stage(multiworld, method_name, *args)
+    if isolated_players:
+        perf_logger.info(f"Took {time.perf_counter() - start:.4f} seconds in {method_name} for all players, "
+                         f"{isolated_wall_time:.4f} seconds of which for {isolated_players} slot-isolated players "
+                         f"that would take {isolated_time:.4f} seconds serially "
+                         f"({isolated_time / max(isolated_wall_time, 1e-9):.2f}x speedup).")
 
 
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
@@ -315,6 +388,25 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    track_rule_dependencies: bool = False
+    """If True, CollectionState records which item names the access_rule of each blocked Entrance and each unreachable
+    advancement Location read, and only re-evaluates those whose recorded item names changed since.
+    Only enable this if rules read items exclusively through CollectionState's has/count methods and collect/remove
+    only change state.prog_items; rules reading nothing from prog_items, and location rules checking region
+    reachability, are always re-evaluated."""
+
+    slot_isolated_stages: ClassVar[FrozenSet[str]] = frozenset()
+    """Names of the per-player generation steps, out of generate_early, create_regions, create_items, set_rules,
+    connect_entrances and generate_basic, that may run concurrently with other players' worlds when the generator is
+    configured to use stage threads. In these steps, the world may only modify its own slot, may only add items for its
+    own player to the itempool, and has to use self.random instead of multiworld.random."""
+
+    output_process_attributes: ClassVar[Optional[FrozenSet[str]]] = None
+    """If set, generate_output may run in a process forked after fill when the generator is configured to use output
+    processes. Changes generate_output makes to the multiworld are then lost, except for the world attributes named
+    here and the player's spoiler hash, which are copied back once it finishes. Named threading.Event attributes are
+    set if they were set in the process, or if generate_output failed, so that waiting threads continue."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
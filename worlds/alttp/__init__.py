@@ -138,6 +138,7 @@ class ALTTPWorld(World):
     settings: typing.ClassVar[ALTTPSettings]
     topology_present = True
     explicit_indirect_conditions = False
+    output_process_attributes = frozenset({"rom_name", "rom_name_available_event"})
     item_name_groups = item_name_groups
     location_name_groups = {
         "Blind's Hideout": {"Blind's Hideout - Top", "Blind's Hideout - Left", "Blind's Hideout - Right",
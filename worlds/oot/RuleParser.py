@@ -1,8 +1,10 @@
 import ast
+import copy
 from collections import defaultdict
 from inspect import signature, _ParameterKind
 import logging
 import re
+from types import CodeType
 
 from .Items import item_table
 from .Location import OOTLocation
@@ -33,6 +35,20 @@ allowed_globals = {'TimeOfDay': TimeOfDay}
 rule_aliases = {}
 nonaliases = set()
 
+# Transformed rules use this in place of the player, so they can be shared by all worlds in the process.
+# The player only gets bound when a world compiles a rule. Nothing in the logic files is this large.
+player_placeholder = 2**62 + 1
+missing_setting = object()
+# (rule string, spot region name, spot type) -> [(settings read, events added, rule ast string, rule ast), ...]
+transformed_rule_cache = defaultdict(list)
+# rule ast string -> code of the rule's lambda, with the player placeholder
+rule_code_cache = {}
+
+# Both caches are only kept while a generation parses rules, from OOTWorld.stage_generate_early to stage_pre_fill.
+def clear_shared_rule_caches():
+    transformed_rule_cache.clear()
+    rule_code_cache.clear()
+
 def load_aliases():
     j = read_json(data_path('LogicHelpers.json'))
     for s, repl in j.items():
@@ -50,6 +66,36 @@ def isliteral(expr):
     return isinstance(expr, (ast.Num, ast.Str, ast.Bytes, ast.NameConstant))
 
 
+# Returns code compiled with the player placeholder as if it had been compiled for player,
+# or None if the compiler would have laid out the constants differently.
+def bind_player(code, player):
+    consts = []
+    for const in code.co_consts:
+        if type(const) is int and const == player_placeholder:
+            const = player
+        elif type(const) is int and const == player:
+            return None  # would have been merged with the player
+        elif isinstance(const, CodeType):
+            const = bind_player(const, player)
+            if const is None:
+                return None
+        elif isinstance(const, (tuple, frozenset)) and player_placeholder in const:
+            return None  # folded into a constant
+        consts.append(const)
+    return code.replace(co_consts=tuple(consts))
+
+
+class Player_Binder(ast.NodeTransformer):
+
+    def __init__(self, player):
+        self.player = player
+
+    def visit_Constant(self, node):
+        if type(node.value) is int and node.value == player_placeholder:
+            return ast.copy_location(ast.Constant(self.player), node)
+        return node
+
+
 class Rule_AST_Transformer(ast.NodeTransformer):
 
     def __init__(self, world, player):
@@ -66,7 +112,11 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         # final rule cache
         self.rule_cache = {}
         self.kwarg_defaults = kwarg_defaults.copy()  # otherwise this gets contaminated between players
-        self.kwarg_defaults['player'] = self.player
+        self.kwarg_defaults['player'] = player_placeholder
+        # what the rule being parsed depends on, to share it with other worlds through transformed_rule_cache
+        self.settings_read = None
+        self.rule_events = None
+        self.cacheable = False
 
 
     def visit_Name(self, node):
@@ -84,23 +134,23 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                     value=ast.Name(id='state', ctx=ast.Load()),
                     attr='has',
                     ctx=ast.Load()),
-                args=[ast.Str(escaped_items[node.id]), ast.Constant(self.player)],
+                args=[ast.Str(escaped_items[node.id]), ast.Constant(player_placeholder)],
                 keywords=[])
-        elif node.id in self.world.__dict__:
+        elif (setting := self.get_setting(node.id)) is not missing_setting:
             # Settings are constant
-            return ast.parse('%r' % self.world.__dict__[node.id], mode='eval').body
+            return ast.parse('%r' % setting, mode='eval').body
         elif node.id in State.__dict__:
             return self.make_call(node, node.id, [], [])
         elif node.id in self.kwarg_defaults or node.id in allowed_globals:
             return node
         elif event_name.match(node.id):
-            self.events.add(node.id.replace('_', ' '))
+            self.add_event(node.id.replace('_', ' '))
             return ast.Call(
                 func=ast.Attribute(
                     value=ast.Name(id='state', ctx=ast.Load()),
                     attr='has',
                     ctx=ast.Load()),
-                args=[ast.Str(node.id.replace('_', ' ')), ast.Constant(self.player)],
+                args=[ast.Str(node.id.replace('_', ' ')), ast.Constant(player_placeholder)],
                 keywords=[])
         else:
             raise Exception('Parse Error: invalid node name %s' % node.id, self.current_spot.name, ast.dump(node, False))
@@ -111,7 +161,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                 value=ast.Name(id='state', ctx=ast.Load()),
                 attr='has',
                 ctx=ast.Load()),
-            args=[ast.Str(node.s), ast.Constant(self.player)],
+            args=[ast.Str(node.s), ast.Constant(player_placeholder)],
             keywords=[])
 
     # python 3.8 compatibility: ast walking now uses visit_Constant for Constant subclasses
@@ -137,20 +187,23 @@ class Rule_AST_Transformer(ast.NodeTransformer):
 
         if isinstance(count, ast.Name):
             # Must be a settings constant
-            count = ast.parse('%r' % self.world.__dict__[count.id], mode='eval').body
+            setting = self.get_setting(count.id)
+            if setting is missing_setting:
+                raise KeyError(count.id)
+            count = ast.parse('%r' % setting, mode='eval').body
 
         if iname in escaped_items:
             iname = escaped_items[iname]
 
         if iname not in item_table:
-            self.events.add(iname)
+            self.add_event(iname)
 
         return ast.Call(
             func=ast.Attribute(
                 value=ast.Name(id='state', ctx=ast.Load()),
                 attr='has',
                 ctx=ast.Load()),
-            args=[ast.Str(iname), ast.Constant(self.player), count],
+            args=[ast.Str(iname), ast.Constant(player_placeholder), count],
             keywords=[])
 
 
@@ -182,7 +235,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         new_args = []
         for child in node.args:
             if isinstance(child, ast.Name):
-                if child.id in self.world.__dict__:
+                if (setting := self.get_setting(child.id)) is not missing_setting:
                     # child = ast.Attribute(
                     #     value=ast.Attribute(
                     #         value=ast.Name(id='state', ctx=ast.Load()),
@@ -190,7 +243,10 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                     #         ctx=ast.Load()),
                     #     attr=child.id,
                     #     ctx=ast.Load())
-                    child = ast.Constant(getattr(self.world, child.id))
+                    child = ast.Constant(setting)
+                    if not isinstance(setting, (str, int, float, type(None))):
+                        # other worlds must not share this world's object
+                        self.cacheable = False
                 elif child.id in rule_aliases:
                     child = self.visit(child)
                 elif child.id in escaped_items:
@@ -221,7 +277,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                                 ctx=ast.Load()),
                             attr='worlds',
                             ctx=ast.Load()),
-                        slice=ast.Index(value=ast.Constant(self.player)),
+                        slice=ast.Index(value=ast.Constant(player_placeholder)),
                         ctx=ast.Load()),
                     attr=node.value.id,
                     ctx=ast.Load()),
@@ -242,7 +298,8 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         # Fast check for json can_use
         if (len(node.ops) == 1 and isinstance(node.ops[0], ast.Eq)
                 and isinstance(node.left, ast.Name) and isinstance(node.comparators[0], ast.Name)
-                and node.left.id not in self.world.__dict__ and node.comparators[0].id not in self.world.__dict__):
+                and self.get_setting(node.left.id) is missing_setting
+                and self.get_setting(node.comparators[0].id) is missing_setting):
             return ast.NameConstant(node.left.id == node.comparators[0].id)
 
         node.left = escape_or_string(node.left)
@@ -325,7 +382,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                     value=ast.Name(id='state', ctx=ast.Load()),
                     attr='has_any' if early_return else 'has_all',
                     ctx=ast.Load()),
-                args=[ast.Tuple(elts=[ast.Str(i) for i in items], ctx=ast.Load()), ast.Constant(self.player)],
+                args=[ast.Tuple(elts=[ast.Str(i) for i in items], ctx=ast.Load()), ast.Constant(player_placeholder)],
                 keywords=[])] + new_values
         else:
             node.values = new_values
@@ -354,6 +411,8 @@ class Rule_AST_Transformer(ast.NodeTransformer):
 
 
     def replace_subrule(self, target, node):
+        # subrules are numbered per world
+        self.cacheable = False
         rule = ast.dump(node, False)
         if rule in self.replaced_rules[target]:
             return self.replaced_rules[target][rule]
@@ -367,7 +426,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
                 value=ast.Name(id='state', ctx=ast.Load()),
                 attr='has',
                 ctx=ast.Load()),
-            args=[ast.Str(subrule_name), ast.Constant(self.player)],
+            args=[ast.Str(subrule_name), ast.Constant(player_placeholder)],
             keywords=[])
         # Cache the subrule for any others in this region
         # (and reserve the item name in the process)
@@ -400,31 +459,52 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         self.delayed_rules.clear()
 
 
-    def make_access_rule(self, body):
-        rule_str = ast.dump(body, False)
+    def make_access_rule(self, body, rule_str=None):
+        if rule_str is None:
+            rule_str = ast.dump(body, False)
         if rule_str not in self.rule_cache:
             # requires consistent iteration on dicts
             kwargs = [ast.arg(arg=k) for k in self.kwarg_defaults.keys()]
             kwd = list(map(ast.Constant, self.kwarg_defaults.values()))
+            expression = ast.fix_missing_locations(
+                ast.Expression(ast.Lambda(
+                    args=ast.arguments(
+                        posonlyargs=[],
+                        args=[ast.arg(arg='state')],
+                        defaults=[],
+                        kwonlyargs=kwargs,
+                        kw_defaults=kwd),
+                    body=body)))
             try:
-                self.rule_cache[rule_str] = eval(compile(
-                    ast.fix_missing_locations(
-                        ast.Expression(ast.Lambda(
-                            args=ast.arguments(
-                                posonlyargs=[],
-                                args=[ast.arg(arg='state')],
-                                defaults=[],
-                                kwonlyargs=kwargs,
-                                kw_defaults=kwd),
-                            body=body))),
-                    '<string>', 'eval'),
-                    # globals/locals. if undefined, everything in the namespace *now* would be allowed
-                    allowed_globals)
+                if rule_str not in rule_code_cache:
+                    rule_code_cache[rule_str] = compile(expression, '<string>', 'eval')
+                code = bind_player(rule_code_cache[rule_str], self.player)
+                if code is None:
+                    code = compile(Player_Binder(self.player).visit(copy.deepcopy(expression)), '<string>', 'eval')
             except TypeError as e:
                 raise Exception('Parse Error: %s' % e, self.current_spot.name, ast.dump(body, False))
+            # globals/locals. if undefined, everything in the namespace *now* would be allowed
+            self.rule_cache[rule_str] = eval(code, allowed_globals)
         return self.rule_cache[rule_str]
 
 
+    # Returns a setting of the world, or missing_setting, noting it as a dependency of the rule being parsed.
+    def get_setting(self, name):
+        value = self.world.__dict__.get(name, missing_setting)
+        if self.settings_read is not None and name not in self.settings_read:
+            self.settings_read[name] = self.setting_repr(name)
+        return value
+
+    def setting_repr(self, name):
+        value = self.world.__dict__.get(name, missing_setting)
+        return None if value is missing_setting else repr(value)
+
+    def add_event(self, name):
+        self.events.add(name)
+        if self.rule_events is not None:
+            self.rule_events.append(name)
+
+
     ## Handlers for specific internal functions used in the json logic.
 
     # at(region_name, rule)
@@ -448,7 +528,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
     ## Handlers for compile-time optimizations (former State functions)
 
     def at_day(self, node):
-        if self.world.ensure_tod_access:
+        if self.get_setting('ensure_tod_access'):
             # tod has DAY or (tod == NONE and (ss or find a path from a provider))
             # parsing is better than constructing this expression by hand
             r = self.current_spot if type(self.current_spot) == OOTRegion else self.current_spot.parent_region
@@ -456,7 +536,7 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         return ast.NameConstant(True)
 
     def at_dampe_time(self, node):
-        if self.world.ensure_tod_access:
+        if self.get_setting('ensure_tod_access'):
             # tod has DAMPE or (tod == NONE and (find a path from a provider))
             # parsing is better than constructing this expression by hand
             r = self.current_spot if type(self.current_spot) == OOTRegion else self.current_spot.parent_region
@@ -464,10 +544,10 @@ class Rule_AST_Transformer(ast.NodeTransformer):
         return ast.NameConstant(True)
 
     def at_night(self, node):
-        if self.current_spot.type == 'GS Token' and self.world.logic_no_night_tokens_without_suns_song:
+        if self.current_spot.type == 'GS Token' and self.get_setting('logic_no_night_tokens_without_suns_song'):
             # Using visit here to resolve 'can_play' rule
             return self.visit(ast.parse('can_play(Suns_Song)', mode='eval').body)
-        if self.world.ensure_tod_access:
+        if self.get_setting('ensure_tod_access'):
             # tod has DAMPE or (tod == NONE and (ss or find a path from a provider))
             # parsing is better than constructing this expression by hand
             r = self.current_spot if type(self.current_spot) == OOTRegion else self.current_spot.parent_region
@@ -479,7 +559,27 @@ class Rule_AST_Transformer(ast.NodeTransformer):
     # If spot is None, here() rules won't work.
     def parse_rule(self, rule_string, spot=None):
         self.current_spot = spot
-        return self.make_access_rule(self.visit(ast.parse(rule_string, mode='eval').body))
+        # Rules only depend on the spot through its region and type, and on the settings they read.
+        # The same rule of the same spot can be reused from any world that has these settings.
+        region = spot if type(spot) == OOTRegion else getattr(spot, 'parent_region', None)
+        key = (rule_string, region.name if region else None, getattr(spot, 'type', None))
+        for settings, events, rule_str, body in transformed_rule_cache.get(key, ()):
+            if all(self.setting_repr(name) == value for name, value in settings):
+                self.events.update(events)
+                return self.make_access_rule(body, rule_str)
+
+        self.settings_read = {}
+        self.rule_events = []
+        self.cacheable = True
+        body = self.visit(ast.parse(rule_string, mode='eval').body)
+        rule_str = ast.dump(body, False)
+        if self.cacheable:
+            transformed_rule_cache[key].append(
+                (tuple(self.settings_read.items()), tuple(self.rule_events), rule_str, body))
+        self.settings_read = None
+        self.rule_events = None
+        self.cacheable = False
+        return self.make_access_rule(body, rule_str)
 
     def parse_spot_rule(self, spot):
         rule = spot.rule_string.split('#', 1)[0].strip()
@@ -494,20 +594,20 @@ class Rule_AST_Transformer(ast.NodeTransformer):
     # Hijacking functions
     def current_spot_child_access(self, node): 
         r = self.current_spot if type(self.current_spot) == OOTRegion else self.current_spot.parent_region
-        return ast.parse(f"state._oot_reach_as_age('{r.name}', 'child', {self.player})", mode='eval').body
+        return ast.parse(f"state._oot_reach_as_age('{r.name}', 'child', {player_placeholder})", mode='eval').body
 
     def current_spot_adult_access(self, node): 
         r = self.current_spot if type(self.current_spot) == OOTRegion else self.current_spot.parent_region
-        return ast.parse(f"state._oot_reach_as_age('{r.name}', 'adult', {self.player})", mode='eval').body
+        return ast.parse(f"state._oot_reach_as_age('{r.name}', 'adult', {player_placeholder})", mode='eval').body
 
     def current_spot_starting_age_access(self, node): 
-        return self.current_spot_child_access(node) if self.world.starting_age == 'child' else self.current_spot_adult_access(node)
+        return self.current_spot_child_access(node) if self.get_setting('starting_age') == 'child' else self.current_spot_adult_access(node)
 
     def has_bottle(self, node): 
-        return ast.parse(f"state._oot_has_bottle({self.player})", mode='eval').body
+        return ast.parse(f"state._oot_has_bottle({player_placeholder})", mode='eval').body
 
     def can_live_dmg(self, node):
-        return ast.parse(f"state._oot_can_live_dmg({self.player}, {node.args[0].value})", mode='eval').body
+        return ast.parse(f"state._oot_can_live_dmg({player_placeholder}, {node.args[0].value})", mode='eval').body
 
     def region_has_shortcuts(self, node):
-        return ast.parse(f"state._oot_region_has_shortcuts({self.player}, '{node.args[0].value}')", mode='eval').body
+        return ast.parse(f"state._oot_region_has_shortcuts({player_placeholder}, '{node.args[0].value}')", mode='eval').body
@@ -104,6 +104,7 @@ class OOTLogic(LogicMixin):
             rrp = getattr(self, f'{age}_reachable_regions')[player]
             bc = getattr(self, f'{age}_blocked_connections')[player]
             queue = deque(getattr(self, f'{age}_blocked_connections')[player])
+            paths = self.player_paths[player]
             start = self.multiworld.get_region('Menu', player)
 
             # init on first call - this can't be done on construction since the regions don't exist yet
@@ -125,7 +126,7 @@ class OOTLogic(LogicMixin):
                     bc.remove(connection)
                     bc.update(new_region.exits)
                     queue.extend(new_region.exits)
-                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                    paths[new_region] = (new_region.name, paths.get(connection, None))
 
 
 # Sets extra rules on various specific locations not handled by the rule parser.
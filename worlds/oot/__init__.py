@@ -19,7 +19,7 @@ from .Items import OOTItem, item_table, oot_data_to_ap_id, oot_is_item_of_type
 from .ItemPool import generate_itempool, get_junk_item, get_junk_pool
 from .Regions import OOTRegion, TimeOfDay
 from .Rules import set_rules, set_shop_rules, set_entrances_based_rules
-from .RuleParser import Rule_AST_Transformer
+from .RuleParser import Rule_AST_Transformer, clear_shared_rule_caches
 from .Options import OoTOptions, oot_option_groups
 from .Utils import data_path, read_json
 from .LocationList import business_scrubs, set_drop_location_names, dungeon_song_locations
@@ -206,6 +206,12 @@ class OOTWorld(World):
         rom = Rom(file=oot_settings.rom_file)
 
 
+    @classmethod
+    def stage_generate_early(cls, multiworld: MultiWorld):
+        # drop rules left over from an unfinished generation before any are parsed
+        clear_shared_rule_caches()
+
+
     # Option parsing, handling incompatible options, building useful-item table
     def generate_early(self):
         self.parser = Rule_AST_Transformer(self, self.player)
@@ -1049,6 +1055,12 @@ class OOTWorld(World):
                 loc.address = None
 
 
+    @classmethod
+    def stage_pre_fill(cls, multiworld: MultiWorld):
+        # every rule is parsed by now, so the rules shared between worlds don't need to be kept
+        clear_shared_rule_caches()
+
+
     def generate_output(self, output_directory: str):
 
         # Write entrances to spoiler log
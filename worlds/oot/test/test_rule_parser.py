@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+from test.general import setup_multiworld
+from .. import OOTWorld, RuleParser
+
+
+def describe_code(code):
+    return (code.co_code, code.co_names,
+            tuple(describe_code(const) if hasattr(const, "co_code") else const for const in code.co_consts))
+
+
+def describe_rules(multiworld):
+    rules = {}
+    for player in multiworld.player_ids:
+        for spot in [*multiworld.get_locations(player), *multiworld.get_entrances(player)]:
+            rule = spot.access_rule
+            rules[player, spot.name] = (describe_code(rule.__code__), rule.__kwdefaults__,
+                                        getattr(spot, "never", None), getattr(spot, "always", None))
+        rules[player, "events"] = multiworld.worlds[player].parser.events
+    return rules
+
+
+class TestRuleParser(unittest.TestCase):
+    steps = ("generate_early", "create_regions")
+
+    def test_shared_rules(self) -> None:
+        """Rules shared between worlds should compile to the same rules as parsing them for each world."""
+        with mock.patch.dict(RuleParser.transformed_rule_cache, clear=True), \
+                mock.patch.dict(RuleParser.rule_code_cache, clear=True):
+            shared = describe_rules(setup_multiworld([OOTWorld] * 2, self.steps, seed=0))
+            self.assertTrue(RuleParser.transformed_rule_cache)
+
+        # nothing is found in or kept by a mocked cache, and binding always falls back to compiling the rule
+        with mock.patch.object(RuleParser, "transformed_rule_cache", mock.MagicMock()), \
+                mock.patch.object(RuleParser, "bind_player", return_value=None):
+            separate = describe_rules(setup_multiworld([OOTWorld] * 2, self.steps, seed=0))
+
+        self.assertEqual(shared, separate)
+
+    def test_caches_cleared(self) -> None:
+        """The rules shared between worlds should only be kept until every world is done parsing rules."""
+        RuleParser.transformed_rule_cache[None].append(None)
+        setup_multiworld([OOTWorld] * 2, ("generate_early",), seed=0)
+        self.assertFalse(RuleParser.transformed_rule_cache)
+        setup_multiworld([OOTWorld] * 2, seed=0)
+        self.assertFalse(RuleParser.transformed_rule_cache)
+        self.assertFalse(RuleParser.rule_code_cache)
@@ -98,6 +98,7 @@ class SMWorld(World):
     """
     game: str = "Super Metroid"
     topology_present = True
+    output_process_attributes = frozenset({"rom_name", "rom_name_available_event"})
     options_dataclass = SMOptions
     options: SMOptions
       